@@ -0,0 +1,72 @@
+"""save_messages uchun ORM va COPY usullarining o‘tkazuvchanligini solishtirish.
+
+Ishga tushirish: python benchmarks/bench_save_messages.py --rows 100000 --batch 5000
+Benchmark vaqtinchalik guruh yaratadi va oxirida o‘z xabarlarini o‘chiradi.
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import asyncio
+import datetime
+import logging
+import time
+from sqlalchemy import delete
+from src.database import async_session, save_messages
+from src.models import Group, Message
+
+BENCH_GROUP_ID = -1009999999999
+
+def make_messages(count: int, start_id: int) -> list:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        {
+            "id": start_id + i,
+            "group_id": BENCH_GROUP_ID,
+            "user_id": None,
+            "account_name": "bench",
+            "text": f"benchmark xabari {i} " * 5,
+            "timestamp": now - datetime.timedelta(seconds=i),
+            "url": f"https://t.me/c/9999999999/{start_id + i}",
+        }
+        for i in range(count)
+    ]
+
+async def cleanup() -> None:
+    async with async_session() as session:
+        await session.execute(delete(Message).where(Message.group_id == BENCH_GROUP_ID))
+        await session.commit()
+
+async def run_mode(mode: str, rows: int, batch: int, logger: logging.Logger) -> float:
+    messages = make_messages(rows, start_id=1)
+    await cleanup()
+    started = time.perf_counter()
+    for offset in range(0, rows, batch):
+        await save_messages(messages[offset:offset + batch], logger, mode=mode)
+    elapsed = time.perf_counter() - started
+    await cleanup()
+    return elapsed
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--batch", type=int, default=5000)
+    args = parser.parse_args()
+
+    logger = logging.getLogger("bench")
+    logger.setLevel(logging.WARNING)
+
+    async with async_session() as session:
+        await session.merge(Group(id=BENCH_GROUP_ID, name="benchmark"))
+        await session.commit()
+
+    results = {}
+    for mode in ("orm", "copy"):
+        results[mode] = await run_mode(mode, args.rows, args.batch, logger)
+        print(f"{mode:>5}: {args.rows} qator, {results[mode]:.2f} s, {args.rows / results[mode]:.0f} qator/s")
+    print(f"COPY tezligi ORM ga nisbatan: {results['orm'] / results['copy']:.1f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
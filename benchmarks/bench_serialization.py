@@ -0,0 +1,80 @@
+"""/messages sahifasini tayyorlash: ORM + standart JSON va ustunli qatorlar + orjson yo‘llarini solishtirish.
+
+Ishga tushirish: python benchmarks/bench_serialization.py --limit 500 --repeat 50 [--group-id ID]
+Har ikki yo‘l bir xil so‘rovni bajaradi; alohida o‘qish (DB) va kodlash vaqtlari ko‘rsatiladi.
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import argparse
+import asyncio
+import json
+import time
+import orjson
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.future import select
+from src.database import async_session
+from src.models import Message
+from src.pagination import MESSAGE_LIST_COLUMNS, filter_messages, paginate_messages
+
+def orm_to_dict(message: Message) -> dict:
+    """Avvalgi yo‘l: ORM obyektidan qo‘lda lug‘at yasash"""
+    return {
+        "id": message.id,
+        "group_id": message.group_id,
+        "user_id": message.user_id,
+        "account_name": message.account_name,
+        "text": message.text,
+        "timestamp": message.timestamp.isoformat(),
+        "url": message.url,
+    }
+
+async def orm_path(limit: int, group_id) -> tuple:
+    started = time.perf_counter()
+    async with async_session() as session:
+        stmt = paginate_messages(filter_messages(select(Message), group_id=group_id), None, limit)
+        result = await session.execute(stmt)
+        items = [orm_to_dict(msg) for msg in result.scalars().all()[:limit]]
+    fetched = time.perf_counter()
+    # FastAPI standart JSONResponse: jsonable_encoder + json.dumps
+    body = json.dumps(jsonable_encoder({"items": items}), ensure_ascii=False).encode()
+    return fetched - started, time.perf_counter() - fetched, len(body)
+
+async def fast_path(limit: int, group_id) -> tuple:
+    started = time.perf_counter()
+    async with async_session() as session:
+        stmt = paginate_messages(filter_messages(select(*MESSAGE_LIST_COLUMNS), group_id=group_id), None, limit)
+        result = await session.execute(stmt)
+        items = [row._asdict() for row in result.all()[:limit]]
+    fetched = time.perf_counter()
+    body = orjson.dumps({"items": items})
+    return fetched - started, time.perf_counter() - fetched, len(body)
+
+async def measure(path, repeat: int, limit: int, group_id) -> tuple:
+    await path(limit, group_id)  # Isitish: ulanish va so‘rov keshi
+    fetch_total = encode_total = 0.0
+    size = 0
+    for _ in range(repeat):
+        fetch, encode, size = await path(limit, group_id)
+        fetch_total += fetch
+        encode_total += encode
+    return fetch_total / repeat, encode_total / repeat, size
+
+async def main():
+    parser = argparse.ArgumentParser(description="Ro‘yxat javoblarini serializatsiya qilish benchmark’i")
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--group-id", type=int)
+    args = parser.parse_args()
+
+    for name, path in (("orm+json", orm_path), ("rows+orjson", fast_path)):
+        fetch, encode, size = await measure(path, args.repeat, args.limit, args.group_id)
+        print(
+            f"{name:12} o‘qish {fetch * 1000:8.2f} ms  kodlash {encode * 1000:8.2f} ms  "
+            f"jami {(fetch + encode) * 1000:8.2f} ms  ({size} bayt)"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
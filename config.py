@@ -13,11 +13,137 @@ ADMIN_CHAT_ID = os.getenv("ADMIN_CHAT_ID")
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 
 DB_CONFIG = {
-    "user": os.getenv("DB_USER"),
-    "password": os.getenv("DB_PASSWORD"),
-    "database": os.getenv("DB_NAME"),
-    "host": os.getenv("DB_HOST", "localhost")
+    "user": os.getenv("DB_USER", "meta"),
+    "password": os.getenv("DB_PASSWORD", "123456"),
+    "database": os.getenv("DB_NAME", "baza"),
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": int(os.getenv("DB_PORT", 5432)),
 }
+# To‘liq URL berilsa DB_CONFIG o‘rniga ishlatiladi
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Databaza ulanishlari: SQL log’lari, asyncpg prepared statement keshi va PgBouncer (transaction pooling) rejimi
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 100))
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Pool hajmi har bir jarayon turi uchun alohida: ingest katta paketlar yozadi, API ko‘p qisqa so‘rovlar bajaradi
+DB_POOL = {
+    "ingest": {
+        "pool_size": int(os.getenv("INGEST_DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.getenv("INGEST_DB_MAX_OVERFLOW", 5)),
+    },
+    "api": {
+        "pool_size": int(os.getenv("API_DB_POOL_SIZE", 10)),
+        "max_overflow": int(os.getenv("API_DB_MAX_OVERFLOW", 20)),
+    },
+}
+
+# Ingest jarayoni Prometheus metrikalari porti (0 — o‘chirilgan; API metrikalari /metrics da)
+METRICS_PORT = int(os.getenv("METRICS_PORT", 8001))
+
+# Ingest navbati: paket hajmi, flush muddati (soniya), navbat sig‘imi va databaza mavjud bo‘lmaganda
+# paketni qayta yuborish kutishi (boshlang‘ich va maksimal, soniya)
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 500))
+INGEST_FLUSH_INTERVAL = float(os.getenv("INGEST_FLUSH_INTERVAL", 0.25))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", 10000))
+INGEST_RETRY_DELAY = float(os.getenv("INGEST_RETRY_DELAY", 1))
+INGEST_RETRY_MAX_DELAY = float(os.getenv("INGEST_RETRY_MAX_DELAY", 60))
+
+# Xabarlarni saqlash usuli: "copy" (asyncpg COPY + staging jadval) yoki "orm"
+SAVE_MODE = os.getenv("SAVE_MODE", "copy")
+
+# Tarixni yig‘ish: har bir hisob uchun parallel guruhlar soni, progress hisoboti oralig‘i (soniya),
+# xato bilan tugagan guruhni qayta urinishlar soni va birinchi qayta urinishgacha kutish (soniya, har safar ikki baravar)
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", 3))
+BACKFILL_REPORT_INTERVAL = float(os.getenv("BACKFILL_REPORT_INTERVAL", 30))
+BACKFILL_MAX_ATTEMPTS = int(os.getenv("BACKFILL_MAX_ATTEMPTS", 5))
+BACKFILL_RETRY_DELAY = float(os.getenv("BACKFILL_RETRY_DELAY", 60))
+
+# Guruh/foydalanuvchi kesh: maksimal yozuvlar soni va yashash muddati (soniya)
+ENTITY_CACHE_SIZE = int(os.getenv("ENTITY_CACHE_SIZE", 50000))
+ENTITY_CACHE_TTL = float(os.getenv("ENTITY_CACHE_TTL", 3600))
+
+# Media yuklab olish: umumiy worker’lar, hisob boshiga parallel yuklashlar, navbat sig‘imi va qayta urinishlar
+MEDIA_WORKERS = int(os.getenv("MEDIA_WORKERS", 4))
+MEDIA_PER_ACCOUNT = int(os.getenv("MEDIA_PER_ACCOUNT", 2))
+MEDIA_QUEUE_SIZE = int(os.getenv("MEDIA_QUEUE_SIZE", 1000))
+MEDIA_MAX_ATTEMPTS = int(os.getenv("MEDIA_MAX_ATTEMPTS", 5))
+MEDIA_RETRY_DELAY = float(os.getenv("MEDIA_RETRY_DELAY", 2))
+# Kontent bo‘yicha manzillanadigan media ombori ildizi
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", os.path.join("static", "media", "blobs"))
+
+# API javoblari keshi: yozuvlar soni (guruh versiyalari STREAM_BROKER orqali yangilanadi:
+# "postgres" — ingest NOTIFY qiladi, API tinglaydi; "local" — ingest va API bitta jarayonda)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 1024))
+
+# Jonli oqim (/stream): xabarlar tarqatish usuli ("postgres" — LISTEN/NOTIFY, "local" — bitta jarayon ichida),
+# har bir mijoz buferi, o‘qilmagan bildirishnomalar navbati, heartbeat oralig‘i (soniya)
+# va LISTEN uchun to‘g‘ridan-to‘g‘ri ulanish (PgBouncer’siz)
+STREAM_BROKER = os.getenv("STREAM_BROKER", "postgres")
+STREAM_CLIENT_BUFFER = int(os.getenv("STREAM_CLIENT_BUFFER", 1000))
+STREAM_PENDING_SIZE = int(os.getenv("STREAM_PENDING_SIZE", 1000))
+STREAM_HEARTBEAT = float(os.getenv("STREAM_HEARTBEAT", 15))
+STREAM_LISTEN_URL = os.getenv("STREAM_LISTEN_URL")
+
+# Oqimli tahlil: sliding window’lar ("nom:bo‘laklar"), Space-Saving sig‘imi (guruh / umumiy),
+# saqlanadigan top so‘zlar soni, nusxa olish oralig‘i va saqlash muddati (soniya)
+ANALYTICS_WINDOWS = os.getenv("ANALYTICS_WINDOWS", "1h:6,24h:12,7d:14")
+ANALYTICS_GROUP_CAPACITY = int(os.getenv("ANALYTICS_GROUP_CAPACITY", 100))
+ANALYTICS_GLOBAL_CAPACITY = int(os.getenv("ANALYTICS_GLOBAL_CAPACITY", 2000))
+ANALYTICS_TOP_N = int(os.getenv("ANALYTICS_TOP_N", 50))
+ANALYTICS_SNAPSHOT_INTERVAL = float(os.getenv("ANALYTICS_SNAPSHOT_INTERVAL", 60))
+ANALYTICS_SNAPSHOT_RETENTION = int(os.getenv("ANALYTICS_SNAPSHOT_RETENTION", 7 * 86400))
+
+# Portlashlarni aniqlash: tick (soniya), EWMA koeffitsienti, z-score chegarasi, tick ichidagi minimal hisob,
+# guruh bazasi shakllanishi uchun tick’lar, guruh boshiga kuzatiladigan so‘zlar va eskirish muddati (tick)
+BURST_TICK = float(os.getenv("BURST_TICK", 60))
+BURST_ALPHA = float(os.getenv("BURST_ALPHA", 0.1))
+BURST_THRESHOLD = float(os.getenv("BURST_THRESHOLD", 4))
+BURST_MIN_COUNT = int(os.getenv("BURST_MIN_COUNT", 5))
+BURST_WARMUP_TICKS = int(os.getenv("BURST_WARMUP_TICKS", 30))
+BURST_MAX_TERMS = int(os.getenv("BURST_MAX_TERMS", 500))
+# Kuzatuvdan chiqarilgan so‘zlarning bazasi shuncha so‘zgacha eslab qolinadi (guruh boshiga)
+BURST_MAX_EVICTED = int(os.getenv("BURST_MAX_EVICTED", 2000))
+BURST_STALE_TICKS = int(os.getenv("BURST_STALE_TICKS", 120))
+
+# Deyarli bir xil xabarlar indeksi: klasterlar soni, MinHash o‘xshashlik chegarasi,
+# minimal so‘zlar soni va ishga tushishda indeks quriladigan davr (kun)
+DEDUP_CAPACITY = int(os.getenv("DEDUP_CAPACITY", 200000))
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.5))
+DEDUP_MIN_TOKENS = int(os.getenv("DEDUP_MIN_TOKENS", 5))
+DEDUP_REBUILD_DAYS = int(os.getenv("DEDUP_REBUILD_DAYS", 7))
+
+# Tahlilni butun tarix bo‘yicha qayta hisoblash (python -m src.recompute): protsesslar soni (standart — yadrolar soni),
+# parallel o‘quvchi ulanishlar, server-side cursor bo‘lagi, bitta vazifadagi xabarlar soni, progress oralig‘i (soniya)
+# va uzilgan ishni davom ettirish uchun holat fayli
+RECOMPUTE_WORKERS = int(os.getenv("RECOMPUTE_WORKERS", 0)) or os.cpu_count() or 1
+RECOMPUTE_READERS = int(os.getenv("RECOMPUTE_READERS", 2))
+RECOMPUTE_CHUNK_ROWS = int(os.getenv("RECOMPUTE_CHUNK_ROWS", 5000))
+RECOMPUTE_PARTITION_ROWS = int(os.getenv("RECOMPUTE_PARTITION_ROWS", 100000))
+RECOMPUTE_REPORT_INTERVAL = float(os.getenv("RECOMPUTE_REPORT_INTERVAL", 10))
+RECOMPUTE_STATE_FILE = os.getenv("RECOMPUTE_STATE_FILE", os.path.join(os.path.dirname(__file__), "recompute_state.json"))
+
+# messages jadvalining oylik bo‘limlari: oldindan yaratiladigan kelgusi oylar soni va saqlanadigan oylar
+# (0 — cheklanmagan; eskiroq bo‘limlar python -m src.partitions maintain bilan ajratiladi)
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", 3))
+PARTITION_RETAIN_MONTHS = int(os.getenv("PARTITION_RETAIN_MONTHS", 0))
+
+# Kalit so‘z ogohlantirishlari (BOT_TOKEN va ADMIN_CHAT_ID berilganda): qoidalar fayli, bir guruhdagi bir qoida uchun
+# takroriy ogohlantirishlar oralig‘i, yuborish va faylni tekshirish oralig‘i (soniya), bitta yuborishdagi batafsil
+# ogohlantirishlar soni va Bot API manzili (lokal stub uchun, masalan http://localhost:8081)
+ALERT_RULES_FILE = os.getenv("ALERT_RULES_FILE", os.path.join(os.path.dirname(__file__), "alert_rules.txt"))
+ALERT_DEBOUNCE = float(os.getenv("ALERT_DEBOUNCE", 600))
+ALERT_BATCH_INTERVAL = float(os.getenv("ALERT_BATCH_INTERVAL", 10))
+ALERT_RELOAD_INTERVAL = float(os.getenv("ALERT_RELOAD_INTERVAL", 5))
+ALERT_MAX_PER_BATCH = int(os.getenv("ALERT_MAX_PER_BATCH", 30))
+ALERT_BOT_API_URL = os.getenv("ALERT_BOT_API_URL")
+
+# Logging: fayl, daraja va har bir xabar uchun yoziladigan log’lar oralig‘i (soniya)
+LOG_FILE = os.getenv("LOG_FILE", os.path.join(os.path.dirname(__file__), "app.log"))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_SAMPLE_INTERVAL = float(os.getenv("LOG_SAMPLE_INTERVAL", 10))
 
 ACCOUNTS_DIR = os.path.join(os.path.dirname(__file__), "accounts")
 SESSION_DIR = os.path.join(os.path.dirname(__file__), "sessions")
@@ -1,15 +1,89 @@
 import logging
+import logging.handlers
+import atexit
+import queue
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from config import LOG_FILE, LOG_LEVEL, LOG_SAMPLE_INTERVAL
+
+FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(account)s/%(chat)s] %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_lock = threading.Lock()
+
+class ContextFilter(logging.Filter):
+    """Yozuvda hisob va chat maydonlari bo‘lmasa "-" qo‘yadi"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "account"):
+            record.account = "-"
+        if not hasattr(record, "chat"):
+            record.chat = "-"
+        return True
+
+class SamplingFilter(logging.Filter):
+    """`sample` kaliti bor yozuvlarni (hisob, chat, kalit) bo‘yicha har `interval` soniyada bittadan o‘tkazadi.
+
+    O‘tkazib yuborilganlar soni keyingi yozuvga qo‘shib chiqariladi. Xatolar cheklanmaydi.
+    """
+
+    def __init__(self, interval: float = LOG_SAMPLE_INTERVAL):
+        super().__init__()
+        self.interval = interval
+        self._state: Dict[Tuple, Tuple[float, int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        sample = getattr(record, "sample", None)
+        if sample is None or record.levelno >= logging.WARNING:
+            return True
+        key = (record.account, record.chat, sample)
+        now = time.monotonic()
+        last, suppressed = self._state.get(key, (0.0, 0))
+        if now - last < self.interval:
+            self._state[key] = (last, suppressed + 1)
+            return False
+        self._state[key] = (now, 0)
+        if suppressed:
+            record.msg = f"{record.getMessage()} (+{suppressed} ta o‘xshash yozuv o‘tkazib yuborildi)"
+            record.args = None
+        return True
+
+class ContextAdapter(logging.LoggerAdapter):
+    """Har bir yozuvga hisob va chat maydonlarini qo‘shadi (chaqiruvdagi `extra` bilan birlashtirib)"""
+
+    def process(self, msg, kwargs):
+        kwargs["extra"] = {**self.extra, **kwargs.get("extra", {})}
+        return msg, kwargs
+
+def context_logger(logger: logging.Logger, account: str = "-", chat="-") -> ContextAdapter:
+    return ContextAdapter(logger, {"account": account, "chat": chat})
 
 def setup_logger():
+    """Logger’ni bir marta sozlaydi: yozuvlar navbat orqali alohida oqimda konsol va faylga chiqariladi"""
+    global _listener
     logger = logging.getLogger(__name__)
-    logger.setLevel(logging.INFO)
-    
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
-    return logger
+    with _lock:
+        if _listener is not None:
+            return logger
+        logger.setLevel(LOG_LEVEL)
+        logger.propagate = False
 
+        formatter = logging.Formatter(FORMAT)
 
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+        file_handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+        file_handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
+        queue_handler.addFilter(SamplingFilter())
+        logger.addHandler(queue_handler)
+
+        _listener = logging.handlers.QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+    
+    return logger
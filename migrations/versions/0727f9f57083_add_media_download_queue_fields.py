@@ -0,0 +1,60 @@
+"""Add media download queue fields
+
+Revision ID: 0727f9f57083
+Revises: a38a0ab95105
+Create Date: 2026-10-18 12:31:05.518264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0727f9f57083'
+down_revision: Union[str, None] = 'a38a0ab95105'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+mediastatus = postgresql.ENUM('PENDING', 'DONE', 'FAILED', name='mediastatus', create_type=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    mediastatus.create(op.get_bind(), checkfirst=True)
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.alter_column('file_path',
+               existing_type=sa.String(),
+               nullable=True)
+        batch_op.add_column(sa.Column('file_id', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('file_unique_id', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('account_name', sa.String(), nullable=True))
+        # Mavjud qatorlar allaqachon yuklab olingan
+        batch_op.add_column(sa.Column('status', mediastatus, nullable=False, server_default='DONE'))
+        batch_op.add_column(sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('error', sa.Text(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_media_status'), ['status'], unique=False)
+        batch_op.create_unique_constraint('uq_media_message_file', ['message_id', 'file_unique_id'])
+
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.alter_column('status', server_default=None)
+        batch_op.alter_column('attempts', server_default=None)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM media WHERE file_path IS NULL")
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_media_message_file', type_='unique')
+        batch_op.drop_index(batch_op.f('ix_media_status'))
+        batch_op.drop_column('error')
+        batch_op.drop_column('attempts')
+        batch_op.drop_column('status')
+        batch_op.drop_column('account_name')
+        batch_op.drop_column('file_unique_id')
+        batch_op.drop_column('file_id')
+        batch_op.alter_column('file_path',
+               existing_type=sa.String(),
+               nullable=False)
+    mediastatus.drop(op.get_bind(), checkfirst=True)
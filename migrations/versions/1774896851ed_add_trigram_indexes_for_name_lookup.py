@@ -0,0 +1,41 @@
+"""Add trigram indexes for name lookup
+
+Revision ID: 1774896851ed
+Revises: 906d45563ea7
+Create Date: 2026-10-18 14:48:37.120554
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1774896851ed'
+down_revision: Union[str, None] = '906d45563ea7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.batch_alter_table('groups', schema=None) as batch_op:
+        batch_op.create_index('idx_groups_name_trgm', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+        batch_op.create_index('idx_groups_username_trgm', ['username'], unique=False, postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'})
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('idx_users_first_name_trgm', ['first_name'], unique=False, postgresql_using='gin', postgresql_ops={'first_name': 'gin_trgm_ops'})
+        batch_op.create_index('idx_users_username_trgm', ['username'], unique=False, postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('idx_users_username_trgm', postgresql_using='gin')
+        batch_op.drop_index('idx_users_first_name_trgm', postgresql_using='gin')
+
+    with op.batch_alter_table('groups', schema=None) as batch_op:
+        batch_op.drop_index('idx_groups_username_trgm', postgresql_using='gin')
+        batch_op.drop_index('idx_groups_name_trgm', postgresql_using='gin')
@@ -0,0 +1,167 @@
+"""Partition messages by month
+
+Revision ID: 2374db028782
+Revises: 5987a7bb4a29
+Create Date: 2026-10-18 19:12:07.518344
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2374db028782'
+down_revision: Union[str, None] = '5987a7bb4a29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR = (
+    "to_tsvector('simple'::regconfig, tg_search_normalize(coalesce(text, ''))) || "
+    "to_tsvector('russian'::regconfig, coalesce(text, ''))"
+)
+COLUMNS = "id, group_id, user_id, account_name, text, timestamp, url, cluster_id"
+
+# Mavjud ma'lumotlar oylari va keyingi 3 oy uchun bo‘limlar (oylar UTC bo‘yicha, src/partitions.py bilan bir xil nomlar)
+CREATE_PARTITIONS = """
+DO $$
+DECLARE
+    cur timestamp;
+    last_month timestamp;
+BEGIN
+    SELECT coalesce(date_trunc('month', min("timestamp") AT TIME ZONE 'UTC'), date_trunc('month', now() AT TIME ZONE 'UTC')),
+           date_trunc('month', greatest(max("timestamp"), now()) AT TIME ZONE 'UTC') + interval '3 months'
+      INTO cur, last_month
+      FROM messages_unpartitioned;
+    WHILE cur <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF messages FOR VALUES FROM (%L) TO (%L)',
+            'messages_y' || to_char(cur, 'YYYY') || 'm' || to_char(cur, 'MM'),
+            to_char(cur, 'YYYY-MM-DD') || ' 00:00:00+00',
+            to_char(cur + interval '1 month', 'YYYY-MM-DD') || ' 00:00:00+00'
+        );
+        cur := cur + interval '1 month';
+    END LOOP;
+END $$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # media xabarni (group_id, message_id, message_timestamp) bo‘yicha topadi
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('group_id', sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column('message_timestamp', sa.DateTime(timezone=True), nullable=True))
+    op.execute(
+        "UPDATE media SET group_id = m.group_id, message_timestamp = m.timestamp "
+        "FROM messages m WHERE m.id = media.message_id"
+    )
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.alter_column('group_id', existing_type=sa.BigInteger(), nullable=False)
+        batch_op.alter_column('message_timestamp', existing_type=sa.DateTime(timezone=True), nullable=False)
+        batch_op.drop_constraint('media_message_id_fkey', type_='foreignkey')
+        batch_op.drop_constraint('uq_media_message_file', type_='unique')
+        batch_op.drop_index('ix_media_message_id')
+        batch_op.create_unique_constraint('uq_media_message_file', ['group_id', 'message_id', 'file_unique_id'])
+        batch_op.create_index(batch_op.f('ix_media_message_timestamp'), ['message_timestamp'], unique=False)
+
+    # Eski jadval nomi o‘zgartiriladi, indeks va cheklov nomlari yangi jadval uchun bo‘shatiladi
+    op.rename_table('messages', 'messages_unpartitioned')
+    with op.batch_alter_table('messages_unpartitioned', schema=None) as batch_op:
+        batch_op.drop_index('idx_group_timestamp')
+        batch_op.drop_index('ix_messages_group_id')
+        batch_op.drop_index('ix_messages_timestamp')
+        batch_op.drop_index('ix_messages_user_id')
+        batch_op.drop_index('ix_messages_cluster_id')
+        batch_op.drop_index('idx_messages_search_vector', postgresql_using='gin')
+        batch_op.drop_constraint('uq_message_id_group_id', type_='unique')
+        batch_op.drop_constraint('messages_pkey', type_='primary')
+
+    op.create_table('messages',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('group_id', sa.BigInteger(), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=True),
+    sa.Column('account_name', sa.String(length=50), nullable=True),
+    sa.Column('text', sa.TEXT(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('url', sa.String(length=255), nullable=True),
+    sa.Column('cluster_id', sa.BigInteger(), nullable=True),
+    sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True), nullable=True),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('group_id', 'id', 'timestamp'),
+    postgresql_partition_by='RANGE (timestamp)'
+    )
+    op.execute(CREATE_PARTITIONS)
+    op.execute("CREATE TABLE messages_default PARTITION OF messages DEFAULT")
+    # Indekslar ko‘chirishdan keyin quriladi: bitta tartiblash har bir qator uchun yangilashdan tezroq
+    op.execute(f"INSERT INTO messages ({COLUMNS}) SELECT {COLUMNS} FROM messages_unpartitioned")
+    op.drop_table('messages_unpartitioned')
+
+    with op.batch_alter_table('messages', schema=None) as batch_op:
+        batch_op.create_index('idx_group_timestamp', ['group_id', 'timestamp'], unique=False)
+        batch_op.create_index(batch_op.f('ix_messages_timestamp'), ['timestamp'], unique=False)
+        batch_op.create_index(batch_op.f('ix_messages_user_id'), ['user_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_messages_cluster_id'), ['cluster_id'], unique=False)
+        batch_op.create_index('idx_messages_search_vector', ['search_vector'], unique=False, postgresql_using='gin')
+
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.create_foreign_key(
+            'fk_media_message', 'messages',
+            ['group_id', 'message_id', 'message_timestamp'], ['group_id', 'id', 'timestamp'],
+            deferrable=True, initially='DEFERRED',
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Bir xil ID turli chatlarda uchrasa (faqat yangi sxemada mumkin) PK(id) yaratilmaydi va downgrade to‘xtaydi.
+    # Ajratilgan (DETACH) bo‘limlar qaytarilmaydi.
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_media_message', type_='foreignkey')
+
+    op.rename_table('messages', 'messages_partitioned')
+    with op.batch_alter_table('messages_partitioned', schema=None) as batch_op:
+        batch_op.drop_index('idx_messages_search_vector', postgresql_using='gin')
+        batch_op.drop_index(batch_op.f('ix_messages_cluster_id'))
+        batch_op.drop_index(batch_op.f('ix_messages_user_id'))
+        batch_op.drop_index(batch_op.f('ix_messages_timestamp'))
+        batch_op.drop_index('idx_group_timestamp')
+        batch_op.drop_constraint('messages_pkey', type_='primary')
+
+    op.create_table('messages',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('group_id', sa.BigInteger(), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=True),
+    sa.Column('account_name', sa.String(length=50), nullable=True),
+    sa.Column('text', sa.TEXT(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('url', sa.String(length=255), nullable=True),
+    sa.Column('cluster_id', sa.BigInteger(), nullable=True),
+    sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True), nullable=True),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(f"INSERT INTO messages ({COLUMNS}) SELECT {COLUMNS} FROM messages_partitioned")
+    op.drop_table('messages_partitioned')
+
+    with op.batch_alter_table('messages', schema=None) as batch_op:
+        batch_op.create_index('idx_group_timestamp', ['group_id', 'timestamp'], unique=False)
+        batch_op.create_index(batch_op.f('ix_messages_group_id'), ['group_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_messages_timestamp'), ['timestamp'], unique=False)
+        batch_op.create_index(batch_op.f('ix_messages_user_id'), ['user_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_messages_cluster_id'), ['cluster_id'], unique=False)
+        batch_op.create_index('idx_messages_search_vector', ['search_vector'], unique=False, postgresql_using='gin')
+        batch_op.create_unique_constraint('uq_message_id_group_id', ['id', 'group_id'])
+
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_media_message_timestamp'))
+        batch_op.drop_constraint('uq_media_message_file', type_='unique')
+        batch_op.create_unique_constraint('uq_media_message_file', ['message_id', 'file_unique_id'])
+        batch_op.create_index(batch_op.f('ix_media_message_id'), ['message_id'], unique=False)
+        batch_op.create_foreign_key('media_message_id_fkey', 'messages', ['message_id'], ['id'])
+        batch_op.drop_column('message_timestamp')
+        batch_op.drop_column('group_id')
@@ -0,0 +1,68 @@
+"""Add group activity rollups
+
+Revision ID: 52499046fde1
+Revises: 1774896851ed
+Create Date: 2026-10-18 15:32:10.481273
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '52499046fde1'
+down_revision: Union[str, None] = '1774896851ed'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('group_hourly_stats',
+    sa.Column('group_id', sa.BigInteger(), nullable=False),
+    sa.Column('hour', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('message_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.PrimaryKeyConstraint('group_id', 'hour')
+    )
+    op.create_table('group_daily_stats',
+    sa.Column('group_id', sa.BigInteger(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('message_count', sa.Integer(), nullable=False),
+    sa.Column('active_users', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.PrimaryKeyConstraint('group_id', 'day')
+    )
+    op.create_table('group_daily_users',
+    sa.Column('group_id', sa.BigInteger(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.PrimaryKeyConstraint('group_id', 'day', 'user_id')
+    )
+
+    # Mavjud xabarlar bo‘yicha boshlang‘ich qiymatlar (src/rollups.py dagi rebuild bilan bir xil)
+    op.execute(
+        "INSERT INTO group_hourly_stats (group_id, hour, message_count) "
+        "SELECT group_id, date_trunc('hour', timestamp AT TIME ZONE 'UTC') AT TIME ZONE 'UTC', count(*) "
+        "FROM messages GROUP BY 1, 2"
+    )
+    op.execute(
+        "INSERT INTO group_daily_users (group_id, day, user_id) "
+        "SELECT DISTINCT group_id, (timestamp AT TIME ZONE 'UTC')::date, user_id "
+        "FROM messages WHERE user_id IS NOT NULL"
+    )
+    op.execute(
+        "INSERT INTO group_daily_stats (group_id, day, message_count, active_users) "
+        "SELECT group_id, (timestamp AT TIME ZONE 'UTC')::date, count(*), count(DISTINCT user_id) "
+        "FROM messages GROUP BY 1, 2"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('group_daily_users')
+    op.drop_table('group_daily_stats')
+    op.drop_table('group_hourly_stats')
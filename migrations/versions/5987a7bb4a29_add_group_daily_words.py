@@ -0,0 +1,38 @@
+"""Add group daily words
+
+Revision ID: 5987a7bb4a29
+Revises: c00a21804e27
+Create Date: 2026-10-18 18:04:41.226913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5987a7bb4a29'
+down_revision: Union[str, None] = 'c00a21804e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Qiymatlar migratsiyada emas, python -m src.recompute run bilan hisoblanadi
+    op.create_table('group_daily_words',
+    sa.Column('group_id', sa.BigInteger(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('message_count', sa.Integer(), nullable=False),
+    sa.Column('words', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('computed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.PrimaryKeyConstraint('group_id', 'day')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('group_daily_words')
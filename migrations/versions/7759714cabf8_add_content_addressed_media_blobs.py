@@ -0,0 +1,46 @@
+"""Add content addressed media blobs
+
+Revision ID: 7759714cabf8
+Revises: 0727f9f57083
+Create Date: 2026-10-18 13:20:44.871902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '7759714cabf8'
+down_revision: Union[str, None] = '0727f9f57083'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+filetype = postgresql.ENUM('PHOTO', 'VIDEO', 'DOCUMENT', 'AUDIO', 'VOICE', name='filetype', create_type=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('media_blobs',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('file_type', filetype, nullable=False),
+    sa.Column('file_path', sa.String(), nullable=False),
+    sa.Column('file_size', sa.BigInteger(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('blob_key', sa.String(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_media_blob_key'), ['blob_key'], unique=False)
+        batch_op.create_foreign_key('media_blob_key_fkey', 'media_blobs', ['blob_key'], ['key'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.drop_constraint('media_blob_key_fkey', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_media_blob_key'))
+        batch_op.drop_column('blob_key')
+
+    op.drop_table('media_blobs')
@@ -0,0 +1,43 @@
+"""Add top words snapshots
+
+Revision ID: 7922813ce981
+Revises: 52499046fde1
+Create Date: 2026-10-18 16:05:41.902117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '7922813ce981'
+down_revision: Union[str, None] = '52499046fde1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('top_words_snapshots',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('group_id', sa.BigInteger(), nullable=True),
+    sa.Column('period', sa.String(), nullable=False),
+    sa.Column('taken_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('words', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('top_words_snapshots', schema=None) as batch_op:
+        batch_op.create_index('idx_top_words_lookup', ['group_id', 'period', 'taken_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_top_words_snapshots_taken_at'), ['taken_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('top_words_snapshots', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_top_words_snapshots_taken_at'))
+        batch_op.drop_index('idx_top_words_lookup')
+
+    op.drop_table('top_words_snapshots')
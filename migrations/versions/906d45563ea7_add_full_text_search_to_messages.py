@@ -0,0 +1,62 @@
+"""Add full text search to messages
+
+Revision ID: 906d45563ea7
+Revises: 7759714cabf8
+Create Date: 2026-10-18 14:05:12.339021
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '906d45563ea7'
+down_revision: Union[str, None] = '7759714cabf8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# O‘zbek kirill harflarini lotinga o‘girish (ko‘p harfli mosliklar replace() bilan)
+MULTI_CHAR = [
+    ("ё", "yo"), ("ц", "ts"), ("ч", "ch"), ("ш", "sh"), ("щ", "sh"), ("ю", "yu"), ("я", "ya"),
+]
+SINGLE_CHAR = ("абвгдежзийклмнопрстуфхэқҳўғ", "abvgdejziyklmnoprstufxeqhog")
+# Apostrof variantlari (‘ ’ ʻ ʼ ` ') va ъ/ь olib tashlanadi: standart parser apostrofni
+# so‘z ajratuvchi deb hisoblaydi, shunda "so‘z", "so'z", "сўз" bir xil "soz" bo‘ladi
+DROPPED = "‘’ʻʼ`'ъь"
+
+def sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+def normalize_function_sql() -> str:
+    expr = "lower(t)"
+    expr = f"translate({expr}, {sql_literal(DROPPED)}, '')"
+    for source, target in MULTI_CHAR:
+        expr = f"replace({expr}, {sql_literal(source)}, {sql_literal(target)})"
+    expr = f"translate({expr}, {sql_literal(SINGLE_CHAR[0])}, {sql_literal(SINGLE_CHAR[1])})"
+    return (
+        "CREATE OR REPLACE FUNCTION tg_search_normalize(t text) RETURNS text "
+        f"LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$ SELECT {expr} $$"
+    )
+
+SEARCH_VECTOR = (
+    "to_tsvector('simple'::regconfig, tg_search_normalize(coalesce(text, ''))) || "
+    "to_tsvector('russian'::regconfig, coalesce(text, ''))"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(normalize_function_sql())
+    with op.batch_alter_table('messages', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True), nullable=True))
+        batch_op.create_index('idx_messages_search_vector', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('messages', schema=None) as batch_op:
+        batch_op.drop_index('idx_messages_search_vector', postgresql_using='gin')
+        batch_op.drop_column('search_vector')
+    op.execute("DROP FUNCTION IF EXISTS tg_search_normalize(text)")
@@ -0,0 +1,50 @@
+"""Add backfill checkpoints to last_saved_messages
+
+Revision ID: a38a0ab95105
+Revises: d508e70c9002
+Create Date: 2026-10-18 11:02:17.693840
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'a38a0ab95105'
+down_revision: Union[str, None] = 'd508e70c9002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('last_saved_messages', schema=None) as batch_op:
+        # Checkpoint Telegram ID’sini saqlaydi, xabar o‘tkazib yuborilgan bo‘lishi mumkin
+        batch_op.drop_constraint('last_saved_messages_last_message_id_fkey', type_='foreignkey')
+        batch_op.alter_column('last_message_id',
+               existing_type=sa.BigInteger(),
+               nullable=True)
+        batch_op.alter_column('last_timestamp',
+               existing_type=postgresql.TIMESTAMP(timezone=True),
+               nullable=True)
+        batch_op.add_column(sa.Column('backfill_top_id', sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column('backfill_top_timestamp', sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column('backfill_offset_id', sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM last_saved_messages WHERE last_message_id IS NULL")
+    with op.batch_alter_table('last_saved_messages', schema=None) as batch_op:
+        batch_op.drop_column('backfill_offset_id')
+        batch_op.drop_column('backfill_top_timestamp')
+        batch_op.drop_column('backfill_top_id')
+        batch_op.alter_column('last_timestamp',
+               existing_type=postgresql.TIMESTAMP(timezone=True),
+               nullable=False)
+        batch_op.alter_column('last_message_id',
+               existing_type=sa.BigInteger(),
+               nullable=False)
+        batch_op.create_foreign_key('last_saved_messages_last_message_id_fkey', 'messages', ['last_message_id'], ['id'])
@@ -0,0 +1,33 @@
+"""Add message cluster id
+
+Revision ID: c00a21804e27
+Revises: d350164a55d8
+Create Date: 2026-10-18 17:22:03.118642
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c00a21804e27'
+down_revision: Union[str, None] = 'd350164a55d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Mavjud xabarlar uchun qiymatlar: python -m src.dedup rebuild --days 0
+    with op.batch_alter_table('messages', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cluster_id', sa.BigInteger(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_messages_cluster_id'), ['cluster_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('messages', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_messages_cluster_id'))
+        batch_op.drop_column('cluster_id')
@@ -0,0 +1,45 @@
+"""Add burst events
+
+Revision ID: d350164a55d8
+Revises: 7922813ce981
+Create Date: 2026-10-18 16:41:27.553904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd350164a55d8'
+down_revision: Union[str, None] = '7922813ce981'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('burst_events',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('group_id', sa.BigInteger(), nullable=False),
+    sa.Column('term', sa.String(), nullable=True),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('baseline', sa.Float(), nullable=False),
+    sa.Column('zscore', sa.Float(), nullable=False),
+    sa.Column('detected_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('burst_events', schema=None) as batch_op:
+        batch_op.create_index('idx_burst_events_group_detected', ['group_id', 'detected_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_burst_events_detected_at'), ['detected_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('burst_events', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_burst_events_detected_at'))
+        batch_op.drop_index('idx_burst_events_group_detected')
+
+    op.drop_table('burst_events')
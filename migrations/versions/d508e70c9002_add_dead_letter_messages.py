@@ -0,0 +1,43 @@
+"""Add dead letter messages
+
+Revision ID: d508e70c9002
+Revises: fed7febd9cc3
+Create Date: 2026-10-18 10:12:41.204517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'd508e70c9002'
+down_revision: Union[str, None] = 'fed7febd9cc3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('dead_letter_messages',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('message_id', sa.BigInteger(), nullable=True),
+    sa.Column('group_id', sa.BigInteger(), nullable=True),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('error', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('dead_letter_messages', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_dead_letter_messages_group_id'), ['group_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_dead_letter_messages_message_id'), ['message_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('dead_letter_messages', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_dead_letter_messages_message_id'))
+        batch_op.drop_index(batch_op.f('ix_dead_letter_messages_group_id'))
+
+    op.drop_table('dead_letter_messages')
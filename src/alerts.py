@@ -0,0 +1,348 @@
+"""Kalit so‘z ogohlantirishlari: har bir yangi xabar qoidalar fayli bilan solishtirilib, mosliklar admin chatga yuboriladi.
+
+Qoidalar fayli (ALERT_RULES_FILE): har qatorda bitta so‘z yoki ibora, "#" bilan boshlangan qatorlar izoh.
+Fayl o‘zgarsa qayta yuklanadi. Moslik so‘z chegaralari bo‘yicha, matn tokenizer bilan normallashtirilgandan keyin.
+
+Qoidalarni tekshirish: python -m src.alerts check "matn"
+Lokal Bot API stub: python -m src.alerts stub --port 8081 (ALERT_BOT_API_URL=http://localhost:8081)
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.types import LinkPreviewOptions
+from aiohttp import web
+from config import (
+    ADMIN_CHAT_ID, BOT_TOKEN, ALERT_RULES_FILE, ALERT_DEBOUNCE, ALERT_BATCH_INTERVAL,
+    ALERT_RELOAD_INTERVAL, ALERT_MAX_PER_BATCH, ALERT_BOT_API_URL,
+)
+from src.tokenizer import Tokenizer
+from src.analytics import EMPTY_TEXT
+from src.monitoring import alert_rules, alert_matches, alerts_sent
+from logger import setup_logger
+import argparse
+import asyncio
+import logging
+import re
+import time
+
+MESSAGE_LIMIT = 4096  # Telegram xabari uzunligi chegarasi
+PREVIEW_LENGTH = 200
+_WORD_RE = re.compile(r"\w+(?:'\w+)*")
+
+def canonical(normalized: str) -> str:
+    """So‘zlar bitta bo‘sh joy bilan, chetlarida ham bo‘sh joy: " so'z ibora " — shunda moslik faqat butun so‘zlarda"""
+    return " " + " ".join(_WORD_RE.findall(normalized)) + " "
+
+class KeywordAutomaton:
+    """Aho–Corasick avtomati: matn bir marta o‘qiladi, qoidalar soniga bog‘liq emas.
+
+    `patterns` allaqachon `canonical` ko‘rinishida bo‘lishi kerak; `names` — ogohlantirishda ko‘rsatiladigan asl qator.
+    Har bir holatning natijalari fail zanjiri bo‘yicha qurishda birlashtiriladi, shuning uchun qidiruvda zanjir aylanilmaydi.
+    """
+
+    def __init__(self, patterns: Iterable[str] = (), names: Optional[Iterable[str]] = None):
+        patterns = list(patterns)
+        self.names: List[str] = list(names) if names is not None else [p.strip() for p in patterns]
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[Tuple[int, ...]] = [()]
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                following = goto[state].get(char)
+                if following is None:
+                    following = goto[state][char] = len(goto)
+                    goto.append({})
+                    outputs.append(())
+                state = following
+            outputs[state] += (index,)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in goto[state].items():
+                queue.append(following)
+                link = fail[state]
+                while link and char not in goto[link]:
+                    link = fail[link]
+                fail[following] = goto[link].get(char, 0)
+                outputs[following] += outputs[fail[following]]
+        self._goto = goto
+        self._fail = fail
+        self._outputs = outputs
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def find(self, text: str) -> Set[int]:
+        """Matnda uchragan qoidalar indekslari"""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        found: Set[int] = set()
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+def load_rules(path: str, tokenizer: Tokenizer) -> KeywordAutomaton:
+    """Qoidalar faylidan avtomat quradi (bir xil normallashadigan qatorlar birlashtiriladi)"""
+    rules: Dict[str, str] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            pattern = canonical(tokenizer.normalize(line))
+            if pattern.strip():
+                rules.setdefault(pattern, line)
+    return KeywordAutomaton(rules.keys(), rules.values())
+
+class BotNotifier:
+    """Admin chatga aiogram orqali oddiy matn yuboradi; `api_url` berilsa rasmiy Bot API o‘rniga shu server (stub)"""
+
+    def __init__(self, token: str = BOT_TOKEN, chat_id: str = ADMIN_CHAT_ID, api_url: Optional[str] = ALERT_BOT_API_URL):
+        session = AiohttpSession(api=TelegramAPIServer.from_base(api_url)) if api_url else AiohttpSession()
+        self.bot = Bot(token, session=session)
+        self.chat_id = int(chat_id)
+
+    async def send(self, text: str) -> None:
+        try:
+            await self._send(text)
+        except TelegramRetryAfter as e:
+            # Flood chegarasi: ko‘rsatilgan vaqt kutilib, bir marta qayta uriniladi
+            await asyncio.sleep(e.retry_after)
+            await self._send(text)
+
+    async def _send(self, text: str) -> None:
+        await self.bot.send_message(self.chat_id, text, link_preview_options=LinkPreviewOptions(is_disabled=True))
+
+    async def close(self) -> None:
+        await self.bot.session.close()
+
+class KeywordAlerts:
+    """Ingest paketlaridagi jonli xabarlarni qoidalar bilan solishtiradi va ogohlantirishlarni paketlab yuboradi.
+
+    Bir guruhdagi bir qoida `debounce` soniyada ko‘pi bilan bir marta xabar qilinadi; oradagi mosliklar
+    sanab boriladi va muddat tugagach oxirgisi bilan bitta umumlashgan ogohlantirish bo‘lib ketadi. Navbatdagi ogohlantirishlar har `batch_interval`
+    soniyada bitta (uzun bo‘lsa bir nechta) xabar bo‘lib ketadi, ko‘pi bilan `max_per_batch` tasi batafsil.
+    """
+
+    def __init__(
+        self,
+        notifier: BotNotifier,
+        rules_path: str = ALERT_RULES_FILE,
+        tokenizer: Optional[Tokenizer] = None,
+        debounce: float = ALERT_DEBOUNCE,
+        batch_interval: float = ALERT_BATCH_INTERVAL,
+        reload_interval: float = ALERT_RELOAD_INTERVAL,
+        max_per_batch: int = ALERT_MAX_PER_BATCH,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.notifier = notifier
+        self.rules_path = rules_path
+        self.tokenizer = tokenizer or Tokenizer()
+        self.debounce = debounce
+        self.batch_interval = batch_interval
+        self.reload_interval = reload_interval
+        self.max_per_batch = max_per_batch
+        self.logger = logger or logging.getLogger(__name__)
+        self.automaton = KeywordAutomaton()
+        self._rules_mtime: Optional[int] = -1  # Hali yuklanmagan
+        # (guruh, qoida) -> oxirgi yuborilgan vaqt va shundan beri o‘tkazib yuborilgan mosliklar (oxirgisi va soni)
+        self.last_sent: Dict[Tuple[int, str], float] = {}
+        self.suppressed: Dict[Tuple[int, str], dict] = {}
+        self.pending: "OrderedDict[Tuple[int, str], dict]" = OrderedDict()
+
+    async def reload(self) -> bool:
+        """Qoidalar fayli o‘zgargan bo‘lsa avtomatni fonda qayta quradi va almashtiradi"""
+        try:
+            mtime = os.stat(self.rules_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._rules_mtime:
+            return False
+        if mtime is None:
+            automaton = KeywordAutomaton()
+            self.logger.warning(f"Ogohlantirish qoidalari fayli topilmadi: {self.rules_path}")
+        else:
+            try:
+                automaton = await asyncio.to_thread(load_rules, self.rules_path, self.tokenizer)
+            except Exception as e:
+                self.logger.error(f"Ogohlantirish qoidalarini yuklashda xato: {e}")
+                return False
+            self.logger.info(f"Ogohlantirish qoidalari yuklandi: {len(automaton)} ta")
+        self.automaton = automaton
+        self._rules_mtime = mtime
+        alert_rules.set(len(automaton))
+        return True
+
+    def check(self, messages: List[dict], now: Optional[float] = None) -> None:
+        """Paketdagi jonli xabarlarni qoidalar bilan solishtiradi (tarix xabarlari ogohlantirish bermaydi)"""
+        automaton = self.automaton
+        if not len(automaton):
+            return
+        live = [msg for msg in messages if "backfill" not in msg and msg.get("text") != EMPTY_TEXT]
+        if not live:
+            return
+        now = now if now is not None else time.time()
+        texts = self.tokenizer.normalize_batch([msg.get("text") for msg in live])
+        for msg, text in zip(live, texts):
+            for index in automaton.find(canonical(text)):
+                self._match(msg, automaton.names[index], now)
+
+    def _match(self, msg: dict, rule: str, now: float) -> None:
+        key = (msg["group_id"], rule)
+        alert = self.pending.get(key)
+        if alert is not None:
+            alert["count"] += 1
+            alert_matches.labels("merged").inc()
+            return
+        alert = {
+            "rule": rule,
+            "group_id": msg["group_id"],
+            "group_name": msg.get("group_name"),
+            "text": msg.get("text") or "",
+            "url": msg.get("url"),
+            "count": 1,
+        }
+        suppressed = self.suppressed.pop(key, None)
+        if suppressed is not None:
+            alert["count"] += suppressed["count"]
+        if now - self.last_sent.get(key, float("-inf")) < self.debounce:
+            self.suppressed[key] = alert
+            alert_matches.labels("debounced").inc()
+            return
+        self.pending[key] = alert
+        alert_matches.labels("queued").inc()
+
+    def _format(self, alerts: List[dict]) -> List[str]:
+        """Ogohlantirishlarni MESSAGE_LIMIT dan oshmaydigan matnlarga bo‘ladi"""
+        blocks = []
+        for alert in alerts[:self.max_per_batch]:
+            text = alert["text"]
+            preview = text if len(text) <= PREVIEW_LENGTH else text[:PREVIEW_LENGTH] + "…"
+            repeats = f" (×{alert['count']})" if alert["count"] > 1 else ""
+            block = f"🔔 «{alert['rule']}»{repeats} — {alert['group_name'] or alert['group_id']}\n{preview}"
+            if alert["url"]:
+                block += f"\n{alert['url']}"
+            blocks.append(block[:MESSAGE_LIMIT])
+        if len(alerts) > self.max_per_batch:
+            blocks.append(f"… va yana {len(alerts) - self.max_per_batch} ta ogohlantirish")
+
+        messages, current = [], ""
+        for block in blocks:
+            if current and len(current) + 2 + len(block) > MESSAGE_LIMIT:
+                messages.append(current)
+                current = ""
+            current = f"{current}\n\n{block}" if current else block
+        if current:
+            messages.append(current)
+        return messages
+
+    async def flush(self, now: Optional[float] = None) -> None:
+        """Navbatdagi ogohlantirishlarni yuboradi; yuborilmaganlari log’ga yoziladi va tashlanadi"""
+        now = now if now is not None else time.time()
+        # Debounce muddati o‘tgan yozuvlar kerak emas: keyingi moslik baribir darhol xabar qilinadi.
+        # Muddat ichida o‘tkazib yuborilgan mosliklar esa oxirgisi bilan umumlashgan ogohlantirish bo‘ladi.
+        expired = [key for key, sent in self.last_sent.items() if now - sent >= self.debounce]
+        for key in expired:
+            del self.last_sent[key]
+            suppressed = self.suppressed.pop(key, None)
+            if suppressed is not None:
+                self.pending[key] = suppressed
+        if not self.pending:
+            return
+        alerts, self.pending = list(self.pending.values()), OrderedDict()
+        for alert in alerts:
+            self.last_sent[(alert["group_id"], alert["rule"])] = now
+        for text in self._format(alerts):
+            try:
+                await self.notifier.send(text)
+                alerts_sent.labels("ok").inc()
+            except Exception as e:
+                alerts_sent.labels("failed").inc()
+                self.logger.error(f"Ogohlantirishni yuborishda xato: {e}")
+
+    async def _reload_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            await self.reload()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.batch_interval)
+            await self.flush()
+
+    async def run(self) -> None:
+        await self.reload()
+        await asyncio.gather(self._reload_loop(), self._flush_loop())
+
+    async def close(self) -> None:
+        """Qolgan ogohlantirishlarni yuborib, bot sessiyasini yopadi"""
+        await self.flush()
+        await self.notifier.close()
+
+def make_stub_app(logger: logging.Logger) -> web.Application:
+    """Bot API’ning lokal o‘rnini bosuvchi server: sendMessage’ni log’ga yozadi va muvaffaqiyatli javob qaytaradi"""
+    counter = iter(range(1, sys.maxsize))
+
+    async def handle(request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        data = await request.post()
+        if method.lower() != "sendmessage":
+            return web.json_response({"ok": True, "result": True})
+        logger.info(f"[stub] {data.get('chat_id')} ga xabar:\n{data.get('text')}")
+        return web.json_response({
+            "ok": True,
+            "result": {
+                "message_id": next(counter),
+                "date": int(time.time()),
+                "chat": {"id": int(data.get("chat_id", 0)), "type": "private"},
+                "text": data.get("text"),
+            },
+        })
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", handle)
+    return app
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Kalit so‘z ogohlantirishlari")
+    commands = parser.add_subparsers(dest="command", required=True)
+    check = commands.add_parser("check", help="Matnga mos keladigan qoidalarni ko‘rsatish")
+    check.add_argument("text")
+    check.add_argument("--rules", default=ALERT_RULES_FILE)
+    stub = commands.add_parser("stub", help="Lokal Bot API stub’ini ishga tushirish")
+    stub.add_argument("--host", default="127.0.0.1")
+    stub.add_argument("--port", type=int, default=8081)
+    args = parser.parse_args()
+
+    logger = setup_logger()
+    if args.command == "check":
+        tokenizer = Tokenizer()
+        automaton = load_rules(args.rules, tokenizer)
+        matches = sorted(automaton.names[i] for i in automaton.find(canonical(tokenizer.normalize(args.text))))
+        print("\n".join(matches) if matches else "Mos qoida yo‘q")
+    elif args.command == "stub":
+        runner = web.AppRunner(make_stub_app(logger))
+        await runner.setup()
+        await web.TCPSite(runner, args.host, args.port).start()
+        logger.info(f"Bot API stub http://{args.host}:{args.port} da ishlamoqda")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,26 +1,248 @@
-from collections import Counter
+from collections import Counter, deque
+from operator import itemgetter
+from typing import Deque, Dict, List, Optional, Tuple
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from config import (
+    ANALYTICS_WINDOWS, ANALYTICS_GROUP_CAPACITY, ANALYTICS_GLOBAL_CAPACITY,
+    ANALYTICS_TOP_N, ANALYTICS_SNAPSHOT_RETENTION,
+)
+from src.db import get_sessionmaker
+from src.models import TopWordsSnapshot, GroupDailyWords
+from src.tokenizer import Tokenizer
+from src.bursts import BurstDetector
+import asyncio
+import datetime
+import heapq
+import logging
+import time
+
+EMPTY_TEXT = "Bo‘sh xabar"
+DURATION_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+def parse_windows(spec: str) -> Dict[str, Tuple[int, int]]:
+    """"1h:6,24h:12" -> {"1h": (3600, 6), "24h": (86400, 12)}: oyna nomi, davomiyligi va bo‘laklar soni"""
+    windows = {}
+    for item in spec.split(","):
+        name, _, buckets = item.strip().partition(":")
+        windows[name] = (int(name[:-1]) * DURATION_UNITS[name[-1]], int(buckets or 1))
+    return windows
+
+class SpaceSaving:
+    """Space-Saving algoritmi: eng ko‘p uchraydigan elementlarni `capacity` ta hisoblagich bilan kuzatadi.
+
+    Yangi element joy topolmasa eng kichik hisoblagichni egallaydi (hisob = min + count),
+    shuning uchun xotira o‘zgarmas, haqiqiy heavy hitter’lar esa yo‘qolmaydi.
+    Minimum "dangasa" heap orqali topiladi: eskirgan yozuv chiqsa, joriy qiymat bilan qaytariladi.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, item: str, count: int = 1) -> None:
+        counts = self.counts
+        if item in counts:
+            counts[item] += count
+            return
+        if len(counts) < self.capacity:
+            counts[item] = count
+            heapq.heappush(self._heap, (count, item))
+            return
+        while True:
+            low, victim = heapq.heappop(self._heap)
+            current = counts[victim]
+            if current == low:
+                break
+            heapq.heappush(self._heap, (current, victim))
+        del counts[victim]
+        counts[item] = low + count
+        heapq.heappush(self._heap, (low + count, item))
+
+    def update(self, counter: Dict[str, int]) -> None:
+        for item, count in counter.items():
+            self.add(item, count)
+
+class SlidingWindow:
+    """`duration` soniyalik oyna: `buckets` ta ketma-ket bo‘lak, har biri o‘z Space-Saving xulosasi bilan.
+
+    Eskirgan bo‘laklar butunligicha tashlanadi, shuning uchun oyna xotirasi buckets * capacity bilan chegaralangan.
+    """
+
+    def __init__(self, duration: int, buckets: int, capacity: int):
+        self.width = duration / buckets
+        self.buckets = buckets
+        self.capacity = capacity
+        self._ring: Deque[Tuple[int, SpaceSaving]] = deque()
+
+    def _expire(self, bucket_id: int) -> None:
+        while self._ring and self._ring[0][0] <= bucket_id - self.buckets:
+            self._ring.popleft()
+
+    def add(self, counter: Dict[str, int], now: float) -> None:
+        bucket_id = int(now // self.width)
+        self._expire(bucket_id)
+        if not self._ring or self._ring[-1][0] != bucket_id:
+            self._ring.append((bucket_id, SpaceSaving(self.capacity)))
+        self._ring[-1][1].update(counter)
+
+    def top(self, limit: int, now: float) -> List[Tuple[str, int]]:
+        self._expire(int(now // self.width))
+        merged = Counter()
+        for _, summary in self._ring:
+            merged.update(summary.counts)
+        return heapq.nlargest(limit, merged.items(), key=itemgetter(1))
+
+    def is_empty(self, now: float) -> bool:
+        self._expire(int(now // self.width))
+        return not self._ring
 
 class MessageAnalytics:
-    def __init__(self):
-        self.word_counts = Counter()
+    """Uzoq yashaydigan oqimli tahlil: guruh va umumiy kesimda sliding window top so‘zlar.
+
+    Ingest paketini bir marta tokenlaydi; har bir oyna bo‘yicha xotira sig‘imi oldindan belgilangan.
+    Guruh barcha oynalarda bo‘sh qolsa, uning holati o‘chiriladi.
+    """
+
+    def __init__(
+        self,
+        windows: str = ANALYTICS_WINDOWS,
+        group_capacity: int = ANALYTICS_GROUP_CAPACITY,
+        global_capacity: int = ANALYTICS_GLOBAL_CAPACITY,
+        tokenizer: Optional[Tokenizer] = None,
+        detector: Optional[BurstDetector] = None,
+    ):
+        self.windows = parse_windows(windows)
+        self.group_capacity = group_capacity
+        self.tokenizer = tokenizer or Tokenizer()
+        self.detector = detector
+        self.global_windows = self._make_windows(global_capacity)
+        self.group_windows: Dict[int, Dict[str, SlidingWindow]] = {}
 
-    def analyze_message(self, text):
-        """Xabarni tahlil qilib, so‘zlar sonini yangilaydi"""
-        if not text or text == "Bo‘sh xabar":
+    def _make_windows(self, capacity: int) -> Dict[str, SlidingWindow]:
+        return {name: SlidingWindow(duration, buckets, capacity) for name, (duration, buckets) in self.windows.items()}
+
+    def analyze_batch(self, messages: List[dict], tokens: Optional[List[List[str]]] = None, now: Optional[float] = None) -> None:
+        """Saqlangan paketdagi jonli xabarlarni hisobga oladi (tarix xabarlari oynalarga kirmaydi).
+
+        `tokens` — `messages` bilan bir xil tartibdagi tayyor tokenlar (paket bir marta tokenlanishi uchun).
+        """
+        live = [i for i, msg in enumerate(messages) if "backfill" not in msg]
+        if not live:
             return
-        words = text.lower().split()
-        self.word_counts.update(words)
-
-    def get_top_words(self, limit=5):
-        """Eng ko‘p ishlatilgan so‘zlarni qaytaradi"""
-        return self.word_counts.most_common(limit)
-
-    def print_stats(self):
-        """Tahlil natijalarini konsolda chiqaradi"""
-        top_words = self.get_top_words()
-        if top_words:
-            print("\nEng ko‘p ishlatilgan so‘zlar:", flush=True)
-            for word, count in top_words:
-                print(f"  {word}: {count} marta", flush=True)
+        now = now if now is not None else time.time()
+        if tokens is None:
+            live_tokens = self.tokenizer.tokenize_batch([messages[i].get("text") for i in live])
         else:
-            print("Hali tahlil qiladigan ma'lumot yo‘q", flush=True)
\ No newline at end of file
+            live_tokens = [tokens[i] for i in live]
+        per_group: Dict[int, Counter] = {}
+        # Portlash detektori uchun so‘z har bir xabarda bir marta sanaladi (spam takrori hisobni oshirmaydi)
+        per_group_docs: Dict[int, Counter] = {}
+        message_counts = Counter()
+        for i, msg_tokens in zip(live, live_tokens):
+            msg = messages[i]
+            message_counts[msg["group_id"]] += 1
+            if msg_tokens and msg.get("text") != EMPTY_TEXT:
+                per_group.setdefault(msg["group_id"], Counter()).update(msg_tokens)
+                per_group_docs.setdefault(msg["group_id"], Counter()).update(set(msg_tokens))
+        if self.detector:
+            self.detector.observe(per_group_docs, message_counts, now)
+        overall = Counter()
+        for group_id, counter in per_group.items():
+            windows = self.group_windows.get(group_id)
+            if windows is None:
+                windows = self.group_windows[group_id] = self._make_windows(self.group_capacity)
+            for window in windows.values():
+                window.add(counter, now)
+            overall.update(counter)
+        for window in self.global_windows.values():
+            window.add(overall, now)
+
+    def top_words(self, group_id: Optional[int] = None, window: str = "24h", limit: int = 10, now: Optional[float] = None) -> List[Tuple[str, int]]:
+        windows = self.global_windows if group_id is None else self.group_windows.get(group_id)
+        if not windows:
+            return []
+        return windows[window].top(limit, now if now is not None else time.time())
+
+    def expire(self, now: Optional[float] = None) -> None:
+        now = now if now is not None else time.time()
+        for group_id in [g for g, windows in self.group_windows.items() if all(w.is_empty(now) for w in windows.values())]:
+            del self.group_windows[group_id]
+
+    def snapshot(self, limit: int = ANALYTICS_TOP_N, now: Optional[float] = None) -> List[dict]:
+        """Barcha oynalar uchun top so‘zlar (group_id None — barcha guruhlar)"""
+        now = now if now is not None else time.time()
+        self.expire(now)
+        taken_at = datetime.datetime.fromtimestamp(now, datetime.timezone.utc)
+        scopes = [(None, self.global_windows), *self.group_windows.items()]
+        return [
+            {"group_id": group_id, "period": name, "taken_at": taken_at, "words": window.top(limit, now)}
+            for group_id, windows in scopes
+            for name, window in windows.items()
+        ]
+
+    async def save_snapshot(self, logger: logging.Logger) -> None:
+        """Joriy holatni databazaga yozadi va saqlash muddati o‘tgan nusxalarni o‘chiradi"""
+        rows = [row for row in self.snapshot() if row["words"]]
+        if not rows:
+            return
+        retention = rows[0]["taken_at"] - datetime.timedelta(seconds=ANALYTICS_SNAPSHOT_RETENTION)
+        async with get_sessionmaker("ingest")() as session:
+            try:
+                session.add_all(TopWordsSnapshot(**row) for row in rows)
+                await session.execute(delete(TopWordsSnapshot).where(TopWordsSnapshot.taken_at < retention))
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Tahlil nusxasini saqlashda xato: {e}")
+                return
+        logger.info(f"Tahlil nusxasi saqlandi: {len(rows)} ta oyna")
+
+    async def run_snapshots(self, interval: float, logger: logging.Logger) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.save_snapshot(logger)
+
+async def latest_top_words(session: AsyncSession, group_id: Optional[int], period: str, limit: int) -> Optional[dict]:
+    """Guruh (yoki barcha guruhlar) va oyna uchun eng so‘nggi saqlangan top so‘zlar"""
+    group_filter = TopWordsSnapshot.group_id.is_(None) if group_id is None else TopWordsSnapshot.group_id == group_id
+    stmt = (
+        select(TopWordsSnapshot.taken_at, TopWordsSnapshot.words)
+        .where(group_filter, TopWordsSnapshot.period == period)
+        .order_by(TopWordsSnapshot.taken_at.desc())
+        .limit(1)
+    )
+    row = (await session.execute(stmt)).first()
+    if row is None:
+        return None
+    return {
+        "group_id": group_id,
+        "window": period,
+        "taken_at": row.taken_at,
+        "items": [{"word": word, "count": count} for word, count in row.words[:limit]],
+    }
+
+async def daily_top_words(
+    session: AsyncSession,
+    group_id: int,
+    since: datetime.date,
+    until: datetime.date,
+    limit: int,
+) -> List[dict]:
+    """Guruhning kunlik top so‘zlari (python -m src.recompute run natijasi)"""
+    stmt = (
+        select(GroupDailyWords.day, GroupDailyWords.message_count, GroupDailyWords.words)
+        .where(GroupDailyWords.group_id == group_id, GroupDailyWords.day >= since, GroupDailyWords.day <= until)
+        .order_by(GroupDailyWords.day)
+    )
+    result = await session.execute(stmt)
+    return [
+        {
+            "day": row.day.isoformat(),
+            "message_count": row.message_count,
+            "items": [{"word": word, "count": count} for word, count in row.words[:limit]],
+        }
+        for row in result
+    ]
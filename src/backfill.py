@@ -0,0 +1,148 @@
+from typing import Dict, List, Any, Set, Tuple, Callable, Awaitable
+from pyrogram import Client
+from pyrogram.errors import FloodWait
+from config import BACKFILL_CONCURRENCY, BACKFILL_REPORT_INTERVAL, BACKFILL_MAX_ATTEMPTS, BACKFILL_RETRY_DELAY
+from src.database import load_checkpoint
+from src.ingest import IngestQueue
+from src.monitoring import backfill_progress
+import asyncio
+import heapq
+import itertools
+import logging
+
+CollectHistory = Callable[[Client, int, logging.Logger, IngestQueue, Dict[str, Any]], Awaitable[None]]
+
+async def backfill_priority(client: Client, chat_id: int) -> Tuple[int, int]:
+    """Guruh ustuvorligi: avval checkpoint’i bor (faqat yangi xabarlar), so‘ng kichik guruhlar"""
+    checkpoint = await load_checkpoint(chat_id)
+    incremental = 0 if checkpoint and checkpoint.last_message_id else 1
+    chat = await client.get_chat(chat_id)
+    return incremental, chat.members_count or 0
+
+def progress_ratio(state: Dict[str, Any]) -> float:
+    """Guruh tarixining yig‘ilgan ulushini Telegram xabar ID’lari bo‘yicha baholaydi"""
+    if state["status"] == "tugadi":
+        return 1.0
+    top_id, current_id = state.get("top_id"), state.get("current_id")
+    if not top_id or current_id is None:
+        return 0.0
+    total = top_id - state.get("stop_id", 0)
+    return min(1.0, max(0.0, (top_id - current_id) / total)) if total > 0 else 1.0
+
+class BackfillScheduler:
+    """Guruhlar tarixini hisoblar bo‘yicha parallel va ustuvorlik tartibida yig‘adi.
+
+    Har bir hisob uchun `concurrency` tagacha guruh bir vaqtda yig‘iladi. FloodWait
+    kelganda shu hisobning barcha vazifalari kerakli muddatga to‘xtatiladi va guruh
+    navbatga qaytariladi (yig‘ish checkpoint’dan davom etadi). Boshqa xatoda guruh
+    "xato" holatiga o‘tadi va `retry_delay` (har safar ikki baravar) dan keyin qayta
+    navbatga qo‘yiladi; `max_attempts` urinishdan keyin tashlab qo‘yiladi.
+    """
+
+    def __init__(
+        self,
+        collect: CollectHistory,
+        ingest: IngestQueue,
+        logger: logging.Logger,
+        concurrency: int = BACKFILL_CONCURRENCY,
+        report_interval: float = BACKFILL_REPORT_INTERVAL,
+        max_attempts: int = BACKFILL_MAX_ATTEMPTS,
+        retry_delay: float = BACKFILL_RETRY_DELAY,
+    ):
+        self.collect = collect
+        self.ingest = ingest
+        self.logger = logger
+        self.concurrency = concurrency
+        self.report_interval = report_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.progress: Dict[int, Dict[str, Any]] = {}
+        self._queues: Dict[str, List[Tuple[Any, int, int]]] = {}
+        self._clients: Dict[str, Client] = {}
+        self._parked_until: Dict[str, float] = {}
+        self._order = itertools.count()
+        self._retries: Set[asyncio.Task] = set()
+
+    def add(self, client: Client, chat_id: int, priority: Any = 0) -> None:
+        """Guruhni hisobning navbatiga qo‘shadi; kichik `priority` oldinroq yig‘iladi"""
+        self._clients[client.name] = client
+        heapq.heappush(self._queues.setdefault(client.name, []), (priority, next(self._order), chat_id))
+        self.progress[chat_id] = {"account": client.name, "status": "kutilmoqda", "queued": 0, "attempts": 0}
+
+    async def _wait_if_parked(self, account_name: str) -> None:
+        delay = self._parked_until.get(account_name, 0) - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _worker(self, account_name: str) -> None:
+        client = self._clients[account_name]
+        queue = self._queues[account_name]
+        while queue:
+            await self._wait_if_parked(account_name)
+            if not queue:
+                break
+            priority, _, chat_id = heapq.heappop(queue)
+            state = self.progress[chat_id]
+            state["status"] = "yig‘ilmoqda"
+            try:
+                await self.collect(client, chat_id, self.logger, self.ingest, state)
+                state["status"] = "tugadi"
+            except FloodWait as e:
+                until = asyncio.get_running_loop().time() + e.value
+                self._parked_until[account_name] = max(self._parked_until.get(account_name, 0), until)
+                state["status"] = "kutilmoqda"
+                heapq.heappush(queue, (priority, next(self._order), chat_id))
+                self.logger.warning(f"{account_name}: FloodWait {e.value} s, {chat_id} guruhi navbatga qaytarildi")
+            except Exception as e:
+                state["status"] = "xato"
+                state["attempts"] += 1
+                if state["attempts"] < self.max_attempts:
+                    delay = self.retry_delay * 2 ** (state["attempts"] - 1)
+                    task = asyncio.create_task(self._requeue_later(account_name, priority, chat_id, delay))
+                    self._retries.add(task)
+                    task.add_done_callback(self._retries.discard)
+                    self.logger.error(f"{chat_id} guruhi tarixini yig‘ishda xato, {delay:g} s dan keyin qayta urinish: {e}")
+                else:
+                    self.logger.error(f"{chat_id} guruhi tarixini yig‘ishda xato, {state['attempts']} urinishdan keyin to‘xtatildi: {e}")
+            backfill_progress.labels(account_name, str(chat_id)).set(progress_ratio(state))
+
+    async def _requeue_later(self, account_name: str, priority: Any, chat_id: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        heapq.heappush(self._queues[account_name], (priority, next(self._order), chat_id))
+        self.progress[chat_id]["status"] = "kutilmoqda"
+
+    def report(self) -> None:
+        """Har bir guruh bo‘yicha yig‘ish progressini log’ga yozadi va metrikani yangilaydi"""
+        for chat_id, state in self.progress.items():
+            ratio = progress_ratio(state)
+            backfill_progress.labels(state["account"], str(chat_id)).set(ratio)
+            self.logger.info(
+                f"[{state['account']}] {chat_id}: {state['status']}, {ratio:.0%}, "
+                f"{state['queued']} ta xabar navbatga qo‘shildi"
+            )
+
+    async def _report_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self.report()
+
+    async def run(self) -> None:
+        """Barcha guruhlar tarixi yig‘ilguncha (yoki urinishlar tugaguncha) ishlaydi"""
+        reporter = asyncio.create_task(self._report_loop())
+        try:
+            while True:
+                await asyncio.gather(*[
+                    self._worker(account_name)
+                    for account_name in self._queues
+                    for _ in range(self.concurrency)
+                ])
+                if not self._retries:
+                    break
+                # Navbatlar bo‘sh, lekin qayta urinishlar kutilmoqda: birinchisi navbatga qaytgach worker’lar qayta ishga tushadi
+                await asyncio.wait(set(self._retries), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            reporter.cancel()
+            for task in list(self._retries):
+                task.cancel()
+        self.report()
+        self.logger.info("Barcha guruhlar tarixi yig‘ildi")
@@ -0,0 +1,227 @@
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from config import (
+    BURST_TICK, BURST_ALPHA, BURST_THRESHOLD, BURST_MIN_COUNT, BURST_WARMUP_TICKS,
+    BURST_MAX_TERMS, BURST_MAX_EVICTED, BURST_STALE_TICKS, ANALYTICS_SNAPSHOT_RETENTION,
+)
+from src.db import get_sessionmaker
+from src.models import BurstEvent
+from src.monitoring import bursts_detected, burst_tracked_terms
+import datetime
+import heapq
+import logging
+import math
+
+class EwmaStats:
+    """Bir tick’dagi hisob uchun eksponensial o‘rtacha va dispersiya.
+
+    `tick` — hali hisobga olinmagan birinchi tick; oradagi kuzatilmagan tick’lar nol hisoblanadi.
+    """
+    __slots__ = ("mean", "var", "tick", "start")
+
+    def __init__(self, tick: int):
+        self.mean = 0.0
+        self.var = 0.0
+        self.tick = tick
+        self.start = tick
+
+    def update(self, value: float, alpha: float) -> None:
+        diff = value - self.mean
+        increment = alpha * diff
+        self.mean += increment
+        self.var = (1 - alpha) * (self.var + diff * increment)
+
+    def catch_up(self, tick: int, alpha: float, limit: int) -> None:
+        """`tick` gacha kuzatilmagan tick’larni nol sifatida qo‘llaydi (ko‘pi bilan `limit` marta)"""
+        for _ in range(min(tick - self.tick, limit)):
+            self.update(0.0, alpha)
+        self.tick = max(self.tick, tick)
+
+    def zscore(self, value: float) -> float:
+        # Dispersiya 1 dan kichik bo‘lmaydi: kam uchraydigan so‘zda 0 -> 2 sakrash portlash emas
+        return (value - self.mean) / math.sqrt(max(self.var, 1.0))
+
+class BurstDetector:
+    """Guruhlar bo‘yicha so‘z va xabar oqimidagi keskin o‘sishlarni aniqlaydi.
+
+    Hisoblar `tick` soniyalik bo‘laklarda yig‘iladi. Joriy tick’dagi qisman hisob EWMA bazasidan
+    `threshold` standart og‘ishdan oshishi bilan portlash qayd etiladi (tick oxirini kutmasdan).
+    Tick yopilganda baza yangilanadi. Har bir guruhda ko‘pi bilan `max_terms` ta so‘z kuzatiladi
+    (bazasi eng pasti chiqariladi, tez-tez uchraydigan so‘zlar qoladi). Chiqarilgan so‘zlarning bazasi
+    `max_evicted` tagacha saqlanadi: so‘z qaytganda bazasiz portlash deb qayd etilmaydi.
+    `stale_ticks` davomida uchramagan so‘z va guruhlar o‘chiriladi.
+    """
+
+    def __init__(
+        self,
+        logger: Optional[logging.Logger] = None,
+        tick: float = BURST_TICK,
+        alpha: float = BURST_ALPHA,
+        threshold: float = BURST_THRESHOLD,
+        min_count: int = BURST_MIN_COUNT,
+        warmup_ticks: int = BURST_WARMUP_TICKS,
+        max_terms: int = BURST_MAX_TERMS,
+        max_evicted: int = BURST_MAX_EVICTED,
+        stale_ticks: int = BURST_STALE_TICKS,
+    ):
+        self.logger = logger or logging.getLogger(__name__)
+        self.tick = tick
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_count = min_count
+        self.warmup_ticks = warmup_ticks
+        self.max_terms = max_terms
+        self.max_evicted = max_evicted
+        self.stale_ticks = stale_ticks
+        self.current_tick: Optional[int] = None
+        # Joriy tick hisoblari
+        self.message_counts: Counter = Counter()
+        self.term_counts: Dict[int, Counter] = {}
+        self.flagged: Set[Tuple[int, Optional[str]]] = set()
+        # Bazalar: kirish tartibi oxirgi kuzatuv tartibiga mos (eskilari boshida)
+        self.rates: "OrderedDict[int, EwmaStats]" = OrderedDict()
+        self.terms: Dict[int, "OrderedDict[str, EwmaStats]"] = {}
+        # Chiqarilgan so‘zlar bazasi, chiqarilish tartibida (eskilari boshida)
+        self.evicted: Dict[int, "OrderedDict[str, EwmaStats]"] = {}
+        self.pending: List[dict] = []
+
+    def observe(self, term_counts: Dict[int, Counter], message_counts: Counter, now: float) -> None:
+        """Paketdagi guruh bo‘yicha xabarlar soni va so‘zlar (har bir xabarda bir marta) hisobini qo‘shadi"""
+        tick = int(now // self.tick)
+        if self.current_tick is None:
+            self.current_tick = tick
+        elif tick > self.current_tick:
+            self._close()
+            self.current_tick = tick
+
+        for group_id, count in message_counts.items():
+            self.message_counts[group_id] += count
+            self._check(group_id, None, self.message_counts[group_id], self.rates.get(group_id))
+        for group_id, counter in term_counts.items():
+            counts = self.term_counts.setdefault(group_id, Counter())
+            counts.update(counter)
+            baselines = self.terms.get(group_id, {})
+            evicted = self.evicted.get(group_id, {})
+            for term in counter:
+                self._check(group_id, term, counts[term], baselines.get(term) or evicted.get(term))
+
+    def _is_warm(self, group_id: int) -> bool:
+        rate = self.rates.get(group_id)
+        return rate is not None and self.current_tick - rate.start >= self.warmup_ticks
+
+    def _check(self, group_id: int, term: Optional[str], count: int, stats: Optional[EwmaStats]) -> None:
+        key = (group_id, term)
+        if count < self.min_count or key in self.flagged or not self._is_warm(group_id):
+            return
+        if stats is None:
+            baseline, zscore = 0.0, float(count)
+        else:
+            stats.catch_up(self.current_tick, self.alpha, self.stale_ticks)
+            baseline, zscore = stats.mean, stats.zscore(count)
+        if zscore < self.threshold:
+            return
+        self.flagged.add(key)
+        kind = "rate" if term is None else "term"
+        bursts_detected.labels(kind).inc()
+        self.pending.append({
+            "group_id": group_id,
+            "term": term,
+            "count": count,
+            "baseline": round(baseline, 3),
+            "zscore": round(zscore, 2),
+            "detected_at": datetime.datetime.now(datetime.timezone.utc),
+        })
+        self.logger.info(f"Portlash: guruh {group_id}, {term or 'xabarlar oqimi'} — {count} (baza {baseline:.1f}, z={zscore:.1f})")
+
+    def _close(self) -> None:
+        """Joriy tick hisoblarini bazalarga qo‘shadi va eskirgan holatni tozalaydi"""
+        tick, alpha, limit = self.current_tick, self.alpha, self.stale_ticks
+        for group_id, count in self.message_counts.items():
+            stats = self.rates.get(group_id)
+            if stats is None:
+                stats = self.rates[group_id] = EwmaStats(tick)
+            self.rates.move_to_end(group_id)
+            stats.catch_up(tick, alpha, limit)
+            stats.update(count, alpha)
+            stats.tick = tick + 1
+        for group_id, counter in self.term_counts.items():
+            baselines = self.terms.setdefault(group_id, OrderedDict())
+            evicted = self.evicted.setdefault(group_id, OrderedDict())
+            for term, count in counter.items():
+                stats = baselines.get(term)
+                if stats is None:
+                    stats = baselines[term] = evicted.pop(term, None) or EwmaStats(tick)
+                else:
+                    baselines.move_to_end(term)
+                stats.catch_up(tick, alpha, limit)
+                stats.update(count, alpha)
+                stats.tick = tick + 1
+            if len(baselines) > self.max_terms:
+                self._evict(baselines, evicted, tick + 1)
+
+        stale = tick - self.stale_ticks
+        while self.rates:
+            group_id, stats = next(iter(self.rates.items()))
+            if stats.tick > stale:
+                break
+            del self.rates[group_id]
+            self.terms.pop(group_id, None)
+            self.evicted.pop(group_id, None)
+        tracked = 0
+        for baselines in self.terms.values():
+            while baselines and next(iter(baselines.values())).tick <= stale:
+                baselines.popitem(last=False)
+            tracked += len(baselines)
+        burst_tracked_terms.set(tracked)
+
+        self.message_counts.clear()
+        self.term_counts.clear()
+        self.flagged.clear()
+
+    def _evict(self, baselines: "OrderedDict[str, EwmaStats]", evicted: "OrderedDict[str, EwmaStats]", tick: int) -> None:
+        """`max_terms` dan ortiq so‘zlarni `tick` dagi bazasi eng pastlaridan boshlab `evicted` ga o‘tkazadi"""
+        decay = 1 - self.alpha
+
+        def level(item: Tuple[str, EwmaStats]) -> float:
+            stats = item[1]
+            return stats.mean * decay ** min(tick - stats.tick, self.stale_ticks)
+
+        for term, stats in heapq.nsmallest(len(baselines) - self.max_terms, baselines.items(), key=level):
+            del baselines[term]
+            evicted[term] = stats
+        while len(evicted) > self.max_evicted:
+            evicted.popitem(last=False)
+
+    async def flush(self, logger: logging.Logger) -> None:
+        """Qayd etilgan portlashlarni databazaga yozadi"""
+        if not self.pending:
+            return
+        events, self.pending = self.pending, []
+        retention = events[0]["detected_at"] - datetime.timedelta(seconds=ANALYTICS_SNAPSHOT_RETENTION)
+        async with get_sessionmaker("ingest")() as session:
+            try:
+                session.add_all(BurstEvent(**event) for event in events)
+                await session.execute(delete(BurstEvent).where(BurstEvent.detected_at < retention))
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Portlashlarni saqlashda xato: {e}")
+
+async def recent_bursts(
+    session: AsyncSession,
+    group_id: Optional[int] = None,
+    since: Optional[datetime.datetime] = None,
+    limit: int = 100,
+) -> List[dict]:
+    """So‘nggi portlashlar, yangilari birinchi"""
+    since = since or datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=1)
+    stmt = select(
+        BurstEvent.group_id, BurstEvent.term, BurstEvent.count, BurstEvent.baseline, BurstEvent.zscore, BurstEvent.detected_at
+    ).where(BurstEvent.detected_at >= since)
+    if group_id is not None:
+        stmt = stmt.where(BurstEvent.group_id == group_id)
+    result = await session.execute(stmt.order_by(BurstEvent.detected_at.desc()).limit(limit))
+    return [row._asdict() for row in result]
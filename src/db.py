@@ -0,0 +1,85 @@
+from typing import Dict
+from sqlalchemy import URL, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from config import (
+    DB_CONFIG, DATABASE_URL, DB_ECHO, DB_STATEMENT_CACHE_SIZE, DB_PGBOUNCER,
+    DB_POOL, DB_POOL_RECYCLE, DB_POOL_TIMEOUT,
+)
+from src.monitoring import db_pool_checked_out, db_pool_checkouts, db_pool_connections
+import uuid
+
+_engines: Dict[str, AsyncEngine] = {}
+_sessions: Dict[str, sessionmaker] = {}
+
+def database_url() -> URL:
+    """DATABASE_URL yoki DB_CONFIG dan ulanish manzili (parol to‘g‘ri ekranlanadi)"""
+    if DATABASE_URL:
+        return make_url(DATABASE_URL)
+    return URL.create(
+        "postgresql+asyncpg",
+        username=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        host=DB_CONFIG["host"],
+        port=DB_CONFIG["port"],
+        database=DB_CONFIG["database"],
+    )
+
+def _connect_args() -> dict:
+    if DB_PGBOUNCER:
+        # Transaction pooling’da bitta prepared statement boshqa server ulanishiga tushishi mumkin:
+        # keshlar o‘chiriladi va statement nomlari takrorlanmas qilinadi
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return {"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+
+def _track_pool(engine: AsyncEngine, role: str) -> None:
+    """Pool hodisalarini Prometheus metrikalariga ulaydi"""
+    pool = engine.sync_engine.pool
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        db_pool_connections.labels(role).inc()
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        db_pool_checkouts.labels(role).inc()
+        db_pool_checked_out.labels(role).inc()
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        db_pool_checked_out.labels(role).dec()
+
+def get_engine(role: str = "ingest") -> AsyncEngine:
+    """`role` ("ingest" yoki "api") uchun jarayon bo‘yicha yagona engine.
+
+    Ulanish faqat birinchi so‘rovda ochiladi, shuning uchun modul importida engine yaratish xavfsiz.
+    """
+    if role not in _engines:
+        options = {"echo": DB_ECHO, "pool_pre_ping": True, "connect_args": _connect_args()}
+        if DB_PGBOUNCER:
+            # Ulanishlarni PgBouncer o‘zi boshqaradi, ikki qavatli pool kerak emas
+            options["poolclass"] = NullPool
+        else:
+            options.update(DB_POOL[role], pool_recycle=DB_POOL_RECYCLE, pool_timeout=DB_POOL_TIMEOUT)
+        engine = create_async_engine(database_url(), **options)
+        _track_pool(engine, role)
+        _engines[role] = engine
+    return _engines[role]
+
+def get_sessionmaker(role: str = "ingest") -> sessionmaker:
+    if role not in _sessions:
+        _sessions[role] = sessionmaker(get_engine(role), class_=AsyncSession, expire_on_commit=False)
+    return _sessions[role]
+
+async def dispose_engines() -> None:
+    """Jarayon tugaganda barcha pool ulanishlarini yopadi"""
+    for engine in _engines.values():
+        await engine.dispose()
+    _engines.clear()
+    _sessions.clear()
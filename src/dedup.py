@@ -0,0 +1,290 @@
+"""Deyarli bir xil xabarlarni (spam, bir nechta guruhga tarqatilgan e'lonlar) klasterlash.
+
+MinHash imzosi + LSH banding: har bir xabar uchun BANDS ta lug‘at so‘rovi, indeks hajmidan qat'i nazar.
+Indeks jarayon xotirasida turadi va ishga tushganda databazadan fonda qayta quriladi: imzolar alohida
+protsessda hisoblanadi, indeks esa faqat event loop’da o‘zgaradi. Shu payt yangi xabarlar qisman indeks bilan
+solishtiriladi; ular uchun ochilgan klaster keyinroq saqlangan klasterga mos kelsa, saqlangan ID’ga birlashtiriladi.
+
+Qayta qurish / bo‘sh cluster_id’larni to‘ldirish: python -m src.dedup rebuild [--days N]
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from config import DEDUP_CAPACITY, DEDUP_THRESHOLD, DEDUP_MIN_TOKENS, DEDUP_REBUILD_DAYS
+from src.db import get_sessionmaker, dispose_engines
+from src.models import Group, Message
+from src.tokenizer import Tokenizer
+from src.analytics import EMPTY_TEXT
+from logger import setup_logger
+import argparse
+import asyncio
+import datetime
+import hashlib
+import logging
+import multiprocessing
+
+SIGNATURE_SIZE = 64
+BANDS = 16
+ROWS = SIGNATURE_SIZE // BANDS  # 16 x 4: Jaccard ~0.5 dan yuqori juftlar nomzod bo‘ladi
+SHINGLE_SIZE = 3
+REBUILD_CHUNK_ROWS = 5000
+# Imzolarni indeksga qo‘shish shuncha qatordan keyin event loop’ga navbat beradi
+REBUILD_APPLY_ROWS = 500
+
+def shingles(tokens: List[str], size: int = SHINGLE_SIZE) -> List[bytes]:
+    """Ketma-ket `size` ta so‘zdan iborat takrorlanmas bo‘laklar"""
+    size = min(size, len(tokens))
+    return list({" ".join(tokens[i:i + size]).encode() for i in range(len(tokens) - size + 1)})
+
+def minhash(items: List[bytes]) -> array:
+    """MinHash imzosi: ustunlar bo‘yicha minimum.
+
+    Har bir bo‘lak uchun SHAKE-128 dan SIGNATURE_SIZE ta mustaqil 32-bit xesh olinadi,
+    shuning uchun xeshlash ham, minimum ham C darajasida bajariladi.
+    """
+    width = SIGNATURE_SIZE * 4
+    rows = [array("I", hashlib.shake_128(item).digest(width)) for item in items]
+    return array("I", map(min, zip(*rows)))
+
+def band_keys(signature: array) -> List[int]:
+    data = signature.tobytes()
+    width = ROWS * signature.itemsize
+    return [hash((band, data[band * width:(band + 1) * width])) for band in range(BANDS)]
+
+def similarity(left: array, right: array) -> float:
+    """Imzolar bo‘yicha Jaccard o‘xshashligi bahosi"""
+    return sum(x == y for x, y in zip(left, right)) / SIGNATURE_SIZE
+
+_tokenizer: Optional[Tokenizer] = None
+
+def _init_worker(tokenizer: Tokenizer) -> None:
+    global _tokenizer
+    _tokenizer = tokenizer
+
+def text_signatures(texts: List[Optional[str]], min_tokens: int) -> List[Optional[array]]:
+    """Worker protsessida bajariladi: har bir matn imzosi (qisqa yoki bo‘sh matnlarda None)"""
+    tokens = _tokenizer.tokenize_batch([None if text == EMPTY_TEXT else text for text in texts])
+    return [minhash(shingles(msg_tokens)) if len(msg_tokens) >= min_tokens else None for msg_tokens in tokens]
+
+def cluster_id_for(signature: array) -> int:
+    """Klaster ID’si birinchi xabar imzosidan olinadi (musbat 63-bit), alohida ketma-ketlik kerak emas"""
+    return int.from_bytes(hashlib.blake2b(signature.tobytes(), digest_size=8).digest(), "big") >> 1
+
+class DuplicateIndex:
+    """MinHash LSH indeksi: band kaliti -> klaster, klaster -> vakil imzo.
+
+    Xotira klasterlar soni bilan chegaralangan (`capacity`, eng uzoq ko‘rilmagani chiqariladi);
+    klasterga qo‘shilgan xabarlar yangi kalit qo‘shmaydi. LSH nomzodi vakil imzo bilan
+    `threshold` bo‘yicha tekshiriladi, shuning uchun tasodifiy band mosligi klasterni birlashtirmaydi.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEDUP_CAPACITY,
+        threshold: float = DEDUP_THRESHOLD,
+        min_tokens: int = DEDUP_MIN_TOKENS,
+        tokenizer: Optional[Tokenizer] = None,
+    ):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.min_tokens = min_tokens
+        self.tokenizer = tokenizer or Tokenizer()
+        self.buckets: Dict[int, int] = {}
+        self.clusters: "OrderedDict[int, array]" = OrderedDict()
+        # Qayta qurish paytida yangi xabarlar uchun ochilgan klasterlar va saqlangan ID’ga birlashtirilganlari
+        self.rebuilding = False
+        self._provisional: Set[int] = set()
+        self._merged: Dict[int, int] = {}
+        self._unsaved_merges: Dict[int, int] = {}
+
+    def signature(self, tokens: List[str]) -> Optional[array]:
+        if len(tokens) < self.min_tokens:
+            return None  # Juda qisqa matnlar ("rahmat", "ok") klasterlanmaydi
+        return minhash(shingles(tokens))
+
+    def _find(self, signature: array, keys: List[int]) -> Optional[int]:
+        for key in keys:
+            cluster_id = self.buckets.get(key)
+            if cluster_id is not None and similarity(signature, self.clusters[cluster_id]) >= self.threshold:
+                return cluster_id
+        return None
+
+    def _remove(self, cluster_id: int) -> None:
+        signature = self.clusters.pop(cluster_id)
+        for key in band_keys(signature):
+            if self.buckets.get(key) == cluster_id:
+                del self.buckets[key]
+
+    def _add(self, cluster_id: int, signature: array, keys: List[int]) -> None:
+        self.clusters[cluster_id] = signature
+        for key in keys:
+            self.buckets[key] = cluster_id
+        while len(self.clusters) > self.capacity:
+            self._remove(next(iter(self.clusters)))
+
+    def assign_signature(self, signature: array, provisional: bool = False) -> int:
+        keys = band_keys(signature)
+        cluster_id = self._find(signature, keys)
+        if cluster_id is None:
+            cluster_id = cluster_id_for(signature)
+            self._add(cluster_id, signature, keys)
+            if provisional:
+                self._provisional.add(cluster_id)
+        else:
+            self.clusters.move_to_end(cluster_id)
+        return cluster_id
+
+    def register(self, cluster_id: int, signature: array) -> None:
+        """Databazada saqlangan klasterni indeksga qaytaradi (ID o‘zgarmaydi).
+
+        Qayta qurish paytida shu matnlar uchun yangi klaster ochilgan bo‘lsa, u saqlangan ID’ga birlashtiriladi
+        (`_merged` ga yoziladi, xabarlardagi ID `_save_merged` da almashtiriladi).
+        """
+        cluster_id = self._merged.get(cluster_id, cluster_id)
+        if cluster_id in self.clusters:
+            self.clusters.move_to_end(cluster_id)
+            return
+        keys = band_keys(signature)
+        found = self._find(signature, keys)
+        if found in self._provisional:
+            self._provisional.discard(found)
+            self._remove(found)
+            self._merged[found] = self._unsaved_merges[found] = cluster_id
+        self._add(cluster_id, signature, keys)
+
+    def assign(self, messages: List[dict], tokens: Optional[List[List[str]]] = None) -> None:
+        """Paketdagi har bir xabarga `cluster_id` yozadi (qisqa yoki bo‘sh matnlarda None)"""
+        if tokens is None:
+            tokens = self.tokenizer.tokenize_batch([msg.get("text") for msg in messages])
+        for msg, msg_tokens in zip(messages, tokens):
+            signature = self.signature(msg_tokens) if msg.get("text") != EMPTY_TEXT else None
+            msg["cluster_id"] = self.assign_signature(signature, self.rebuilding) if signature is not None else None
+
+    async def rebuild(self, logger: logging.Logger, since: Optional[datetime.datetime] = None) -> None:
+        """Indeksni `since` dan keyingi xabarlardan xronologik tartibda quradi.
+
+        Saqlangan cluster_id’lar saqlanib qoladi; ID’si bo‘lmagan xabarlarga yangi ID berilib, databazaga yoziladi.
+        Tokenlash va MinHash (sof Python, GIL ostida) alohida protsessda bajariladi; indeksga qo‘shish event loop’da
+        REBUILD_APPLY_ROWS qatorlik bo‘laklarda, shuning uchun ingest to‘xtab qolmaydi.
+        """
+        stmt = select(Message.group_id, Message.id, Message.timestamp, Message.text, Message.cluster_id).order_by(Message.timestamp, Message.id)
+        if since is not None:
+            stmt = stmt.where(Message.timestamp >= since)
+        sessions = get_sessionmaker("ingest")
+        loop = asyncio.get_running_loop()
+        indexed = assigned = 0
+        self.rebuilding = True
+        # spawn: worker ota jarayonning event loop, ulanishlar va log oqimini meros olmaydi
+        pool = ProcessPoolExecutor(
+            1, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker, initargs=(self.tokenizer,)
+        )
+        try:
+            async with sessions() as session:
+                result = await session.stream(stmt.execution_options(yield_per=REBUILD_CHUNK_ROWS))
+                async for rows in result.partitions():
+                    signatures = await loop.run_in_executor(pool, text_signatures, [row.text for row in rows], self.min_tokens)
+                    updates = []
+                    for index, (row, signature) in enumerate(zip(rows, signatures), 1):
+                        if signature is not None:
+                            if row.cluster_id is not None:
+                                self.register(row.cluster_id, signature)
+                            else:
+                                updates.append({"g": row.group_id, "i": row.id, "t": row.timestamp, "c": self.assign_signature(signature)})
+                            indexed += 1
+                        if index % REBUILD_APPLY_ROWS == 0:
+                            await asyncio.sleep(0)
+                    if updates:
+                        await _save_cluster_ids(sessions, updates)
+                        assigned += len(updates)
+                    if self._unsaved_merges:
+                        await _save_merged(sessions, self._unsaved_merges)
+                        self._unsaved_merges.clear()
+            if self._merged:
+                # Birlashtirish paytida saqlanayotgan paketlar eski ID bilan yozilgan bo‘lishi mumkin
+                await _save_merged(sessions, self._merged)
+            merged = len(self._merged)
+        finally:
+            self.rebuilding = False
+            self._provisional.clear()
+            self._merged.clear()
+            self._unsaved_merges.clear()
+            pool.shutdown(wait=False, cancel_futures=True)
+        logger.info(
+            f"Dublikat indeksi qurildi: {indexed} ta xabar, {len(self.clusters)} ta klaster, {assigned} ta yangi cluster_id, "
+            f"{merged} ta klaster saqlangan ID’ga birlashtirildi"
+        )
+
+
+async def _save_cluster_ids(sessions, updates: List[dict]) -> None:
+    table = Message.__table__
+    # timestamp bo‘lim kaliti: har bir yangilash faqat bitta oylik bo‘limga tushadi
+    stmt = (
+        update(table)
+        .where(table.c.group_id == bindparam("g"), table.c.id == bindparam("i"), table.c.timestamp == bindparam("t"))
+        .values(cluster_id=bindparam("c"))
+    )
+    async with sessions() as session:
+        try:
+            await session.execute(stmt, updates)
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+async def _save_merged(sessions, merged: Dict[int, int]) -> None:
+    """Birlashtirilgan klasterlar xabarlaridagi cluster_id’ni saqlangan ID’ga almashtiradi"""
+    table = Message.__table__
+    stmt = update(table).where(table.c.cluster_id == bindparam("old")).values(cluster_id=bindparam("new"))
+    async with sessions() as session:
+        try:
+            await session.execute(stmt, [{"old": old, "new": new} for old, new in merged.items()])
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+async def cluster_groups(session: AsyncSession, cluster_id: int) -> List[dict]:
+    """Klaster xabarlari uchragan guruhlar: xabarlar soni, birinchi va oxirgi paydo bo‘lish vaqti"""
+    stmt = (
+        select(
+            Message.group_id,
+            Group.name,
+            Group.username,
+            func.count().label("messages"),
+            func.min(Message.timestamp).label("first_seen"),
+            func.max(Message.timestamp).label("last_seen"),
+        )
+        .join(Group, Group.id == Message.group_id)
+        .where(Message.cluster_id == cluster_id)
+        .group_by(Message.group_id, Group.name, Group.username)
+        .order_by(func.min(Message.timestamp))
+    )
+    result = await session.execute(stmt)
+    return [row._asdict() for row in result]
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Deyarli bir xil xabarlar indeksi")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rebuild = commands.add_parser("rebuild", help="Indeksni qurish va bo‘sh cluster_id’larni to‘ldirish")
+    rebuild.add_argument("--days", type=int, default=DEDUP_REBUILD_DAYS, help="Oxirgi N kun xabarlari (0 — hammasi)")
+    args = parser.parse_args()
+
+    logger = setup_logger()
+    since = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=args.days) if args.days else None
+    try:
+        if args.command == "rebuild":
+            await DuplicateIndex(capacity=sys.maxsize).rebuild(logger, since)
+    finally:
+        await dispose_engines()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, Hashable
+import time
+from config import ENTITY_CACHE_SIZE, ENTITY_CACHE_TTL
+
+class EntityCache:
+    """Guruh/foydalanuvchining databazaga oxirgi yozilgan holatini saqlaydigan LRU/TTL kesh.
+
+    Kelgan snapshot keshdagisi bilan bir xil va muddati o‘tmagan bo‘lsa, databazaga
+    yozish shart emas. Muddat tugagach entity qayta yoziladi (tashqi o‘zgarishlarni tuzatish uchun).
+    """
+
+    def __init__(self, max_size: int = ENTITY_CACHE_SIZE, ttl: float = ENTITY_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: "OrderedDict[Hashable, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        stored_at, snapshot = item
+        if time.monotonic() - stored_at > self.ttl:
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return snapshot
+
+    def is_unchanged(self, key: Hashable, snapshot: Dict[str, Any]) -> bool:
+        """Snapshot keshdagi holatdan farq qilmasa True qaytaradi"""
+        unchanged = self.get(key) == snapshot
+        if unchanged:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return unchanged
+
+    def set(self, key: Hashable, snapshot: Dict[str, Any]) -> None:
+        """Databazaga muvaffaqiyatli yozilgan holatni keshga qo‘yadi"""
+        self._items[key] = (time.monotonic(), snapshot)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        self._items.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+group_cache = EntityCache()
+user_cache = EntityCache()
@@ -0,0 +1,58 @@
+from typing import AsyncIterator, Callable, Iterable
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from src.models import Message
+from src.pagination import filter_messages, MESSAGE_LIST_COLUMNS
+import csv
+import io
+import orjson
+import zlib
+
+EXPORT_COLUMNS = MESSAGE_LIST_COLUMNS
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+EXPORT_CHUNK_ROWS = 1000
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+def encode_ndjson(rows: Iterable, header: bool = False) -> bytes:
+    # orjson datetime’ni ISO 8601 ko‘rinishida o‘zi kodlaydi
+    return b"".join(orjson.dumps(row._asdict(), option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+def encode_csv(rows: Iterable, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+ENCODERS = {"ndjson": encode_ndjson, "csv": encode_csv}
+
+async def export_messages(
+    session_factory: Callable[[], AsyncSession],
+    fmt: str = "ndjson",
+    compress: bool = False,
+    **filters,
+) -> AsyncIterator[bytes]:
+    """Filtrlangan xabarlarni server-side kursor orqali o‘qib, NDJSON/CSV bo‘laklarini uzatadi.
+
+    Xotirada bir vaqtda faqat bitta bo‘lak (EXPORT_CHUNK_ROWS qator) turadi.
+    """
+    encode = ENCODERS[fmt]
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31: gzip formati
+    stmt = filter_messages(select(*EXPORT_COLUMNS), **filters).order_by(Message.timestamp, Message.group_id, Message.id)
+    header = True
+    async with session_factory() as session:
+        result = await session.stream(stmt.execution_options(yield_per=EXPORT_CHUNK_ROWS))
+        async for rows in result.partitions():
+            data = encode(rows, header=header)
+            header = False
+            if compressor:
+                data = compressor.compress(data)
+            if data:
+                yield data
+    if header and fmt == "csv":
+        # Bo‘sh eksportda ham CSV sarlavhasi qaytariladi
+        data = encode([], header=True)
+        yield compressor.compress(data) + compressor.flush() if compressor else data
+    elif compressor:
+        yield compressor.flush()
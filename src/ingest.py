@@ -0,0 +1,112 @@
+from typing import List, Optional, Callable, Awaitable
+import asyncio
+import logging
+from config import INGEST_BATCH_SIZE, INGEST_FLUSH_INTERVAL, INGEST_QUEUE_SIZE, INGEST_RETRY_DELAY, INGEST_RETRY_MAX_DELAY
+from src.database import save_messages
+
+_STOP = object()  # Navbatni yopish uchun belgi
+
+class IngestQueue:
+    """Xabarlarni cheklangan navbatga yig‘ib, fon writer orqali paketlab saqlaydi.
+
+    Paket `batch_size` ga yetganda yoki birinchi xabardan keyin `flush_interval`
+    soniya o‘tganda databazaga yoziladi. Navbat to‘lsa `put` kutadi (backpressure).
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        batch_size: int = INGEST_BATCH_SIZE,
+        flush_interval: float = INGEST_FLUSH_INTERVAL,
+        max_size: int = INGEST_QUEUE_SIZE,
+        writer: Callable[[List[dict], logging.Logger], Awaitable[None]] = save_messages,
+    ):
+        self.logger = logger
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.writer = writer
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def start(self) -> None:
+        """Fon writer vazifasini ishga tushiradi"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def put(self, message_data: dict) -> None:
+        """Xabarni navbatga qo‘shadi; navbat to‘la bo‘lsa joy bo‘shashini kutadi"""
+        if self._closed:
+            raise RuntimeError("Ingest navbati yopilgan")
+        await self.queue.put(message_data)
+
+    async def barrier(self) -> None:
+        """Shu paytgacha navbatga qo‘shilgan barcha xabarlar saqlanishini kutadi"""
+        if self._closed:
+            raise RuntimeError("Ingest navbati yopilgan")
+        waiter = asyncio.get_running_loop().create_future()
+        await self.queue.put(waiter)
+        await waiter
+
+    async def stop(self) -> None:
+        """Yangi xabarlarni qabul qilishni to‘xtatib, navbatdagilarni saqlab tugatadi"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._task is None:
+            return
+        await self.queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def _flush(self, batch: List[dict]) -> None:
+        """Paketni saqlaydi; databaza mavjud bo‘lmasa butun paket ortib boruvchi kutish bilan qayta yuboriladi.
+
+        Qayta urinish paytida navbat to‘ladi va `put` kutadi. Navbat yopilgan bo‘lsa paket tashlanadi.
+        """
+        delay = INGEST_RETRY_DELAY
+        while True:
+            try:
+                await self.writer(batch, self.logger)
+                return
+            except Exception as e:
+                if self._closed:
+                    self.logger.error(f"Ingest paketini ({len(batch)} ta xabar) saqlashda xato, navbat yopilgan: {e}")
+                    return
+                self.logger.error(f"Ingest paketini ({len(batch)} ta xabar) saqlashda xato, {delay:g} soniyadan keyin qayta urinish: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, INGEST_RETRY_MAX_DELAY)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is _STOP:
+                break
+            if isinstance(item, asyncio.Future):
+                if not item.done():
+                    item.set_result(None)
+                continue
+            batch = [item]
+            waiter = None
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                if isinstance(item, asyncio.Future):
+                    waiter = item
+                    break
+                batch.append(item)
+            await self._flush(batch)
+            if waiter is not None and not waiter.done():
+                waiter.set_result(None)
+        self.logger.info("Ingest navbati bo‘shatildi va to‘xtatildi")
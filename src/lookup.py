@@ -0,0 +1,38 @@
+from typing import List, Optional
+from sqlalchemy import func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from src.models import Group, User
+
+def _trigram_match(query: str, *columns):
+    """pg_trgm indeksidan foydalanadigan shart va o‘xshashlik bahosi.
+
+    `%>` (word_similarity) qisman yoki xato yozilgan nomni ham topadi va GIN indeks bilan ishlaydi.
+    """
+    # Ustun o‘ralmagan holda qoladi, aks holda indeks ishlatilmaydi; NULL qiymatlarni greatest() e'tiborsiz qoldiradi
+    condition = or_(*(column.op("%>")(query) for column in columns))
+    score = func.greatest(*(func.word_similarity(query, column) for column in columns))
+    return condition, score.label("score")
+
+async def lookup_groups(session: AsyncSession, query: str, limit: int) -> List[dict]:
+    condition, score = _trigram_match(query, Group.name, Group.username)
+    stmt = select(Group.id, Group.name, Group.username, Group.member_count, score).where(condition).order_by(score.desc()).limit(limit)
+    result = await session.execute(stmt)
+    return [{"kind": "group", **row._mapping} for row in result]
+
+async def lookup_users(session: AsyncSession, query: str, limit: int) -> List[dict]:
+    condition, score = _trigram_match(query, User.first_name, User.username)
+    stmt = select(User.id, User.first_name, User.username, score).where(condition).order_by(score.desc()).limit(limit)
+    result = await session.execute(stmt)
+    return [{"kind": "user", **row._mapping} for row in result]
+
+async def lookup_entities(session: AsyncSession, query: str, kind: Optional[str] = None, limit: int = 10) -> List[dict]:
+    """Guruh va foydalanuvchilarni nom/username bo‘yicha noaniq qidiradi, o‘xshashlik bo‘yicha tartiblaydi"""
+    query = query.strip().lstrip("@")
+    items = []
+    if kind in (None, "group"):
+        items += await lookup_groups(session, query, limit)
+    if kind in (None, "user"):
+        items += await lookup_users(session, query, limit)
+    items.sort(key=lambda item: item["score"], reverse=True)
+    return items[:limit]
@@ -6,15 +6,26 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 import asyncio
+import datetime
 from pyrogram import Client, filters, idle
 from pyrogram.handlers import MessageHandler
 from pyrogram.types import Message as PyrogramMessage
 from pyrogram.errors import PeerIdInvalid, InviteHashExpired, UserAlreadyParticipant
 from src.account_manager import AccountManager
-from src.database import save_messages
+from src.ingest import IngestQueue
+from src.media import MediaDownloader
+from src.database import load_checkpoint, finish_backfill, save_messages
+from src.backfill import BackfillScheduler, backfill_priority
+from src.db import dispose_engines
+from src.monitoring import setup_monitoring
+from src.partitions import ensure_future_partitions
 from src.analytics import MessageAnalytics
+from src.bursts import BurstDetector
+from src.dedup import DuplicateIndex
+from src.alerts import KeywordAlerts, BotNotifier
+from config import ANALYTICS_SNAPSHOT_INTERVAL, DEDUP_REBUILD_DAYS, BOT_TOKEN, ADMIN_CHAT_ID
 from src.models import MessagePydantic, GroupPydantic, UserPydantic
-from logger import setup_logger
+from logger import setup_logger, context_logger
 import logging
 from pydantic import ValidationError
 
@@ -25,13 +36,13 @@ async def is_valid_message(text: Optional[str]) -> bool:
     words = text.split()
     return not (len(words) == 1 and len(words[0]) <= 2) and len(words) <= 500
 
-async def on_message_handler(client: Client, message: PyrogramMessage) -> None:
+async def on_message_handler(client: Client, message: PyrogramMessage, ingest: IngestQueue, logger: logging.Logger) -> None:
     """Yangi xabarlar uchun handler."""
-    logger = setup_logger()
+    log = context_logger(logger, client.name, message.chat.id)
     text = message.text or "Bo‘sh xabar"
     
     if not await is_valid_message(text):
-        logger.info(f"Xabar ID {message.id} validatsiyadan o‘tmadi: {text[:50]}...")
+        log.info(f"Xabar ID {message.id} validatsiyadan o‘tmadi: {text[:50]}...", extra={"sample": "invalid"})
         return
     
     try:
@@ -78,25 +89,23 @@ async def on_message_handler(client: Client, message: PyrogramMessage) -> None:
         }
 
         if message.photo:
-            file_path = await client.download_media(message.photo, file_name=f"static/media/photos/{message.id}.jpg")
+            # Fayl fon worker tomonidan yuklab olinadi, xabar kutmaydi
             message_data["media"].append({
                 "file_type": "photo",
-                "file_path": file_path,
-                "file_size": message.photo.file_size
+                "file_path": None,
+                "file_size": message.photo.file_size,
+                "file_id": message.photo.file_id,
+                "file_unique_id": message.photo.file_unique_id
             })
 
         MessagePydantic(**message_data)
-        await save_messages([message_data], logger)
-        analytics = MessageAnalytics()
-        analytics.analyze_message(message_data["text"])
-        logger.info(f"Yangi xabar ID: {message_data['id']}, Guruh: {message_data['group_id']}, Matn: {message_data['text'][:50]}...")
-        print(f"[{client.name}] Yangi xabar: Guruh ID: {message.chat.id}, Xabar ID: {message.id}, Matn: {text[:50]}", flush=True)
-        analytics.print_stats()
+        await ingest.put(message_data)
+        log.info(f"Yangi xabar ID: {message_data['id']}, Matn: {message_data['text'][:50]}...", extra={"sample": "new_message"})
 
     except ValidationError as e:
-        logger.error(f"Xabar ID {message.id} validatsiyadan o‘tmadi: {e}")
+        log.error(f"Xabar ID {message.id} validatsiyadan o‘tmadi: {e}")
     except Exception as e:
-        logger.error(f"Xabar ID {message.id} ni qayta ishlashda xato: {e}")
+        log.error(f"Xabar ID {message.id} ni qayta ishlashda xato: {e}")
 
 async def resolve_chat_ids(client: Client, groups: List[Dict[str, str]], logger: logging.Logger) -> List[int]:
     """@username, ID yoki invite link’larni chat_id’larga aylantiradi."""
@@ -150,83 +159,153 @@ async def resolve_chat_ids(client: Client, groups: List[Dict[str, str]], logger:
     
     return chat_ids
 
-async def collect_history(client: Client, chat_id: int, logger: logging.Logger, buffer_size: int = 100) -> None:
-    """Guruhdagi eski xabarlarni yig‘adi va saqlaydi."""
-    message_buffer = []
-    
-    try:
-        async for message in client.get_chat_history(chat_id, limit=0):
-            text = message.text or "Bo‘sh xabar"
-            if not await is_valid_message(text):
-                continue
-            
-            url = f"https://t.me/c/{str(message.chat.id)[4:]}/{message.id}"
-            user_data = {
-                "id": message.from_user.id,
-                "first_name": message.from_user.first_name,
-                "username": message.from_user.username,
-                "profile_photo": None
-            } if message.from_user else {}
-            
-            message_data = {
-                "id": message.id,
-                "group_id": chat_id,
-                "user_id": user_data.get("id"),
-                "account_name": client.name,
-                "text": text,
-                "timestamp": message.date.isoformat(),
-                "url": url,
-                "group_name": message.chat.title or "Noma'lum guruh",
-                "group_username": message.chat.username,
-                "group_bio": message.chat.description,
-                "group_member_count": message.chat.members_count,
-                "user_first_name": user_data.get("first_name"),
-                "user_username": user_data.get("username"),
-                "user_profile_photo": None,
-                "media": []
-            }
-            
-            try:
-                MessagePydantic(**message_data)
-                message_buffer.append(message_data)
-                
-                if len(message_buffer) >= buffer_size:
-                    await save_messages(message_buffer, logger)
-                    logger.info(f"{buffer_size} ta eski xabar saqlandi")
-                    message_buffer.clear()
-            except ValidationError as e:
-                logger.error(f"Eski xabar ID {message.id} validatsiyadan o‘tmadi: {e}")
+async def _backfill_range(
+    client: Client,
+    chat_id: int,
+    logger: logging.Logger,
+    ingest: IngestQueue,
+    offset_id: int,
+    stop_id: int,
+    backfill: Optional[Dict[str, Any]] = None,
+    progress: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """`offset_id` dan eskiroq va `stop_id` dan yangiroq xabarlarni navbatga qo‘shadi.
+
+    `backfill` — shu o‘tishning boshlang‘ich nuqtasi (top_id, top_timestamp); berilmasa
+    birinchi olingan xabardan aniqlanadi. Hech qanday xabar bo‘lmasa None qaytadi.
+    `progress` berilsa, unda yig‘ish holati (top_id, stop_id, current_id, queued) yangilanadi.
+    """
+    progress = progress if progress is not None else {}
+    progress.setdefault("queued", 0)
+    progress["stop_id"] = stop_id
+    queued = 0
+    async for message in client.get_chat_history(chat_id, offset_id=offset_id):
+        if message.id <= stop_id:
+            break
+        if backfill is None:
+            backfill = {"top_id": message.id, "top_timestamp": message.date}
+        progress["top_id"] = backfill["top_id"]
+        progress["current_id"] = message.id
+        
+        text = message.text or "Bo‘sh xabar"
+        if not await is_valid_message(text):
+            continue
+        
+        url = f"https://t.me/c/{str(message.chat.id)[4:]}/{message.id}"
+        user_data = {
+            "id": message.from_user.id,
+            "first_name": message.from_user.first_name,
+            "username": message.from_user.username,
+            "profile_photo": None
+        } if message.from_user else {}
+        
+        message_data = {
+            "id": message.id,
+            "group_id": chat_id,
+            "user_id": user_data.get("id"),
+            "account_name": client.name,
+            "text": text,
+            "timestamp": message.date.isoformat(),
+            "url": url,
+            "group_name": message.chat.title or "Noma'lum guruh",
+            "group_username": message.chat.username,
+            "group_bio": message.chat.description,
+            "group_member_count": message.chat.members_count,
+            "user_first_name": user_data.get("first_name"),
+            "user_username": user_data.get("username"),
+            "user_profile_photo": None,
+            "media": [],
+            "backfill": backfill
+        }
         
-        if message_buffer:
-            await save_messages(message_buffer, logger)
-            logger.info(f"{len(message_buffer)} ta qolgan eski xabar saqlandi")
+        try:
+            MessagePydantic(**message_data)
+            await ingest.put(message_data)
+            queued += 1
+            progress["queued"] += 1
+        except ValidationError as e:
+            logger.error(f"Eski xabar ID {message.id} validatsiyadan o‘tmadi: {e}")
     
-    except Exception as e:
-        logger.error(f"{chat_id} guruhidan tarixni yig‘ishda xato: {e}")
+    logger.info(f"{chat_id} guruhidan {queued} ta eski xabar navbatga qo‘shildi")
+    return backfill
 
-async def setup_client(client: Client, groups: List[Dict[str, str]], logger: logging.Logger) -> None:
-    """Klientni sozlash va handler’larni qo‘shish."""
+async def collect_history(
+    client: Client,
+    chat_id: int,
+    logger: logging.Logger,
+    ingest: IngestQueue,
+    progress: Optional[Dict[str, Any]] = None
+) -> None:
+    """Guruhning hali saqlanmagan tarixini checkpoint’dan boshlab yig‘adi.
+
+    Xatolar (jumladan FloodWait) yuqoriga uzatiladi: rejalashtiruvchi guruhni qayta navbatga qo‘yadi
+    va yig‘ish checkpoint’dan davom etadi.
+    """
+    checkpoint = await load_checkpoint(chat_id)
+    stop_id = (checkpoint.last_message_id or 0) if checkpoint else 0
+    
+    if checkpoint and checkpoint.backfill_top_id:
+        # Oldingi backfill uzilib qolgan: to‘xtagan joyidan davom etamiz
+        backfill = {"top_id": checkpoint.backfill_top_id, "top_timestamp": checkpoint.backfill_top_timestamp}
+        offset_id = checkpoint.backfill_offset_id or checkpoint.backfill_top_id + 1
+        logger.info(f"{chat_id} guruhi backfill’i {offset_id} xabardan davom ettirilmoqda")
+        await _backfill_range(client, chat_id, logger, ingest, offset_id, stop_id, backfill, progress)
+        await ingest.barrier()
+        if not await finish_backfill(chat_id, backfill["top_id"], backfill["top_timestamp"], logger):
+            # Yangi oraliq checkpoint’ni qayta yozib, yo‘qolgan xabarlarni unutib yubormasligi uchun
+            raise RuntimeError(f"{chat_id} guruhi tarixida saqlanmagan xabarlar bor, checkpoint’dan davom ettiriladi")
+        stop_id = max(stop_id, backfill["top_id"])
+    
+    # Oxirgi checkpoint’dan keyingi yangi xabarlar
+    backfill = await _backfill_range(client, chat_id, logger, ingest, 0, stop_id, progress=progress)
+    if backfill:
+        await ingest.barrier()
+        if not await finish_backfill(chat_id, backfill["top_id"], backfill["top_timestamp"], logger):
+            raise RuntimeError(f"{chat_id} guruhi tarixida saqlanmagan xabarlar bor, checkpoint’dan davom ettiriladi")
+
+async def setup_client(
+    client: Client,
+    groups: List[Dict[str, str]],
+    logger: logging.Logger,
+    ingest: IngestQueue,
+    scheduler: BackfillScheduler
+) -> None:
+    """Klientni sozlash, handler’larni qo‘shish va guruhlarni backfill navbatiga qo‘yish."""
     await client.start()
     chat_ids = await resolve_chat_ids(client, groups, logger)
     logger.info(f"{client.name} uchun chat ID’lari: {chat_ids}")
     
-    for chat_id in chat_ids:
-        logger.info(f"{chat_id} guruhidan eski xabarlar yig‘ilmoqda...")
-        await collect_history(client, chat_id, logger)
-    
     if chat_ids:
+        # Handler backfill’dan oldin qo‘shiladi, shunda yig‘ish paytidagi xabarlar yo‘qolmaydi
         async def wrapped_handler(client: Client, message: PyrogramMessage):
-            await on_message_handler(client, message)
+            await on_message_handler(client, message, ingest, logger)
         
         handler = MessageHandler(wrapped_handler, filters.chat(chat_ids))
         client.add_handler(handler)
     else:
         logger.warning(f"{client.name} uchun hech qanday chat ID topilmadi")
+    
+    for chat_id in chat_ids:
+        try:
+            priority = await backfill_priority(client, chat_id)
+        except Exception as e:
+            logger.warning(f"{chat_id} guruhi ustuvorligini aniqlab bo‘lmadi: {e}")
+            priority = (1, 0)
+        scheduler.add(client, chat_id, priority)
+
+async def rebuild_dedup(dedup: DuplicateIndex, logger: logging.Logger) -> None:
+    """Dublikat indeksini fonda quradi: shu payt assign() qisman indeks bilan ishlaydi, xato ingest’ni to‘xtatmaydi"""
+    try:
+        await dedup.rebuild(logger, datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=DEDUP_REBUILD_DAYS))
+    except Exception as e:
+        logger.error(f"Dublikat indeksini qurishda xato: {e}")
 
 async def main() -> None:
     """Asosiy dastur logikasi."""
     logger = setup_logger()
     logger.info("Real-time xabar yig‘ish boshlandi...")
+    # Pool, media navbati, backfill, portlash va ogohlantirish metrikalari (METRICS_PORT)
+    setup_monitoring()
     
     account_manager = AccountManager()
     account_manager.load_accounts(logger)
@@ -236,6 +315,41 @@ async def main() -> None:
         logger.error("Hech qanday hisob yuklanmadi!")
         return
     
+    # Bo‘limi yo‘q oylar default bo‘limga tushadi; joriy va kelgusi oylar uchun bo‘limlar oldindan yaratiladi
+    await ensure_future_partitions(logger)
+    media = MediaDownloader({name: info["client"] for name, info in clients.items()}, logger)
+    # Tahlil saqlangan paket bo‘yicha bir marta bajariladi, har bir xabar uchun emas
+    analytics = MessageAnalytics(detector=BurstDetector(logger))
+    dedup = DuplicateIndex(tokenizer=analytics.tokenizer)
+    dedup_task = asyncio.create_task(rebuild_dedup(dedup, logger))
+    alerts = None
+    if BOT_TOKEN and ADMIN_CHAT_ID:
+        alerts = KeywordAlerts(BotNotifier(), tokenizer=analytics.tokenizer, logger=logger)
+    else:
+        logger.info("BOT_TOKEN yoki ADMIN_CHAT_ID berilmagan: kalit so‘z ogohlantirishlari o‘chirilgan")
+
+    async def write_batch(batch: List[dict], logger: logging.Logger) -> int:
+        # Paket bir marta tokenlanadi: cluster_id saqlashdan oldin, tahlil esa saqlangandan keyin
+        tokens = analytics.tokenizer.tokenize_batch([msg.get("text") for msg in batch])
+        dedup.assign(batch, tokens)
+        inserted = await save_messages(batch, logger, on_media=media.submit)
+        # Tahlil, portlashlar va ogohlantirishlar faqat yangi yozilgan xabarlar bo‘yicha (takrorlar ikki marta sanalmaydi)
+        fresh = []
+        for index, msg in enumerate(batch):
+            key = (msg["group_id"], msg["id"])
+            if key in inserted:
+                inserted.discard(key)
+                fresh.append(index)
+        analytics.analyze_batch([batch[i] for i in fresh], [tokens[i] for i in fresh])
+        if alerts:
+            alerts.check([batch[i] for i in fresh])
+        await analytics.detector.flush(logger)
+        return len(fresh)
+
+    ingest = IngestQueue(logger, writer=write_batch)
+    ingest.start()
+    scheduler = BackfillScheduler(collect_history, ingest, logger)
+    
     tasks = []
     for account_name, info in clients.items():
         client: Client = info["client"]
@@ -246,11 +360,33 @@ async def main() -> None:
             else {"username": str(g)} for g in info["groups"]
         ]
         logger.info(f"{account_name} uchun guruhlar: {groups}")
-        tasks.append(setup_client(client, groups, logger))
+        tasks.append(setup_client(client, groups, logger, ingest, scheduler))
     
-    await asyncio.gather(*tasks)
-    logger.info("Barcha hisoblar ishga tushdi va xabarlar kutilmoqda...")
-    await idle()
+    backfill_task = None
+    snapshot_task = asyncio.create_task(analytics.run_snapshots(ANALYTICS_SNAPSHOT_INTERVAL, logger))
+    alerts_task = asyncio.create_task(alerts.run()) if alerts else None
+    try:
+        await asyncio.gather(*tasks)
+        await media.start()
+        backfill_task = asyncio.create_task(scheduler.run())
+        logger.info("Barcha hisoblar ishga tushdi va xabarlar kutilmoqda...")
+        await idle()
+    finally:
+        if backfill_task and not backfill_task.done():
+            backfill_task.cancel()
+            await asyncio.gather(backfill_task, return_exceptions=True)
+        dedup_task.cancel()
+        await asyncio.gather(dedup_task, return_exceptions=True)
+        await ingest.stop()
+        await media.stop()
+        snapshot_task.cancel()
+        await asyncio.gather(snapshot_task, return_exceptions=True)
+        await analytics.save_snapshot(logger)
+        if alerts_task:
+            alerts_task.cancel()
+            await asyncio.gather(alerts_task, return_exceptions=True)
+            await alerts.close()
+        await dispose_engines()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
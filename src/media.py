@@ -0,0 +1,219 @@
+from typing import Dict, List, Optional, Set, Tuple
+from pyrogram import Client
+from pyrogram.errors import FloodWait
+from config import MEDIA_WORKERS, MEDIA_PER_ACCOUNT, MEDIA_QUEUE_SIZE, MEDIA_MAX_ATTEMPTS, MEDIA_RETRY_DELAY, MEDIA_ROOT
+from src.database import load_pending_media, update_media, get_media_blob, save_media_blob
+from src.models import FileType, MediaStatus
+from src.monitoring import media_queue_depth
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+
+MEDIA_EXTENSIONS = {FileType.PHOTO: ".jpg"}
+
+class MediaStore:
+    """Fayllarni kalit (file_unique_id yoki kontent xeshi) bo‘yicha sharded papkalarda saqlaydi.
+
+    Bir xil fayl qaysi guruhda kelishidan qat'i nazar bir marta saqlanadi.
+    """
+
+    def __init__(self, root: str = MEDIA_ROOT):
+        self.root = root
+
+    def path_for(self, key: str, file_type: FileType) -> str:
+        """Kalit uchun fayl yo‘li: root/ab/cd/<key>.<ext> (ab/cd — kalit xeshining boshi)"""
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.root, digest[:2], digest[2:4], key + MEDIA_EXTENSIONS.get(file_type, ""))
+
+    def temp_path(self) -> str:
+        return os.path.join(self.root, "tmp", uuid.uuid4().hex)
+
+    @staticmethod
+    def content_key(path: str) -> str:
+        """Fayl mazmunining SHA-256 xeshidan kalit yasaydi"""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return f"sha256-{digest.hexdigest()}"
+
+    def adopt(self, temp_path: str, key: str, file_type: FileType) -> str:
+        """Vaqtinchalik faylni kalit yo‘liga ko‘chiradi; fayl allaqachon bo‘lsa nusxani o‘chiradi"""
+        path = self.path_for(key, file_type)
+        if os.path.exists(path):
+            os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+        return path
+
+class MediaDownloader:
+    """Media fayllarni xabarlarni saqlashdan alohida, fon worker’lar orqali yuklab oladi.
+
+    Xabar darhol "pending" media bilan saqlanadi; worker faylni yuklab olib `media`
+    yozuvini yangilaydi. Har bir hisob uchun parallel yuklashlar soni cheklangan,
+    xatolarda (jumladan indeks yoki `media` yozuvini saqlash xatosida) eksponensial kutish
+    bilan qayta uriniladi, urinishlar tugagach "failed" bo‘ladi. Fayl omborda bo‘lsa
+    (yoki shu payt yuklanayotgan bo‘lsa) qayta yuklab olinmaydi.
+    """
+
+    def __init__(
+        self,
+        clients: Dict[str, Client],
+        logger: logging.Logger,
+        workers: int = MEDIA_WORKERS,
+        per_account: int = MEDIA_PER_ACCOUNT,
+        max_size: int = MEDIA_QUEUE_SIZE,
+        max_attempts: int = MEDIA_MAX_ATTEMPTS,
+        retry_delay: float = MEDIA_RETRY_DELAY,
+        store: Optional[MediaStore] = None,
+    ):
+        self.clients = clients
+        self.logger = logger
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self._limits = {name: asyncio.Semaphore(per_account) for name in clients}
+        self._tasks: List[asyncio.Task] = []
+        # Qayta urinish kutayotgan media ID -> taymer; navbatdagi, yuklanayotgan yoki kutayotgan ID’lar
+        self._retries: Dict[int, asyncio.TimerHandle] = {}
+        self._known: Set[int] = set()
+        self._overflowed = False
+        self.store = store or MediaStore()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def submit(self, jobs: List[Dict]) -> None:
+        """Yuklab olish vazifalarini navbatga qo‘shadi; navbat to‘la bo‘lsa ular keyinroq databazadan olinadi"""
+        for index, job in enumerate(jobs):
+            try:
+                self.queue.put_nowait(job)
+            except asyncio.QueueFull:
+                # Sig‘maganlari keyingi _refill’da databazadan olinadi
+                self._known.difference_update(job["id"] for job in jobs[index:])
+                self._overflowed = True
+                break
+            self._known.add(job["id"])
+        media_queue_depth.set(self.queue.qsize())
+
+    async def _refill(self) -> None:
+        """Navbatni databazadagi "pending" media bilan to‘ldiradi (jarayonda allaqachon bor ID’lardan tashqari)"""
+        self._overflowed = False
+        jobs = await load_pending_media(self.queue.maxsize - self.queue.qsize(), exclude=self._known)
+        self.submit(jobs)
+        if jobs:
+            self.logger.info(f"{len(jobs)} ta kutilayotgan media navbatga qo‘shildi")
+
+    async def start(self) -> None:
+        await self._refill()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Worker’larni to‘xtatadi; tugallanmagan media databazada "pending" bo‘lib qoladi"""
+        for handle in self._retries.values():
+            handle.cancel()
+        self._retries.clear()
+        self._known.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _retry_later(self, job: Dict, delay: float) -> None:
+        def resubmit() -> None:
+            del self._retries[job["id"]]
+            self.submit([job])
+
+        self._retries[job["id"]] = asyncio.get_running_loop().call_later(delay, resubmit)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self.queue.get()
+            media_queue_depth.set(self.queue.qsize())
+            try:
+                await self._download(job)
+            except Exception as e:
+                self.logger.error(f"Media ID {job['id']} ni qayta ishlashda xato: {e}")
+            if job["id"] not in self._retries:
+                self._known.discard(job["id"])
+            if self._overflowed and self.queue.empty():
+                await self._refill()
+
+    async def _fetch(self, client: Client, job: Dict) -> Tuple[str, str, Optional[int]]:
+        """Faylni ombordan oladi yoki yuklab olib omborga qo‘shadi; (kalit, yo‘l, hajm) qaytaradi"""
+        key = job.get("file_unique_id")
+        if key:
+            blob = await get_media_blob(key)
+            if blob and os.path.exists(blob.file_path):
+                return blob.key, blob.file_path, blob.file_size
+            file_name = self.store.path_for(key, job["file_type"])
+        else:
+            file_name = self.store.temp_path()
+        async with self._limits[job["account_name"]]:
+            file_path = await client.download_media(job["file_id"], file_name=file_name)
+        if not key:
+            key = await asyncio.to_thread(self.store.content_key, file_path)
+            blob = await get_media_blob(key)
+            if blob and os.path.exists(blob.file_path):
+                os.remove(file_path)
+                return blob.key, blob.file_path, blob.file_size
+            file_path = await asyncio.to_thread(self.store.adopt, file_path, key, job["file_type"])
+        file_size = os.path.getsize(file_path)
+        await save_media_blob({"key": key, "file_type": job["file_type"], "file_path": file_path, "file_size": file_size}, self.logger)
+        return key, file_path, file_size
+
+    async def _fetch_shared(self, client: Client, job: Dict) -> Tuple[str, str, Optional[int]]:
+        """Bir xil fayl uchun parallel so‘rovlar bitta yuklab olishni kutadi"""
+        key = job.get("file_unique_id")
+        if not key:
+            return await self._fetch(client, job)
+        if key in self._inflight:
+            return await asyncio.shield(self._inflight[key])
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            result = await self._fetch(client, job)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _download(self, job: Dict) -> None:
+        client = self.clients.get(job["account_name"])
+        if client is None or not job.get("file_id"):
+            await update_media(job["id"], {"status": MediaStatus.FAILED, "error": "Hisob yoki file_id topilmadi"}, self.logger)
+            return
+        attempts = job.get("attempts", 0) + 1
+        delay: Optional[float] = None
+        try:
+            key, file_path, file_size = await self._fetch_shared(client, job)
+            await update_media(job["id"], {
+                "status": MediaStatus.DONE,
+                "blob_key": key,
+                "file_path": file_path,
+                "file_size": file_size,
+                "attempts": attempts,
+                "error": None,
+            }, self.logger)
+            return
+        except FloodWait as e:
+            delay, error = e.value, e
+        except Exception as e:
+            delay, error = self.retry_delay * 2 ** (attempts - 1), e
+
+        if attempts >= self.max_attempts:
+            await update_media(job["id"], {"status": MediaStatus.FAILED, "attempts": attempts, "error": str(error)}, self.logger)
+            self.logger.error(f"Media ID {job['id']} yuklab olinmadi ({attempts} urinish): {error}")
+            return
+        # Qayta urinish avval rejalashtiriladi: yozuvni yangilash xatosi vazifani yo‘qotmasin
+        self._retry_later({**job, "attempts": attempts}, delay)
+        await update_media(job["id"], {"attempts": attempts, "error": str(error)}, self.logger)
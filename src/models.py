@@ -1,5 +1,6 @@
-from sqlalchemy import BigInteger, Column, String, DateTime, ForeignKey, Integer, Boolean, Text, Enum
+from sqlalchemy import BigInteger, Column, String, DateTime, Date, Float, ForeignKey, Integer, Boolean, Text, Enum, Computed
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import relationship
 from pydantic import BaseModel, Field, validator, HttpUrl
 from typing import Optional, List
@@ -22,6 +23,11 @@ class FileType(enum.Enum):
     AUDIO = "audio"
     VOICE = "voice"
 
+class MediaStatus(enum.Enum):
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
 # SQLAlchemy modellar
 class Group(Base):
     __tablename__ = "groups"
@@ -38,6 +44,11 @@ class Group(Base):
     messages = relationship("Message", back_populates="group")
     last_saved = relationship("LastSavedMessage", uselist=False, back_populates="group")
 
+    __table_args__ = (
+        sqlalchemy.Index("idx_groups_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        sqlalchemy.Index("idx_groups_username_trgm", "username", postgresql_using="gin", postgresql_ops={"username": "gin_trgm_ops"}),
+    )
+
 class User(Base):
     __tablename__ = "users"
     id = Column(BigInteger, primary_key=True)
@@ -50,43 +61,170 @@ class User(Base):
 
     messages = relationship("Message", back_populates="user")
 
+    __table_args__ = (
+        sqlalchemy.Index("idx_users_first_name_trgm", "first_name", postgresql_using="gin", postgresql_ops={"first_name": "gin_trgm_ops"}),
+        sqlalchemy.Index("idx_users_username_trgm", "username", postgresql_using="gin", postgresql_ops={"username": "gin_trgm_ops"}),
+    )
+
 class Message(Base):
+    """Xabar; jadval `timestamp` bo‘yicha oylik bo‘limlarga ajratilgan (src/partitions.py).
+
+    Telegram ID’si faqat chat ichida takrorlanmas, bo‘lim kaliti esa har bir unique kalitga kirishi shart,
+    shuning uchun birlamchi kalit (group_id, id, timestamp).
+    """
     __tablename__ = "messages"
-    id = Column(BigInteger, primary_key=True)
-    group_id = Column(BigInteger, ForeignKey("groups.id"), nullable=False, index=True)
+    id = Column(BigInteger, nullable=False)
+    group_id = Column(BigInteger, ForeignKey("groups.id"), nullable=False)
     user_id = Column(BigInteger, ForeignKey("users.id"), nullable=True, index=True)
     account_name = Column(String)
     text = Column(Text)
     timestamp = Column(DateTime(timezone=True), nullable=False, index=True)
     url = Column(String)
+    # Deyarli bir xil xabarlar klasteri (src/dedup.py), qisqa matnlarda NULL
+    cluster_id = Column(BigInteger, index=True)
+    # To‘liq matnli qidiruv: lotinlashtirilgan "simple" tokenlar + rus tili stemmeri
+    search_vector = Column(TSVECTOR, Computed(
+        "to_tsvector('simple'::regconfig, tg_search_normalize(coalesce(text, ''))) || "
+        "to_tsvector('russian'::regconfig, coalesce(text, ''))",
+        persisted=True,
+    ))
 
     group = relationship("Group", back_populates="messages")
     user = relationship("User", back_populates="messages")
     media = relationship("Media", back_populates="message")
 
     __table_args__ = (
-        sqlalchemy.UniqueConstraint("id", "group_id", name="uq_message_id_group_id"),
+        sqlalchemy.PrimaryKeyConstraint("group_id", "id", "timestamp"),
         sqlalchemy.Index("idx_group_timestamp", "group_id", "timestamp"),
+        sqlalchemy.Index("idx_messages_search_vector", "search_vector", postgresql_using="gin"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
     )
 
 class LastSavedMessage(Base):
     __tablename__ = "last_saved_messages"
     group_id = Column(BigInteger, ForeignKey("groups.id"), primary_key=True)
-    last_message_id = Column(BigInteger, ForeignKey("messages.id"), nullable=False)
-    last_timestamp = Column(DateTime(timezone=True), nullable=False)
+    # To‘liq yig‘ilgan tarixning eng yangi xabari (Telegram ID’si)
+    last_message_id = Column(BigInteger)
+    last_timestamp = Column(DateTime(timezone=True))
+    # Tugallanmagan backfill: boshlangan nuqta va oxirgi saqlangan (eng eski) xabar
+    backfill_top_id = Column(BigInteger)
+    backfill_top_timestamp = Column(DateTime(timezone=True))
+    backfill_offset_id = Column(BigInteger)
 
     group = relationship("Group", back_populates="last_saved")
 
 class Media(Base):
     __tablename__ = "media"
     id = Column(BigInteger, primary_key=True, autoincrement=True)
-    message_id = Column(BigInteger, ForeignKey("messages.id"), nullable=False, index=True)
+    # Xabar kaliti (group_id, message_id, message_timestamp) — bo‘limlangan `messages` ga tashqi kalit
+    message_id = Column(BigInteger, nullable=False)
+    group_id = Column(BigInteger, nullable=False)
+    message_timestamp = Column(DateTime(timezone=True), nullable=False, index=True)
     file_type = Column(Enum(FileType), nullable=False)
-    file_path = Column(String, nullable=False)
+    file_path = Column(String)  # Yuklab olinmaguncha bo‘sh
     file_size = Column(BigInteger)
     uploaded_at = Column(DateTime(timezone=True), default=datetime.datetime.utcnow)
+    # Fon yuklab olish uchun ma'lumotlar
+    file_id = Column(String)
+    file_unique_id = Column(String)
+    account_name = Column(String)
+    status = Column(Enum(MediaStatus), nullable=False, default=MediaStatus.PENDING, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    blob_key = Column(String, ForeignKey("media_blobs.key"), index=True)
 
     message = relationship("Message", back_populates="media")
+    blob = relationship("MediaBlob")
+
+    __table_args__ = (
+        # Kechiktirilgan tekshiruv: bo‘limlarga ko‘chirishda xabar bir tranzaksiya ichida o‘chirilib qayta yoziladi
+        sqlalchemy.ForeignKeyConstraint(
+            ["group_id", "message_id", "message_timestamp"],
+            ["messages.group_id", "messages.id", "messages.timestamp"],
+            name="fk_media_message",
+            deferrable=True,
+            initially="DEFERRED",
+        ),
+        sqlalchemy.UniqueConstraint("group_id", "message_id", "file_unique_id", name="uq_media_message_file"),
+    )
+
+class MediaBlob(Base):
+    """Omborda bir marta saqlangan fayl; bir nechta `media` yozuvlari unga ishora qiladi"""
+    __tablename__ = "media_blobs"
+    key = Column(String, primary_key=True)  # Telegram file_unique_id yoki "sha256-..." kontent xeshi
+    file_type = Column(Enum(FileType), nullable=False)
+    file_path = Column(String, nullable=False)
+    file_size = Column(BigInteger)
+    created_at = Column(DateTime(timezone=True), default=datetime.datetime.utcnow)
+
+class DeadLetterMessage(Base):
+    """Saqlab bo‘lmagan xabarlar (xato matni bilan) — qayta ko‘rib chiqish uchun"""
+    __tablename__ = "dead_letter_messages"
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    message_id = Column(BigInteger, index=True)
+    group_id = Column(BigInteger, index=True)
+    payload = Column(JSONB, nullable=False)
+    error = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=datetime.datetime.utcnow)
+
+class GroupHourlyStats(Base):
+    """Guruhning soatlik xabarlar soni (UTC); har bir flush’da ingest tomonidan oshiriladi"""
+    __tablename__ = "group_hourly_stats"
+    group_id = Column(BigInteger, ForeignKey("groups.id"), primary_key=True)
+    hour = Column(DateTime(timezone=True), primary_key=True)
+    message_count = Column(Integer, nullable=False, default=0)
+
+class GroupDailyStats(Base):
+    """Guruhning kunlik xabarlar va faol foydalanuvchilar soni (UTC)"""
+    __tablename__ = "group_daily_stats"
+    group_id = Column(BigInteger, ForeignKey("groups.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    message_count = Column(Integer, nullable=False, default=0)
+    active_users = Column(Integer, nullable=False, default=0)
+
+class GroupDailyUser(Base):
+    """Kun davomida guruhda yozgan foydalanuvchilar — active_users’ni takrorsiz oshirish uchun"""
+    __tablename__ = "group_daily_users"
+    group_id = Column(BigInteger, ForeignKey("groups.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    user_id = Column(BigInteger, primary_key=True)
+
+class TopWordsSnapshot(Base):
+    """Sliding window bo‘yicha top so‘zlarning davriy nusxasi (group_id NULL — barcha guruhlar)"""
+    __tablename__ = "top_words_snapshots"
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    group_id = Column(BigInteger, ForeignKey("groups.id"))
+    period = Column(String, nullable=False)  # Oyna nomi: "1h", "24h", "7d"
+    taken_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    words = Column(JSONB, nullable=False)  # [[so‘z, soni], ...] kamayish tartibida
+
+    __table_args__ = (
+        sqlalchemy.Index("idx_top_words_lookup", "group_id", "period", "taken_at"),
+    )
+
+class GroupDailyWords(Base):
+    """Guruhning kunlik top so‘zlari (UTC) — butun tarix bo‘yicha `python -m src.recompute run` bilan hisoblanadi"""
+    __tablename__ = "group_daily_words"
+    group_id = Column(BigInteger, ForeignKey("groups.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    message_count = Column(Integer, nullable=False)
+    words = Column(JSONB, nullable=False)  # [[so‘z, soni], ...] kamayish tartibida
+    computed_at = Column(DateTime(timezone=True), nullable=False)
+
+class BurstEvent(Base):
+    """Guruhda so‘z (yoki term NULL bo‘lsa xabarlar oqimi) bo‘yicha aniqlangan keskin o‘sish"""
+    __tablename__ = "burst_events"
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    group_id = Column(BigInteger, ForeignKey("groups.id"), nullable=False)
+    term = Column(String)
+    count = Column(Integer, nullable=False)
+    baseline = Column(Float, nullable=False)
+    zscore = Column(Float, nullable=False)
+    detected_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (
+        sqlalchemy.Index("idx_burst_events_group_detected", "group_id", "detected_at"),
+    )
 
 # Pydantic modellar
 # class MediaPydantic(BaseModel):
@@ -150,8 +288,10 @@ from typing import Optional, List
 
 class MediaPydantic(BaseModel):
     file_type: str
-    file_path: str
+    file_path: Optional[str]
     file_size: Optional[int]
+    file_id: Optional[str]
+    file_unique_id: Optional[str]
 
     class Config:
         from_attributes = True
@@ -1,7 +1,20 @@
 # src/monitoring.py
-from prometheus_client import Counter, start_http_server
+from prometheus_client import Counter, Gauge, start_http_server
+from config import METRICS_PORT
 
 messages_processed = Counter("messages_processed", "Jami qayta ishlangan xabarlar")
+media_queue_depth = Gauge("media_queue_depth", "Yuklab olinishini kutayotgan media soni")
+backfill_progress = Gauge("backfill_progress", "Guruh tarixining yig‘ilgan ulushi (0..1)", ["account", "chat_id"])
+db_pool_checked_out = Gauge("db_pool_checked_out", "Pool’dan olingan (band) databaza ulanishlari", ["role"])
+db_pool_checkouts = Counter("db_pool_checkouts", "Pool’dan ulanish olishlar soni", ["role"])
+db_pool_connections = Counter("db_pool_connections", "Yangi ochilgan databaza ulanishlari", ["role"])
+bursts_detected = Counter("bursts_detected", "Aniqlangan portlashlar", ["kind"])
+burst_tracked_terms = Gauge("burst_tracked_terms", "Portlash detektori kuzatayotgan (guruh, so‘z) juftlari")
+alert_rules = Gauge("alert_rules", "Yuklangan kalit so‘z qoidalari")
+alert_matches = Counter("alert_matches", "Kalit so‘z mosliklari (queued, merged, debounced)", ["status"])
+alerts_sent = Counter("alerts_sent", "Admin chatga yuborilgan ogohlantirish xabarlari", ["status"])
 
-def setup_monitoring():
-    start_http_server(8001)  # Metrikalar uchun port
\ No newline at end of file
+def setup_monitoring(port: int = METRICS_PORT) -> None:
+    """Metrikalarni alohida HTTP serverda (fon oqimida) beradi; port 0 bo‘lsa o‘chirilgan"""
+    if port:
+        start_http_server(port)
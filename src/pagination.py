@@ -0,0 +1,91 @@
+from typing import Optional, Tuple
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql import Select
+from src.models import Message
+import base64
+import datetime
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+# Ro‘yxat va eksport javoblari uchun ustunlar: ORM obyektlari (identity map) o‘rniga oddiy qatorlar o‘qiladi
+MESSAGE_LIST_COLUMNS = [Message.id, Message.group_id, Message.user_id, Message.account_name, Message.text, Message.timestamp, Message.url, Message.cluster_id]
+
+def encode_cursor(timestamp: datetime.datetime, group_id: int, message_id: int) -> str:
+    """Sahifaning oxirgi xabaridan (timestamp, group_id, id) kursor yasaydi (xabar ID’si faqat guruh ichida noyob)"""
+    raw = f"{timestamp.isoformat()}|{group_id}|{message_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, int, int]:
+    """Kursorni (timestamp, group_id, id) ga qaytaradi; noto‘g‘ri bo‘lsa ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, group_id, message_id = raw.rsplit("|", 2)
+        return datetime.datetime.fromisoformat(timestamp), int(group_id), int(message_id)
+    except Exception as e:
+        raise ValueError(f"Noto‘g‘ri kursor: {cursor}") from e
+
+def filter_messages(
+    stmt: Select,
+    group_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    account_name: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+) -> Select:
+    """Xabarlar so‘roviga guruh, foydalanuvchi, hisob va vaqt oralig‘i filtrlarini qo‘shadi"""
+    if group_id is not None:
+        stmt = stmt.where(Message.group_id == group_id)
+    if user_id is not None:
+        stmt = stmt.where(Message.user_id == user_id)
+    if account_name is not None:
+        stmt = stmt.where(Message.account_name == account_name)
+    if since is not None:
+        stmt = stmt.where(Message.timestamp >= since)
+    if until is not None:
+        stmt = stmt.where(Message.timestamp < until)
+    return stmt
+
+def paginate_messages(stmt: Select, cursor: Optional[str], limit: int) -> Select:
+    """Keyset sahifalash: (timestamp, group_id, id) bo‘yicha kamayish tartibida kursordan keyingi `limit + 1` qator.
+
+    `timestamp <= :ts` sharti (group_id, timestamp) indeksida diapazon skanini beradi,
+    shuning uchun sahifa chuqurligidan qat'i nazar so‘rov vaqti o‘zgarmaydi.
+    """
+    if cursor:
+        timestamp, group_id, message_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            Message.timestamp <= timestamp,
+            or_(
+                Message.timestamp < timestamp,
+                and_(
+                    Message.timestamp == timestamp,
+                    or_(Message.group_id < group_id, and_(Message.group_id == group_id, Message.id < message_id)),
+                ),
+            ),
+        )
+    return stmt.order_by(Message.timestamp.desc(), Message.group_id.desc(), Message.id.desc()).limit(limit + 1)
+
+def next_cursor(rows: list, limit: int) -> Tuple[list, Optional[str]]:
+    """Qo‘shimcha qator bo‘lsa uni olib tashlab, keyingi sahifa kursorini qaytaradi"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.timestamp, last.group_id, last.id)
+
+async def fetch_message_page(
+    session: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    **filters,
+) -> dict:
+    """Filtrlangan xabarlarning bitta sahifasini va keyingi sahifa kursorini qaytaradi.
+
+    Elementlardagi `timestamp` datetime bo‘lib qoladi, uni orjson to‘g‘ridan-to‘g‘ri kodlaydi.
+    """
+    stmt = paginate_messages(filter_messages(select(*MESSAGE_LIST_COLUMNS), **filters), cursor, limit)
+    result = await session.execute(stmt)
+    rows, cursor = next_cursor(result.all(), limit)
+    return {"items": [row._asdict() for row in rows], "next_cursor": cursor}
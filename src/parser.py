@@ -1,5 +1,6 @@
 from typing import Dict, List, Any
 from pyrogram import Client
+from pyrogram.errors import FloodWait
 from src.models import MessagePydantic, GroupPydantic, UserPydantic
 import logging
 import asyncio
@@ -11,78 +12,85 @@ async def fetch_messages(clients: Dict[str, Dict[str, Any]], message_buffer: Lis
         groups: List[str] = info["groups"]
         
         for group in groups:
-            logger.info(f"{account_name} uchun {group} guruhidan xabarlar yig‘ilmoqda...")
-            try:
-                chat = await client.get_chat(group)
-                group_data = {
-                    "id": chat.id,
-                    "name": chat.title or "Noma'lum guruh",
-                    "username": chat.username,
-                    "bio": chat.description,
-                    "member_count": chat.members_count,
-                    "created_at": chat.date,
-                    "profile_photo": None
-                }
-                GroupPydantic(**group_data)
-
-                async for message in client.get_chat_history(chat.id, limit=batch_size):
-                    try:
-                        user_data = None
-                        if message.from_user:
-                            user_data = {
-                                "id": message.from_user.id,
-                                "first_name": message.from_user.first_name,
-                                "username": message.from_user.username,
-                                "profile_photo": None,
-                                "last_seen": message.from_user.last_seen if hasattr(message.from_user, "last_seen") else None,
-                                "is_bot": message.from_user.is_bot
+            while True:
+                logger.info(f"{account_name} uchun {group} guruhidan xabarlar yig‘ilmoqda...")
+                try:
+                    chat = await client.get_chat(group)
+                    group_data = {
+                        "id": chat.id,
+                        "name": chat.title or "Noma'lum guruh",
+                        "username": chat.username,
+                        "bio": chat.description,
+                        "member_count": chat.members_count,
+                        "created_at": chat.date,
+                        "profile_photo": None
+                    }
+                    GroupPydantic(**group_data)
+
+                    async for message in client.get_chat_history(chat.id, limit=batch_size):
+                        try:
+                            user_data = None
+                            if message.from_user:
+                                user_data = {
+                                    "id": message.from_user.id,
+                                    "first_name": message.from_user.first_name,
+                                    "username": message.from_user.username,
+                                    "profile_photo": None,
+                                    "last_seen": message.from_user.last_seen if hasattr(message.from_user, "last_seen") else None,
+                                    "is_bot": message.from_user.is_bot
+                                }
+                                UserPydantic(**user_data)
+
+                            message_data = {
+                                "id": message.id,
+                                "group_id": chat.id,
+                                "user_id": message.from_user.id if message.from_user else None,
+                                "account_name": account_name,
+                                "text": message.text or "Bo‘sh xabar",
+                                "timestamp": message.date,
+                                "url": f"https://t.me/c/{str(chat.id)[4:]}/{message.id}",
+                                "group_name": group_data["name"],
+                                "group_username": group_data["username"],
+                                "group_bio": group_data["bio"],
+                                "group_member_count": group_data["member_count"],
+                                "user_first_name": user_data["first_name"] if user_data else None,
+                                "user_username": user_data["username"] if user_data else None,
+                                "user_profile_photo": user_data["profile_photo"] if user_data else None,
+                                "media": []
                             }
-                            UserPydantic(**user_data)
-
-                        message_data = {
-                            "id": message.id,
-                            "group_id": chat.id,
-                            "user_id": message.from_user.id if message.from_user else None,
-                            "account_name": account_name,
-                            "text": message.text or "Bo‘sh xabar",
-                            "timestamp": message.date,
-                            "url": f"https://t.me/c/{str(chat.id)[4:]}/{message.id}",
-                            "group_name": group_data["name"],
-                            "group_username": group_data["username"],
-                            "group_bio": group_data["bio"],
-                            "group_member_count": group_data["member_count"],
-                            "user_first_name": user_data["first_name"] if user_data else None,
-                            "user_username": user_data["username"] if user_data else None,
-                            "user_profile_photo": user_data["profile_photo"] if user_data else None,
-                            "media": []
-                        }
-
-                        if message.photo:
-                            file_path = await client.download_media(message.photo, file_name=f"static/media/photos/{message.id}.jpg")
-                            message_data["media"].append({
-                                "file_type": "photo",
-                                "file_path": file_path,
-                                "file_size": message.photo.file_size
-                            })
-
-                        MessagePydantic(**message_data)
-                        message_buffer.append(message_data)
-                        logger.info(f"Xabar ID: {message_data['id']}, Matn: {message_data['text'][:50]}... saqlandi")
-
-                        if len(message_buffer) >= batch_size:
-                            await save_messages(message_buffer, logger)
-                            message_buffer.clear()
-
-                    except ValidationError as e:
-                        logger.error(f"Xabar ID {message.id} validatsiyadan o‘tmadi: {e}")
-                    except Exception as e:
-                        logger.error(f"Xabar ID {message.id} ni qayta ishlashda xato: {e}")
-
-                await asyncio.sleep(0.5)  # API limitlaridan qochish
-
-            except Exception as e:
-                logger.error(f"{group} guruhida umumiy xato: {e}")
-                await asyncio.sleep(1)
+
+                            if message.photo:
+                                # "pending" holatida saqlanadi, MediaDownloader keyinroq yuklab oladi
+                                message_data["media"].append({
+                                    "file_type": "photo",
+                                    "file_path": None,
+                                    "file_size": message.photo.file_size,
+                                    "file_id": message.photo.file_id,
+                                    "file_unique_id": message.photo.file_unique_id
+                                })
+
+                            MessagePydantic(**message_data)
+                            message_buffer.append(message_data)
+                            logger.info(f"Xabar ID: {message_data['id']}, Matn: {message_data['text'][:50]}... saqlandi")
+
+                            if len(message_buffer) >= batch_size:
+                                await save_messages(message_buffer, logger)
+                                message_buffer.clear()
+
+                        except ValidationError as e:
+                            logger.error(f"Xabar ID {message.id} validatsiyadan o‘tmadi: {e}")
+                        except Exception as e:
+                            logger.error(f"Xabar ID {message.id} ni qayta ishlashda xato: {e}")
+
+                except FloodWait as e:
+                    # Qat'iy pauza o‘rniga Telegram so‘ragan muddatcha kutamiz, so‘ng shu guruh qayta yig‘iladi
+                    logger.warning(f"{account_name}: FloodWait {e.value} s, {group} guruhi qayta yig‘iladi")
+                    await asyncio.sleep(e.value)
+                    continue
+                except Exception as e:
+                    logger.error(f"{group} guruhida umumiy xato: {e}")
+                    await asyncio.sleep(1)
+                break
 
 
 
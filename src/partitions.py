@@ -0,0 +1,186 @@
+"""`messages` jadvalining oylik bo‘limlari (PARTITION BY RANGE (timestamp), oylar UTC bo‘yicha).
+
+Bo‘limi yo‘q oy xabarlari (masalan, yangi guruhning eski tarixi) messages_default ga tushadi, shuning uchun
+yozish hech qachon to‘xtamaydi. Texnik xizmat ularni o‘z oyining bo‘limiga ko‘chiradi, kelgusi oylar uchun
+bo‘limlar yaratadi va saqlash muddatidan eski bo‘limlarni ajratadi (DETACH) — katta DELETE va VACUUM o‘rniga.
+Rollup va tahlil jadvallari ajratilgan oylar uchun ham saqlanib qoladi.
+
+Ishga tushirish (masalan, cron orqali kuniga bir marta):
+    python -m src.partitions maintain [--ahead 3] [--retain-months 24] [--drop]
+    python -m src.partitions list
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from typing import List, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import PARTITION_MONTHS_AHEAD, PARTITION_RETAIN_MONTHS
+from src.db import get_sessionmaker, dispose_engines
+from src.models import Message
+from logger import setup_logger
+import argparse
+import asyncio
+import datetime
+import logging
+import re
+
+PARENT = Message.__tablename__
+DEFAULT_PARTITION = f"{PARENT}_default"
+_NAME_RE = re.compile(rf"^{PARENT}_y(\d{{4}})m(\d{{2}})$")
+# Generated ustunlar (search_vector) ko‘chirishda qayta hisoblanadi
+COLUMNS = ", ".join(f'"{column.name}"' for column in Message.__table__.columns if column.computed is None)
+
+def month_of(value: datetime.datetime) -> datetime.date:
+    value = value.astimezone(datetime.timezone.utc) if value.tzinfo else value
+    return datetime.date(value.year, value.month, 1)
+
+def add_months(month: datetime.date, count: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: datetime.date) -> str:
+    return f"{PARENT}_y{month.year}m{month.month:02d}"
+
+def partition_bounds(month: datetime.date) -> Tuple[str, str]:
+    """Bo‘lim chegaralari SQL literallari sifatida: [oy boshi, keyingi oy boshi) UTC"""
+    def literal(day: datetime.date) -> str:
+        return f"'{day.isoformat()} 00:00:00+00'"
+    return literal(month), literal(add_months(month, 1))
+
+async def list_partitions(session: AsyncSession) -> List[str]:
+    result = await session.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        f"WHERE i.inhparent = '{PARENT}'::regclass ORDER BY c.relname"
+    ))
+    return list(result.scalars())
+
+def partition_months(names: List[str]) -> List[datetime.date]:
+    months = []
+    for name in names:
+        match = _NAME_RE.match(name)
+        if match:
+            months.append(datetime.date(int(match.group(1)), int(match.group(2)), 1))
+    return months
+
+async def _create_partition(session: AsyncSession, month: datetime.date) -> None:
+    lower, upper = partition_bounds(month)
+    await session.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {PARENT} FOR VALUES FROM ({lower}) TO ({upper})"
+    ))
+
+async def _split_default(session: AsyncSession, month: datetime.date) -> int:
+    """Default bo‘limdagi oy xabarlarini yangi bo‘limga ko‘chirib, uni ulaydi; ko‘chirilgan qatorlar soni.
+
+    media tashqi kaliti kechiktirilgan, shuning uchun xabarlarni o‘chirib qayta yozish commit’da tekshiriladi.
+    """
+    name = partition_name(month)
+    lower, upper = partition_bounds(month)
+    await session.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING GENERATED)"))
+    result = await session.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE \"timestamp\" >= {lower} AND \"timestamp\" < {upper} "
+        f"RETURNING {COLUMNS}) INSERT INTO {name} ({COLUMNS}) SELECT {COLUMNS} FROM moved"
+    ))
+    await session.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ({lower}) TO ({upper})"))
+    return result.rowcount
+
+async def _purge_default(session: AsyncSession, month: datetime.date) -> int:
+    """Saqlash muddatidan eski oy xabarlari default bo‘limga tushgan bo‘lsa (eski tarix yig‘ilganda) o‘chiriladi"""
+    lower, upper = partition_bounds(month)
+    await session.execute(text(f"DELETE FROM media WHERE message_timestamp >= {lower} AND message_timestamp < {upper}"))
+    result = await session.execute(text(
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE \"timestamp\" >= {lower} AND \"timestamp\" < {upper}"
+    ))
+    return result.rowcount
+
+async def _detach_partition(session: AsyncSession, month: datetime.date, drop: bool) -> None:
+    """Bo‘limni ajratadi; unga ishora qiluvchi media yozuvlari oldin o‘chiriladi (fayllar omborda qoladi)"""
+    name = partition_name(month)
+    lower, upper = partition_bounds(month)
+    await session.execute(text(f"DELETE FROM media WHERE message_timestamp >= {lower} AND message_timestamp < {upper}"))
+    await session.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+    if drop:
+        await session.execute(text(f"DROP TABLE {name}"))
+
+async def _run(step, *args):
+    """Har bir qadam alohida tranzaksiyada: qulflar qisqa ushlanadi, xato bo‘lsa faqat shu qadam bekor qilinadi"""
+    async with get_sessionmaker("ingest")() as session:
+        try:
+            result = await step(session, *args)
+            await session.commit()
+            return result
+        except Exception:
+            await session.rollback()
+            raise
+
+async def ensure_future_partitions(logger: logging.Logger, ahead: int = PARTITION_MONTHS_AHEAD) -> None:
+    """Joriy va keyingi `ahead` oy bo‘limlarini yaratadi (mavjud bo‘lsa o‘tkazib yuboriladi)"""
+    current = month_of(datetime.datetime.now(datetime.timezone.utc))
+    for offset in range(ahead + 1):
+        month = add_months(current, offset)
+        try:
+            await _run(_create_partition, month)
+        except Exception as e:
+            # Odatda default bo‘limda shu oy xabarlari bor: maintain ularni ko‘chirib, bo‘limni yaratadi
+            logger.warning(f"{partition_name(month)} bo‘limini yaratib bo‘lmadi: {e}")
+
+async def maintain(
+    logger: logging.Logger,
+    ahead: int = PARTITION_MONTHS_AHEAD,
+    retain_months: int = PARTITION_RETAIN_MONTHS,
+    drop: bool = False,
+) -> None:
+    current = month_of(datetime.datetime.now(datetime.timezone.utc))
+    cutoff = add_months(current, -retain_months) if retain_months else None
+
+    # 1. Default bo‘limga tushgan oylarni o‘z bo‘limlariga ko‘chirish (muddati o‘tganlarini o‘chirish)
+    async with get_sessionmaker("ingest")() as session:
+        result = await session.execute(text(
+            f"SELECT DISTINCT date_trunc('month', \"timestamp\" AT TIME ZONE 'UTC') FROM {DEFAULT_PARTITION}"
+        ))
+        stray = sorted(month_of(value) for value in result.scalars())
+    for month in stray:
+        if cutoff and month < cutoff:
+            deleted = await _run(_purge_default, month)
+            logger.info(f"Default bo‘limdan saqlash muddati o‘tgan {deleted} ta xabar o‘chirildi ({month:%Y-%m})")
+            continue
+        moved = await _run(_split_default, month)
+        logger.info(f"{partition_name(month)} bo‘limi yaratildi: default’dan {moved} ta xabar ko‘chirildi")
+
+    # 2. Kelgusi oylar
+    await ensure_future_partitions(logger, ahead)
+
+    # 3. Saqlash muddatidan eski bo‘limlarni ajratish (ro‘yxat nomi bo‘yicha, ya'ni xronologik tartibda)
+    if cutoff:
+        async with get_sessionmaker("ingest")() as session:
+            months = partition_months(await list_partitions(session))
+        for month in months:
+            if month >= cutoff:
+                break
+            await _run(_detach_partition, month, drop)
+            logger.info(f"{partition_name(month)} bo‘limi ajratildi{' va o‘chirildi' if drop else ''}")
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="messages jadvalining oylik bo‘limlari")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("maintain", help="Default’ni bo‘lish, kelgusi oylarni yaratish, eski oylarni ajratish")
+    run.add_argument("--ahead", type=int, default=PARTITION_MONTHS_AHEAD, help="Oldindan yaratiladigan oylar")
+    run.add_argument("--retain-months", type=int, default=PARTITION_RETAIN_MONTHS, help="Saqlanadigan oylar (0 — hammasi)")
+    run.add_argument("--drop", action="store_true", help="Ajratilgan bo‘limlarni o‘chirish (aks holda alohida jadval bo‘lib qoladi)")
+    commands.add_parser("list", help="Bo‘limlar ro‘yxati")
+    args = parser.parse_args()
+
+    logger = setup_logger()
+    try:
+        if args.command == "maintain":
+            await maintain(logger, args.ahead, args.retain_months, args.drop)
+        elif args.command == "list":
+            async with get_sessionmaker("ingest")() as session:
+                print("\n".join(await list_partitions(session)))
+    finally:
+        await dispose_engines()
+
+if __name__ == "__main__":
+    asyncio.run(main())
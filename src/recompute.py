@@ -0,0 +1,287 @@
+"""Tahlilni butun tarix bo‘yicha qayta hisoblash (tokenizer o‘zgarganda yoki yangi ko‘rsatkich qo‘shilganda).
+
+`messages` guruh va kunlar oralig‘i bo‘yicha vazifalarga bo‘linadi (hajmi rollup jadvalidan olinadi).
+Har bir vazifa server-side cursor orqali bo‘laklab o‘qiladi, tokenlash va sanash ProcessPoolExecutor’da
+bajariladi, natijalar kunlar bo‘yicha birlashtirilib group_daily_words jadvaliga yoziladi.
+
+Ishga tushirish: python -m src.recompute run [--since YYYY-MM-DD] [--until YYYY-MM-DD] [--group-id ID] [--fresh]
+Uzilib qolgan ish xuddi shu buyruq bilan davom etadi: shu ishda hisoblangan kunlar o‘tkazib yuboriladi.
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import Date, and_, cast, func, literal_column, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from config import (
+    ANALYTICS_TOP_N, RECOMPUTE_WORKERS, RECOMPUTE_READERS, RECOMPUTE_CHUNK_ROWS,
+    RECOMPUTE_PARTITION_ROWS, RECOMPUTE_REPORT_INTERVAL, RECOMPUTE_STATE_FILE, STREAM_BROKER,
+)
+from src.db import get_sessionmaker, dispose_engines
+from src.models import Message, GroupDailyStats, GroupDailyWords
+from src.tokenizer import Tokenizer
+from src.analytics import EMPTY_TEXT
+from src.response_cache import group_versions, invalidation_notifications
+from src.stream import notify_statement
+from logger import setup_logger
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import multiprocessing
+import time
+
+# Vazifa: (guruh, hisoblanadigan kunlar, rollup bo‘yicha xabarlar soni)
+Partition = Tuple[int, List[datetime.date], int]
+
+_tokenizer: Optional[Tokenizer] = None
+
+def _init_worker() -> None:
+    global _tokenizer
+    _tokenizer = Tokenizer()
+
+def count_words(days: List[datetime.date], texts: List[Optional[str]]) -> Dict[datetime.date, list]:
+    """Worker protsessida bajariladi: kun -> [xabarlar soni, so‘zlar hisobi]"""
+    result: Dict[datetime.date, list] = {}
+    tokens = _tokenizer.tokenize_batch([None if text == EMPTY_TEXT else text for text in texts])
+    for day, msg_tokens in zip(days, tokens):
+        entry = result.get(day)
+        if entry is None:
+            entry = result[day] = [0, Counter()]
+        entry[0] += 1
+        entry[1].update(msg_tokens)
+    return result
+
+def _load_started_at(path: str) -> Optional[datetime.datetime]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return datetime.datetime.fromisoformat(json.load(f)["started_at"])
+    except FileNotFoundError:
+        return None
+
+def _save_started_at(path: str, started_at: datetime.datetime) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"started_at": started_at.isoformat()}, f)
+
+async def plan_partitions(
+    session: AsyncSession,
+    started_at: datetime.datetime,
+    since: Optional[datetime.date] = None,
+    until: Optional[datetime.date] = None,
+    group_id: Optional[int] = None,
+    max_rows: int = RECOMPUTE_PARTITION_ROWS,
+) -> List[Partition]:
+    """Shu ishda (`started_at` dan keyin) hali hisoblanmagan kunlarni guruh bo‘yicha ketma-ket vazifalarga yig‘adi"""
+    stmt = (
+        select(GroupDailyStats.group_id, GroupDailyStats.day, GroupDailyStats.message_count)
+        .outerjoin(
+            GroupDailyWords,
+            and_(GroupDailyWords.group_id == GroupDailyStats.group_id, GroupDailyWords.day == GroupDailyStats.day),
+        )
+        .where(or_(GroupDailyWords.computed_at.is_(None), GroupDailyWords.computed_at < started_at))
+        .order_by(GroupDailyStats.group_id, GroupDailyStats.day)
+    )
+    if since is not None:
+        stmt = stmt.where(GroupDailyStats.day >= since)
+    if until is not None:
+        stmt = stmt.where(GroupDailyStats.day <= until)
+    if group_id is not None:
+        stmt = stmt.where(GroupDailyStats.group_id == group_id)
+
+    partitions: List[Partition] = []
+    for row in await session.execute(stmt):
+        if partitions:
+            last_group, days, rows = partitions[-1]
+            if last_group == row.group_id and rows + row.message_count <= max_rows:
+                days.append(row.day)
+                partitions[-1] = (last_group, days, rows + row.message_count)
+                continue
+        partitions.append((row.group_id, [row.day], row.message_count))
+    return partitions
+
+class RecomputeJob:
+    """Vazifalarni `readers` ta parallel o‘quvchi orqali o‘qib, tokenlashni `workers` ta protsessga tarqatadi.
+
+    Bir vaqtda ko‘pi bilan workers * 2 bo‘lak navbatda turadi, shuning uchun o‘qish hisoblashdan
+    o‘zib ketmaydi va xotira cheklangan. Har bir vazifa natijasi alohida tranzaksiyada yoziladi.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        workers: int = RECOMPUTE_WORKERS,
+        readers: int = RECOMPUTE_READERS,
+        chunk_rows: int = RECOMPUTE_CHUNK_ROWS,
+    ):
+        self.logger = logger
+        self.workers = workers
+        self.readers = readers
+        self.chunk_rows = chunk_rows
+        self.sessions = get_sessionmaker("ingest")
+        self.total_partitions = self.done_partitions = 0
+        self.total_rows = self.done_rows = 0
+
+    async def run(self, partitions: List[Partition]) -> None:
+        self.total_partitions = len(partitions)
+        self.total_rows = sum(rows for _, _, rows in partitions)
+        queue: asyncio.Queue = asyncio.Queue()
+        for partition in partitions:
+            queue.put_nowait(partition)
+
+        # spawn: worker’lar ota jarayonning event loop, ulanishlar va log oqimini meros olmaydi
+        pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker)
+        slots = asyncio.Semaphore(self.workers * 2)
+        started = time.monotonic()
+        reporter = asyncio.create_task(self._report(started))
+        readers = [asyncio.create_task(self._reader(queue, pool, slots)) for _ in range(self.readers)]
+        try:
+            await asyncio.gather(*readers)
+        finally:
+            for task in readers:
+                task.cancel()
+            reporter.cancel()
+            await asyncio.gather(*readers, reporter, return_exceptions=True)
+            pool.shutdown(cancel_futures=True)
+        self._log_progress(started)
+
+    async def _reader(self, queue: asyncio.Queue, pool: ProcessPoolExecutor, slots: asyncio.Semaphore) -> None:
+        while not queue.empty():
+            await self._process(queue.get_nowait(), pool, slots)
+
+    async def _process(self, partition: Partition, pool: ProcessPoolExecutor, slots: asyncio.Semaphore) -> None:
+        group_id, days, _ = partition
+        loop = asyncio.get_running_loop()
+        utc = datetime.timezone.utc
+        day = cast(func.timezone(literal_column("'UTC'"), Message.timestamp), Date)
+        stmt = select(day.label("day"), Message.text).where(
+            Message.group_id == group_id,
+            Message.timestamp >= datetime.datetime.combine(days[0], datetime.time(), utc),
+            Message.timestamp < datetime.datetime.combine(days[-1] + datetime.timedelta(days=1), datetime.time(), utc),
+        )
+
+        futures = []
+        async with self.sessions() as session:
+            result = await session.stream(stmt.execution_options(yield_per=self.chunk_rows))
+            async for rows in result.partitions():
+                await slots.acquire()
+                future = loop.run_in_executor(pool, count_words, [row.day for row in rows], [row.text for row in rows])
+                future.add_done_callback(lambda _, size=len(rows): self._chunk_done(slots, size))
+                futures.append(future)
+
+        merged: Dict[datetime.date, list] = {}
+        for partial in await asyncio.gather(*futures):
+            for key, (count, words) in partial.items():
+                entry = merged.setdefault(key, [0, Counter()])
+                entry[0] += count
+                entry[1].update(words)
+        await self._save(group_id, days, merged)
+        self.done_partitions += 1
+
+    def _chunk_done(self, slots: asyncio.Semaphore, size: int) -> None:
+        slots.release()
+        self.done_rows += size
+
+    async def _save(self, group_id: int, days: List[datetime.date], merged: Dict[datetime.date, list]) -> None:
+        """Vazifa kunlarini yozadi; xabari qolmagan kun ham yoziladi, shunda davom ettirishda qayta o‘qilmaydi"""
+        computed_at = datetime.datetime.now(datetime.timezone.utc)
+        values = []
+        for day in days:
+            count, words = merged.get(day, (0, Counter()))
+            values.append({
+                "group_id": group_id,
+                "day": day,
+                "message_count": count,
+                "words": [[word, n] for word, n in words.most_common(ANALYTICS_TOP_N)],
+                "computed_at": computed_at,
+            })
+        stmt = pg_insert(GroupDailyWords).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[GroupDailyWords.group_id, GroupDailyWords.day],
+            set_={
+                "message_count": stmt.excluded.message_count,
+                "words": stmt.excluded.words,
+                "computed_at": stmt.excluded.computed_at,
+            },
+        )
+        async with self.sessions() as session:
+            try:
+                await session.execute(stmt)
+                if STREAM_BROKER == "postgres":
+                    # API keshi guruhning eski natijalarini bermasligi uchun (commit bilan birga yetkaziladi)
+                    await session.execute(notify_statement(invalidation_notifications({group_id})))
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+        if STREAM_BROKER == "local":
+            group_versions.bump({group_id})
+
+    async def _report(self, started: float) -> None:
+        while True:
+            await asyncio.sleep(RECOMPUTE_REPORT_INTERVAL)
+            self._log_progress(started)
+
+    def _log_progress(self, started: float) -> None:
+        elapsed = time.monotonic() - started
+        rate = self.done_rows / elapsed if elapsed else 0.0
+        percent = 100 * self.done_rows / self.total_rows if self.total_rows else 100.0
+        left = f"{max(self.total_rows - self.done_rows, 0) / rate / 60:.1f} daq" if rate else "noma'lum"
+        self.logger.info(
+            f"Qayta hisoblash: {self.done_partitions}/{self.total_partitions} vazifa, "
+            f"{self.done_rows}/{self.total_rows} xabar ({percent:.1f}%), {rate:.0f} xabar/s, qolgan ~{left}"
+        )
+
+async def recompute(
+    logger: logging.Logger,
+    since: Optional[datetime.date] = None,
+    until: Optional[datetime.date] = None,
+    group_id: Optional[int] = None,
+    fresh: bool = False,
+    workers: int = RECOMPUTE_WORKERS,
+    readers: int = RECOMPUTE_READERS,
+    state_file: str = RECOMPUTE_STATE_FILE,
+) -> None:
+    """Kunlik top so‘zlarni qayta hisoblaydi; holat fayli bo‘lsa (va `fresh` bo‘lmasa) oldingi ishni davom ettiradi"""
+    started_at = None if fresh else _load_started_at(state_file)
+    if started_at is None:
+        started_at = datetime.datetime.now(datetime.timezone.utc)
+        _save_started_at(state_file, started_at)
+    else:
+        logger.info(f"{started_at.isoformat()} da boshlangan qayta hisoblash davom ettirilmoqda")
+
+    async with get_sessionmaker("ingest")() as session:
+        partitions = await plan_partitions(session, started_at, since, until, group_id)
+    logger.info(f"Qayta hisoblash: {len(partitions)} ta vazifa, {workers} ta protsess, {readers} ta o‘quvchi")
+    if partitions:
+        await RecomputeJob(logger, workers, readers).run(partitions)
+    os.remove(state_file)
+    logger.info("Qayta hisoblash tugadi")
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Tahlilni butun tarix bo‘yicha qayta hisoblash")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Kunlik top so‘zlarni qayta hisoblash (uzilgan ishni davom ettiradi)")
+    run.add_argument("--since", type=datetime.date.fromisoformat, help="Boshlanish kuni (UTC), YYYY-MM-DD")
+    run.add_argument("--until", type=datetime.date.fromisoformat, help="Oxirgi kun (UTC), YYYY-MM-DD")
+    run.add_argument("--group-id", type=int, help="Faqat bitta guruh uchun")
+    run.add_argument("--fresh", action="store_true", help="Oldingi uzilgan ishni e'tiborsiz qoldirib, boshidan boshlash")
+    run.add_argument("--workers", type=int, default=RECOMPUTE_WORKERS)
+    run.add_argument("--readers", type=int, default=RECOMPUTE_READERS)
+    args = parser.parse_args()
+
+    logger = setup_logger()
+    try:
+        if args.command == "run":
+            await recompute(logger, args.since, args.until, args.group_id, args.fresh, args.workers, args.readers)
+    finally:
+        await dispose_engines()
+
+if __name__ == "__main__":
+    asyncio.run(main())
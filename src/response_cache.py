@@ -0,0 +1,133 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+from fastapi import Request, Response
+from config import RESPONSE_CACHE_SIZE, STREAM_BROKER
+from src.stream import listen
+import asyncio
+import hashlib
+import logging
+import orjson
+import time
+
+ALL_GROUPS = "all"  # Guruh filtri bo‘lmagan so‘rovlar uchun umumiy versiya
+CACHE_CHANNEL = "tg_cache"
+GROUP_IDS_PER_PAYLOAD = 400  # NOTIFY payload 8000 baytdan oshmasligi kerak
+
+def invalidation_notifications(group_ids: Iterable[Any]) -> List[Tuple[str, str]]:
+    """O‘zgargan guruhlar uchun (kanal, payload) juftlari: vergul bilan ajratilgan ID’lar"""
+    ids = sorted({str(group_id) for group_id in group_ids})
+    return [
+        (CACHE_CHANNEL, ",".join(ids[start:start + GROUP_IDS_PER_PAYLOAD]))
+        for start in range(0, len(ids), GROUP_IDS_PER_PAYLOAD)
+    ]
+
+class GroupVersions:
+    """Har bir guruh ma'lumotining versiyasi; API jarayoni xotirasida, o‘qish databazaga murojaat qilmaydi.
+
+    Ingest va recompute yozuv tranzaksiyasida CACHE_CHANNEL ga guruh ID’larini NOTIFY qiladi, API shu kanalni
+    tinglab versiyalarni oshiradi. Tinglovchi ulanmagan paytda versiya noma'lum (None) va kesh ishlatilmaydi;
+    qayta ulanganda barcha versiyalar yangilanadi, chunki uzilish paytidagi bildirishnomalar yo‘qolgan bo‘ladi.
+    "local" rejimda (ingest va API bitta jarayonda) `bump` to‘g‘ridan-to‘g‘ri chaqiriladi.
+    """
+
+    def __init__(self, broker: str = STREAM_BROKER):
+        self.broker = broker
+        self._versions: Dict[str, int] = {}
+        self._epoch = time.time_ns()
+        self.synced = broker == "local"
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, key: Any) -> Optional[int]:
+        if not self.synced:
+            return None
+        return self._versions.get(str(key), self._epoch)
+
+    def bump(self, keys: Iterable[Any]) -> None:
+        """Guruhlar versiyasini oshiradi; kalitlar orasida ALL_GROUPS bo‘lsa barcha guruhlar eskiradi"""
+        version = time.time_ns()
+        keys = {str(key) for key in keys}
+        if ALL_GROUPS in keys:
+            self._versions.clear()
+            self._epoch = version
+            return
+        for key in keys | {ALL_GROUPS}:
+            self._versions[key] = version
+
+    def _on_connect(self) -> None:
+        self._versions.clear()
+        self._epoch = time.time_ns()
+        self.synced = True
+
+    def _on_disconnect(self) -> None:
+        self.synced = False
+
+    def start(self, logger: Optional[logging.Logger] = None) -> None:
+        """API ishga tushganda CACHE_CHANNEL ni tinglashni boshlaydi ("postgres" rejimida)"""
+        if self.broker != "postgres" or self._task is not None:
+            return
+        self._task = asyncio.create_task(listen(
+            CACHE_CHANNEL,
+            lambda payload: self.bump(payload.split(",")),
+            logger or logging.getLogger(__name__),
+            on_connect=self._on_connect,
+            on_disconnect=self._on_disconnect,
+        ))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+class ResponseCache:
+    """Normallashtirilgan so‘rov bo‘yicha JSON javoblarni saqlaydigan LRU kesh (ETag bilan)"""
+
+    def __init__(self, versions: GroupVersions, max_size: int = RESPONSE_CACHE_SIZE):
+        self.versions = versions
+        self.max_size = max_size
+        self._items: "OrderedDict[Hashable, Tuple[int, str, bytes]]" = OrderedDict()
+
+    @staticmethod
+    def key_for(request: Request) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+        """Yo‘l va tartiblangan query parametrlaridan kalit yasaydi (parametrlar tartibi ahamiyatsiz)"""
+        return request.url.path, tuple(sorted(request.query_params.multi_items()))
+
+    @staticmethod
+    def etag_for(key: Hashable, version: int) -> str:
+        return '"' + hashlib.blake2b(repr((key, version)).encode(), digest_size=12).hexdigest() + '"'
+
+    async def respond(
+        self,
+        request: Request,
+        group_id: Optional[int],
+        produce: Callable[[], Awaitable[Any]],
+        encode: Callable[[Any], bytes] = orjson.dumps,
+        media_type: str = "application/json",
+    ) -> Response:
+        """Ma'lumot o‘zgarmagan bo‘lsa databazaga murojaat qilmasdan 304 yoki keshdagi javobni qaytaradi.
+
+        Versiyalar kuzatilmayotgan paytda (tinglovchi ulanmagan) javob har safar yangidan hisoblanadi.
+        """
+        version = self.versions.get(group_id if group_id is not None else ALL_GROUPS)
+        if version is None:
+            return Response(content=encode(await produce()), media_type=media_type, headers={"Cache-Control": "no-cache"})
+        key = self.key_for(request)
+        etag = self.etag_for(key, version)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+
+        cached = self._items.get(key)
+        if cached and cached[0] == version:
+            self._items.move_to_end(key)
+            return Response(content=cached[2], media_type=media_type, headers=headers)
+
+        body = encode(await produce())
+        self._items[key] = (version, etag, body)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+        return Response(content=body, media_type=media_type, headers=headers)
+
+group_versions = GroupVersions()
+response_cache = ResponseCache(group_versions)
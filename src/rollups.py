@@ -0,0 +1,177 @@
+"""Guruh faolligi statistikasi uchun rollup jadvallari.
+
+Ingest har bir flush’da faqat yangi qo‘shilgan xabarlar bo‘yicha hisoblagichlarni oshiradi,
+shuning uchun grafiklar `messages` jadvali hajmiga bog‘liq emas.
+
+Qayta hisoblash: python -m src.rollups rebuild [--group-id ID]
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import Date, cast, delete, func, literal_column, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from config import STREAM_BROKER
+from src.db import get_sessionmaker, dispose_engines
+from src.models import Message, GroupHourlyStats, GroupDailyStats, GroupDailyUser
+from src.response_cache import ALL_GROUPS, group_versions, invalidation_notifications
+from src.stream import notify_statement
+from logger import setup_logger
+import argparse
+import asyncio
+import datetime
+import logging
+
+GRANULARITIES = {"hour": GroupHourlyStats, "day": GroupDailyStats}
+DEFAULT_RANGE = {"hour": datetime.timedelta(days=7), "day": datetime.timedelta(days=90)}
+ROLLUP_TABLES = [GroupHourlyStats, GroupDailyStats, GroupDailyUser]
+
+def _buckets(timestamp: datetime.datetime) -> Tuple[datetime.datetime, datetime.date]:
+    """Xabar vaqtining UTC bo‘yicha soat va kun bo‘lagi"""
+    timestamp = timestamp.astimezone(datetime.timezone.utc)
+    return timestamp.replace(minute=0, second=0, microsecond=0), timestamp.date()
+
+async def update_rollups(session: AsyncSession, inserted: Iterable) -> None:
+    """Yangi yozilgan xabarlar (group_id, user_id, timestamp) bo‘yicha rollup’larni upsert qiladi.
+
+    Xabarlar bilan bir tranzaksiyada chaqiriladi; takroriy (ON CONFLICT bilan tashlangan) xabarlar
+    bu yerga kelmaydi, shuning uchun hisoblagichlar ikki marta oshmaydi.
+    """
+    hourly, daily, users = Counter(), Counter(), set()
+    for group_id, user_id, timestamp in inserted:
+        hour, day = _buckets(timestamp)
+        hourly[(group_id, hour)] += 1
+        daily[(group_id, day)] += 1
+        if user_id is not None:
+            users.add((group_id, day, user_id))
+    if not hourly:
+        return
+
+    # Kun uchun yangi foydalanuvchilar: faqat haqiqatan qo‘shilgan qatorlar active_users’ni oshiradi
+    new_users = Counter()
+    if users:
+        stmt = (
+            pg_insert(GroupDailyUser)
+            .values([{"group_id": g, "day": d, "user_id": u} for g, d, u in sorted(users)])
+            .on_conflict_do_nothing()
+            .returning(GroupDailyUser.group_id, GroupDailyUser.day)
+        )
+        for row in await session.execute(stmt):
+            new_users[(row.group_id, row.day)] += 1
+
+    # Kalitlar tartiblangan: parallel yozuvchilar qatorlarni bir xil tartibda qulflaydi
+    stmt = pg_insert(GroupHourlyStats).values(
+        [{"group_id": g, "hour": h, "message_count": count} for (g, h), count in sorted(hourly.items())]
+    )
+    await session.execute(stmt.on_conflict_do_update(
+        index_elements=[GroupHourlyStats.group_id, GroupHourlyStats.hour],
+        set_={"message_count": GroupHourlyStats.message_count + stmt.excluded.message_count},
+    ))
+    stmt = pg_insert(GroupDailyStats).values([
+        {"group_id": g, "day": d, "message_count": count, "active_users": new_users[(g, d)]}
+        for (g, d), count in sorted(daily.items())
+    ])
+    await session.execute(stmt.on_conflict_do_update(
+        index_elements=[GroupDailyStats.group_id, GroupDailyStats.day],
+        set_={
+            "message_count": GroupDailyStats.message_count + stmt.excluded.message_count,
+            "active_users": GroupDailyStats.active_users + stmt.excluded.active_users,
+        },
+    ))
+
+async def group_activity(
+    session: AsyncSession,
+    group_id: int,
+    granularity: str = "day",
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+) -> List[dict]:
+    """Guruhning soatlik yoki kunlik faolligi; faqat rollup jadvalidan o‘qiladi"""
+    table = GRANULARITIES[granularity]
+    bucket = table.hour if granularity == "hour" else table.day
+    until = until or datetime.datetime.now(datetime.timezone.utc)
+    since = since or until - DEFAULT_RANGE[granularity]
+    if granularity == "day":
+        since, until = since.date(), until.date()
+    columns = [bucket, table.message_count]
+    if granularity == "day":
+        columns.append(table.active_users)
+    stmt = (
+        select(*columns)
+        .where(table.group_id == group_id, bucket >= since, bucket <= until)
+        .order_by(bucket)
+    )
+    result = await session.execute(stmt)
+    items = []
+    for row in result:
+        item = dict(row._mapping)
+        item["bucket"] = item.pop(granularity).isoformat()
+        items.append(item)
+    return items
+
+async def rebuild_rollups(logger: logging.Logger, group_id: Optional[int] = None) -> None:
+    """Rollup’larni xom `messages` jadvalidan qayta hisoblaydi (bitta tranzaksiyada).
+
+    Jadvallar EXCLUSIVE rejimda qulflanadi: parallel ingest flush’i qayta hisoblash tugashini kutadi,
+    keyin esa o‘z qo‘shimchalarini yozadi, shuning uchun hech bir xabar ikki marta sanalmaydi.
+    API keshidagi shu guruh (yoki barcha guruhlar) javoblari commit bilan birga eskiradi.
+    """
+    utc = literal_column("'UTC'")
+    hour = func.timezone(utc, func.date_trunc("hour", func.timezone(utc, Message.timestamp)))
+    day = cast(func.timezone(utc, Message.timestamp), Date)
+
+    def scoped(stmt, column):
+        return stmt.where(column == group_id) if group_id is not None else stmt
+
+    groups = {group_id} if group_id is not None else {ALL_GROUPS}
+
+    async with get_sessionmaker("ingest")() as session:
+        try:
+            tables = ", ".join(table.__tablename__ for table in ROLLUP_TABLES)
+            await session.execute(text(f"LOCK TABLE {tables} IN EXCLUSIVE MODE"))
+            for table in ROLLUP_TABLES:
+                await session.execute(scoped(delete(table), table.group_id))
+
+            hourly = scoped(select(Message.group_id, hour, func.count()), Message.group_id).group_by(Message.group_id, hour)
+            await session.execute(pg_insert(GroupHourlyStats).from_select(["group_id", "hour", "message_count"], hourly))
+            daily_users = scoped(
+                select(Message.group_id, day, Message.user_id).where(Message.user_id.is_not(None)).distinct(),
+                Message.group_id,
+            )
+            await session.execute(pg_insert(GroupDailyUser).from_select(["group_id", "day", "user_id"], daily_users))
+            daily = scoped(
+                select(Message.group_id, day, func.count(), func.count(Message.user_id.distinct())),
+                Message.group_id,
+            ).group_by(Message.group_id, day)
+            await session.execute(pg_insert(GroupDailyStats).from_select(["group_id", "day", "message_count", "active_users"], daily))
+            if STREAM_BROKER == "postgres":
+                await session.execute(notify_statement(invalidation_notifications(groups)))
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+    if STREAM_BROKER == "local":
+        group_versions.bump(groups)
+    logger.info(f"Rollup jadvallari qayta hisoblandi ({'guruh ' + str(group_id) if group_id is not None else 'barcha guruhlar'})")
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Guruh faolligi rollup jadvallari")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rebuild = commands.add_parser("rebuild", help="Rollup’larni messages jadvalidan qayta hisoblash")
+    rebuild.add_argument("--group-id", type=int, help="Faqat bitta guruh uchun")
+    args = parser.parse_args()
+
+    logger = setup_logger()
+    try:
+        if args.command == "rebuild":
+            await rebuild_rollups(logger, args.group_id)
+    finally:
+        await dispose_engines()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+from sqlalchemy import func, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql import Select
+from src.models import Message
+from src.pagination import filter_messages
+
+SIMPLE = literal_column("'simple'::regconfig")
+RUSSIAN = literal_column("'russian'::regconfig")
+HEADLINE_OPTIONS = "StartSel=<b>, StopSel=</b>, MaxWords=35, MinWords=15, MaxFragments=2"
+
+def search_tsquery(query: str):
+    """Foydalanuvchi so‘rovini search_vector bilan mos tsquery’ga aylantiradi.
+
+    Hujjat kabi so‘rov ham ikki shaklda olinadi: lotinlashtirilgan "simple" va rus stemmeri.
+    """
+    return func.websearch_to_tsquery(SIMPLE, func.tg_search_normalize(query)).op("||")(
+        func.websearch_to_tsquery(RUSSIAN, query)
+    )
+
+def apply_search(stmt: Select, query: str) -> Select:
+    """So‘rovga GIN indeks bo‘yicha to‘liq matnli qidiruv shartini qo‘shadi"""
+    return stmt.where(Message.search_vector.op("@@")(search_tsquery(query)))
+
+async def search_messages(session: AsyncSession, query: str, limit: int, **filters) -> list:
+    """Xabarlarni relevantlik bo‘yicha qidiradi va mos joylarini ajratib ko‘rsatadi.
+
+    Avval ichki so‘rovda eng yaxshi `limit` ta natija tanlanadi, ts_headline faqat ular uchun hisoblanadi.
+    """
+    tsquery = search_tsquery(query)
+    rank = func.ts_rank_cd(Message.search_vector, tsquery).label("rank")
+    ranked = (
+        filter_messages(select(Message.id, Message.group_id, Message.timestamp, rank), **filters)
+        .where(Message.search_vector.op("@@")(tsquery))
+        .order_by(rank.desc(), Message.id.desc())
+        .limit(limit)
+        .subquery()
+    )
+    stmt = (
+        select(
+            Message.id,
+            Message.group_id,
+            Message.user_id,
+            Message.timestamp,
+            Message.url,
+            ranked.c.rank,
+            func.ts_headline(SIMPLE, Message.text, tsquery, HEADLINE_OPTIONS).label("snippet"),
+        )
+        # To‘liq birlamchi kalit bo‘yicha: har bir natija faqat o‘z oylik bo‘limidan o‘qiladi
+        .join(ranked, (Message.group_id == ranked.c.group_id) & (Message.id == ranked.c.id) & (Message.timestamp == ranked.c.timestamp))
+        .order_by(ranked.c.rank.desc(), Message.id.desc())
+    )
+    result = await session.execute(stmt)
+    return [
+        {
+            "id": row.id,
+            "group_id": row.group_id,
+            "user_id": row.user_id,
+            "timestamp": row.timestamp.isoformat(),
+            "url": row.url,
+            "rank": row.rank,
+            "snippet": row.snippet,
+        }
+        for row in result
+    ]
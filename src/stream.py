@@ -0,0 +1,193 @@
+from collections import defaultdict
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import text, tuple_
+from sqlalchemy.future import select
+from config import STREAM_BROKER, STREAM_CLIENT_BUFFER, STREAM_PENDING_SIZE, STREAM_LISTEN_URL
+from src.db import database_url, get_sessionmaker
+from src.models import Message
+from src.pagination import MESSAGE_LIST_COLUMNS
+import asyncio
+import asyncpg
+import json
+import logging
+
+STREAM_CHANNEL = "tg_messages"
+NOTIFY_IDS_PER_PAYLOAD = 500  # NOTIFY payload 8000 baytdan oshmasligi kerak
+RECONNECT_DELAY = 5
+
+def notify_payloads(keys: Iterable[Tuple[int, int]]) -> List[str]:
+    """Haqiqatan yozilgan jonli xabarlar (group_id, id) kalitlarini guruh bo‘yicha NOTIFY payload’lariga ajratadi"""
+    ids = defaultdict(list)
+    for group_id, message_id in keys:
+        ids[group_id].append(message_id)
+    payloads = []
+    for group_id, message_ids in ids.items():
+        for start in range(0, len(message_ids), NOTIFY_IDS_PER_PAYLOAD):
+            payloads.append(json.dumps({"group_id": group_id, "ids": message_ids[start:start + NOTIFY_IDS_PER_PAYLOAD]}))
+    return payloads
+
+def notify_statement(notifications: List[Tuple[str, str]]):
+    """(kanal, payload) juftlari uchun bitta so‘rov: payload’lar sonidan qat'i nazar bitta pg_notify bayonoti"""
+    channels, payloads = zip(*notifications)
+    return text(
+        "SELECT pg_notify(n.channel, n.payload) "
+        "FROM unnest(CAST(:channels AS text[]), CAST(:payloads AS text[])) AS n(channel, payload)"
+    ).bindparams(channels=list(channels), payloads=list(payloads))
+
+async def listen(
+    channel: str,
+    on_payload: Callable[[str], None],
+    logger: logging.Logger,
+    on_connect: Optional[Callable[[], None]] = None,
+    on_disconnect: Optional[Callable[[], None]] = None,
+) -> None:
+    """Alohida asyncpg ulanishida LISTEN; ulanish uzilsa qayta ulanadi.
+
+    `on_connect` tinglash boshlangach, `on_disconnect` ulanish yo‘qolganda chaqiriladi
+    (uzilish paytidagi bildirishnomalar yetib kelmaydi).
+    """
+    dsn = STREAM_LISTEN_URL or database_url().set(drivername="postgresql").render_as_string(hide_password=False)
+    while True:
+        connection = None
+        try:
+            connection = await asyncpg.connect(dsn)
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda conn: closed.set())
+            await connection.add_listener(channel, lambda conn, pid, channel, payload: on_payload(payload))
+            if on_connect:
+                on_connect()
+            logger.info(f"{channel} kanali tinglanmoqda")
+            await closed.wait()
+            logger.warning(f"{channel} tinglovchi ulanishi uzildi, qayta ulanilmoqda")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"{channel} kanaliga ulanishda xato: {e}")
+        finally:
+            if on_disconnect:
+                on_disconnect()
+            if connection is not None and not connection.is_closed():
+                await connection.close()
+        await asyncio.sleep(RECONNECT_DELAY)
+
+class Subscription:
+    """Bitta mijozning filtri va chegaralangan buferi.
+
+    Bufer to‘lsa eng eski xabar tashlab yuboriladi, sekin mijoz hub’ni to‘xtatib qo‘ymaydi.
+    """
+
+    def __init__(self, group_ids: Optional[Iterable[int]] = None, keywords: Optional[Iterable[str]] = None, max_size: int = STREAM_CLIENT_BUFFER):
+        self.group_ids: Optional[Set[int]] = set(group_ids) if group_ids else None
+        self.keywords = [keyword.casefold() for keyword in keywords or [] if keyword.strip()]
+        self.queue: asyncio.Queue = asyncio.Queue(max_size)
+        self.dropped = 0
+
+    def matches(self, message: dict) -> bool:
+        if self.group_ids is not None and message["group_id"] not in self.group_ids:
+            return False
+        if self.keywords:
+            text = (message["text"] or "").casefold()
+            return any(keyword in text for keyword in self.keywords)
+        return True
+
+    def push(self, message: dict) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def next(self, timeout: float) -> Optional[dict]:
+        """Keyingi xabar; `timeout` ichida kelmasa None (heartbeat yuborish uchun)"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def take_dropped(self) -> int:
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+class StreamHub:
+    """Saqlangan xabarlar haqidagi bildirishnomalarni qabul qilib, obunachilarga tarqatadi.
+
+    Bildirishnomada faqat ID’lar bo‘ladi: har bir payload uchun bitta so‘rov bilan xabarlar o‘qiladi,
+    mijozlar soniga bog‘liq bo‘lmagan holda. O‘qilmagan payload’lar navbati `pending_size` bilan
+    chegaralangan: to‘lsa eng eskisi tashlanadi va obunachilarga "dropped" sifatida bildiriladi.
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None, broker: str = STREAM_BROKER, pending_size: int = STREAM_PENDING_SIZE):
+        self.logger = logger or logging.getLogger(__name__)
+        self.broker = broker
+        self.pending_size = pending_size
+        self.subscribers: Set[Subscription] = set()
+        self._pending: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._pending = asyncio.Queue(self.pending_size)
+        self._tasks.append(asyncio.create_task(self._dispatch()))
+        if self.broker == "postgres":
+            self._tasks.append(asyncio.create_task(self._listen()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def subscribe(self, group_ids: Optional[Iterable[int]] = None, keywords: Optional[Iterable[str]] = None) -> Subscription:
+        self.start()
+        subscription = Subscription(group_ids, keywords)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscribers.discard(subscription)
+
+    def publish(self, payload: str) -> None:
+        """NOTIFY payload’ini navbatga qo‘yadi ("local" rejimda save_messages to‘g‘ridan-to‘g‘ri chaqiradi)"""
+        if self._pending is None or not self.subscribers:
+            return
+        if self._pending.full():
+            self._drop(self._pending.get_nowait())
+        self._pending.put_nowait(payload)
+
+    def _drop(self, payload: str) -> None:
+        """Navbatdan tashlangan payload xabarlari har bir obunachiga yo‘qotilgan deb hisoblanadi"""
+        try:
+            count = len(json.loads(payload)["ids"])
+        except (ValueError, KeyError, TypeError):
+            count = 1
+        for subscription in self.subscribers:
+            subscription.dropped += count
+        self.logger.warning(f"Oqim navbati to‘ldi, {count} ta xabar bildirishnomasi tashlandi")
+
+    async def _listen(self) -> None:
+        await listen(STREAM_CHANNEL, self.publish, self.logger)
+
+    async def _dispatch(self) -> None:
+        while True:
+            payload = await self._pending.get()
+            if not self.subscribers:
+                continue
+            try:
+                data = json.loads(payload)
+                keys = [(data["group_id"], message_id) for message_id in data["ids"]]
+                async with get_sessionmaker("api")() as session:
+                    result = await session.execute(
+                        select(*MESSAGE_LIST_COLUMNS)
+                        .where(tuple_(Message.group_id, Message.id).in_(keys))
+                        .order_by(Message.timestamp, Message.group_id, Message.id)
+                    )
+                    messages = [row._asdict() for row in result]
+            except Exception as e:
+                self.logger.error(f"Oqim bildirishnomasini qayta ishlashda xato: {e}")
+                continue
+            for subscription in list(self.subscribers):
+                for message in messages:
+                    if subscription.matches(message):
+                        subscription.push(message)
+
+stream_hub = StreamHub()
@@ -0,0 +1,86 @@
+from typing import Iterable, List, Optional, Set
+import re
+import sys
+
+# Apostrof variantlari bitta shaklga keltiriladi: "so‘z", "so'z", "soʻz", "so`z" -> "so'z"
+APOSTROPHE = "'"
+APOSTROPHES = "‘’ʻʼ`´'"
+
+# O‘zbek kirill -> lotin (rasmiy imlo); rus matnidagi ы/э ham qo‘shilgan
+CYRILLIC_TO_LATIN = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "yo", "ж": "j", "з": "z",
+    "и": "i", "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r",
+    "с": "s", "т": "t", "у": "u", "ф": "f", "х": "x", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sh",
+    "ъ": APOSTROPHE, "ь": "", "ы": "i", "э": "e", "ю": "yu", "я": "ya",
+    "ў": "o" + APOSTROPHE, "қ": "q", "ғ": "g" + APOSTROPHE, "ҳ": "h",
+}
+
+# Matn kichik harfga o‘tkazilgandan keyin qo‘llanadi
+_FOLD_TABLE = str.maketrans({char: APOSTROPHE for char in APOSTROPHES})
+_TRANSLIT_TABLE = str.maketrans({**{char: APOSTROPHE for char in APOSTROPHES}, **CYRILLIC_TO_LATIN})
+# \x00 paket ichidagi matnlar ajratuvchisi, shuning uchun URL undan o‘tib ketmasligi kerak
+_NOISE_RE = re.compile(r"(?:https?://|www\.|t\.me/)[^\s\x00]+|@\w+")
+# Harflardan iborat so‘z, ichida apostrof bo‘lishi mumkin (boshi/oxiridagi apostrof tashlanadi)
+_TOKEN_RE = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)*")
+_SEPARATOR = "\x00"
+
+UZBEK_STOPWORDS = """
+va bu u ham bilan uchun deb esa lekin ammo yoki bir har shu o'sha bor yo'q edi ekan emas kabi
+qilib qiladi qilish qildi men sen biz siz ular uning bizning mening sizning ularning nima
+qanday nega qachon qayerda qaysi endi hali juda eng yana faqat agar chunki balki hamma barcha
+o'z bo'ladi bo'lib bo'lgan bo'lsa kerak mumkin haqida keyin oldin bilan ga da dan ni ning mi
+ta xil ko'p kam hech hamda ya'ni yo ya albatta mana ana shunday bunday unga bunga menga sizga
+""".split()
+
+RUSSIAN_STOPWORDS = """
+и в во не что он на я с со как а то все она так его но да ты к у же вы за бы по только ее мне
+было вот от меня еще нет о из ему теперь когда даже ну ли если уже или ни быть был него до вас
+вам ведь там потом себя ничего ей может они тут где есть надо ней для мы тебя их чем была сам
+чтоб без чего раз тоже себе под будет ж тогда кто этот того потому этого какой ним здесь этом
+один почти мой тем чтобы нее сейчас были куда зачем всех можно при об хоть после над больше тот
+через эти нас про всего них какая много эту моя свою этой перед том нельзя такой им более всю
+между это очень
+""".split()
+
+ENGLISH_STOPWORDS = "the a an and or of to in on for is are was it this that with at by from be".split()
+
+class Tokenizer:
+    """O‘zbek matnlari uchun normallashtiruvchi tokenizer.
+
+    Kichik harf, apostroflarni birlashtirish, ixtiyoriy kirill -> lotin, URL va @mention’larni
+    olib tashlash, stop-so‘zlar va qisqa tokenlarni tashlab yuborish.
+    """
+
+    def __init__(self, transliterate: bool = True, stopwords: Optional[Iterable[str]] = None, min_length: int = 2):
+        self.table = _TRANSLIT_TABLE if transliterate else _FOLD_TABLE
+        self.min_length = min_length
+        if stopwords is None:
+            stopwords = UZBEK_STOPWORDS + RUSSIAN_STOPWORDS + ENGLISH_STOPWORDS
+        # Stop-so‘zlar ham matn bilan bir xil normallashtiriladi (masalan, rus ro‘yxati lotinlashadi)
+        self.stopwords: Set[str] = {self.normalize(word) for word in stopwords}
+
+    def normalize(self, text: str) -> str:
+        return _NOISE_RE.sub(" ", text.lower()).translate(self.table)
+
+    def _tokens(self, text: str) -> List[str]:
+        stopwords, min_length = self.stopwords, self.min_length
+        return [
+            sys.intern(token)
+            for token in _TOKEN_RE.findall(text)
+            if len(token) >= min_length and token not in stopwords
+        ]
+
+    def tokenize(self, text: Optional[str]) -> List[str]:
+        return self._tokens(self.normalize(text)) if text else []
+
+    def normalize_batch(self, texts: List[Optional[str]]) -> List[str]:
+        """Paketdagi barcha matnlarni bitta satr sifatida normallashtiradi.
+
+        lower(), regex va translate() har bir xabar uchun emas, paket uchun bir marta chaqiriladi.
+        """
+        joined = _SEPARATOR.join((text or "").replace(_SEPARATOR, " ") for text in texts)
+        return self.normalize(joined).split(_SEPARATOR)
+
+    def tokenize_batch(self, texts: List[Optional[str]]) -> List[List[str]]:
+        """Tokenlar intern qilinadi, shunda takroriy so‘zlar hisoblagichlarda bitta obyektni ulashadi"""
+        return [self._tokens(part) for part in self.normalize_batch(texts)]
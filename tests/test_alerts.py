@@ -0,0 +1,66 @@
+from typing import List
+from src.alerts import KeywordAlerts, KeywordAutomaton, canonical, load_rules
+from src.tokenizer import Tokenizer
+import asyncio
+
+tokenizer = Tokenizer()
+
+def automaton(*rules: str) -> KeywordAutomaton:
+    return KeywordAutomaton([canonical(tokenizer.normalize(rule)) for rule in rules], rules)
+
+def matches(automaton: KeywordAutomaton, text: str) -> List[str]:
+    return sorted(automaton.names[i] for i in automaton.find(canonical(tokenizer.normalize(text))))
+
+def test_overlapping_rules_all_match():
+    rules = automaton("qizil olma", "olma", "qizil olma sotiladi", "olma sotiladi")
+    assert matches(rules, "Bozorda qizil olma sotiladi") == ["olma", "olma sotiladi", "qizil olma", "qizil olma sotiladi"]
+
+def test_match_is_on_whole_words_only():
+    rules = automaton("olma")
+    assert matches(rules, "olmaxon keldi") == []
+    assert matches(rules, "Олма келди") == ["olma"]
+
+def test_load_rules_skips_comments_and_merges_variants(tmp_path):
+    path = tmp_path / "rules.txt"
+    path.write_text("# izoh\n\nso‘z\nso'z\nqizil olma\n", encoding="utf-8")
+    rules = load_rules(str(path), tokenizer)
+    assert len(rules) == 2
+
+class Notifier:
+    def __init__(self):
+        self.sent: List[str] = []
+
+    async def send(self, text: str) -> None:
+        self.sent.append(text)
+
+def message(text: str) -> dict:
+    return {"group_id": 1, "group_name": "Guruh", "text": text, "url": None}
+
+def test_debounced_matches_are_sent_as_summary():
+    async def run():
+        notifier = Notifier()
+        alerts = KeywordAlerts(notifier, tokenizer=tokenizer, debounce=60)
+        alerts.automaton = automaton("olma")
+        alerts.check([message("olma bor")], now=0)
+        await alerts.flush(now=0)
+        assert len(notifier.sent) == 1
+        alerts.check([message("yana olma")], now=10)
+        alerts.check([message("oxirgi olma")], now=20)
+        await alerts.flush(now=30)
+        assert len(notifier.sent) == 1  # Debounce muddati tugamagan
+        await alerts.flush(now=61)
+        assert len(notifier.sent) == 2
+        assert "(×2)" in notifier.sent[1] and "oxirgi olma" in notifier.sent[1]
+        await alerts.flush(now=200)
+        assert len(notifier.sent) == 2
+    asyncio.run(run())
+
+def test_backfill_messages_do_not_alert():
+    async def run():
+        notifier = Notifier()
+        alerts = KeywordAlerts(notifier, tokenizer=tokenizer, debounce=60)
+        alerts.automaton = automaton("olma")
+        alerts.check([{**message("olma"), "backfill": {"top_id": 1}}], now=0)
+        await alerts.flush(now=0)
+        assert notifier.sent == []
+    asyncio.run(run())
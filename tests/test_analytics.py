@@ -0,0 +1,34 @@
+from src.analytics import SpaceSaving, SlidingWindow, parse_windows
+
+def test_space_saving_keeps_heavy_hitters():
+    summary = SpaceSaving(capacity=3)
+    summary.update({"a": 10, "b": 5, "c": 1})
+    summary.add("d")  # eng kichik hisoblagich (c=1) o‘rnini egallaydi
+    assert set(summary.counts) == {"a", "b", "d"}
+    assert summary.counts["d"] == 2  # min + count
+    summary.add("a", 3)
+    assert summary.counts["a"] == 13
+
+def test_space_saving_evicts_current_minimum():
+    summary = SpaceSaving(capacity=2)
+    summary.update({"a": 1, "b": 1})
+    summary.add("a", 5)  # heap’dagi "a" yozuvi eskirdi, minimum endi "b"
+    summary.add("c")
+    assert set(summary.counts) == {"a", "c"}
+
+def test_sliding_window_expires_old_buckets():
+    window = SlidingWindow(duration=60, buckets=3, capacity=10)
+    window.add({"eski": 5}, now=0)
+    window.add({"yangi": 2}, now=45)
+    assert dict(window.top(10, now=45)) == {"eski": 5, "yangi": 2}
+    assert dict(window.top(10, now=70)) == {"yangi": 2}
+    assert window.is_empty(now=200)
+
+def test_sliding_window_merges_buckets_for_top():
+    window = SlidingWindow(duration=60, buckets=3, capacity=10)
+    window.add({"a": 1, "b": 3}, now=0)
+    window.add({"a": 5}, now=25)
+    assert window.top(1, now=30) == [("a", 6)]
+
+def test_parse_windows():
+    assert parse_windows("1h:6,24h:12") == {"1h": (3600, 6), "24h": (86400, 12)}
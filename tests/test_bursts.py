@@ -0,0 +1,57 @@
+from collections import Counter
+from src.bursts import BurstDetector
+
+TICK = 60
+
+def steady(detector: BurstDetector, ticks: int, terms: Counter, start: int = 0) -> int:
+    """`ticks` ta tick davomida bir xil hisob; keyingi tick raqamini qaytaradi"""
+    for tick in range(start, start + ticks):
+        detector.observe({1: terms}, Counter({1: sum(terms.values())}), tick * TICK)
+    return start + ticks
+
+def make_detector(**kwargs) -> BurstDetector:
+    options = {"tick": TICK, "alpha": 0.1, "threshold": 4, "min_count": 5, "warmup_ticks": 5}
+    options.update(kwargs)
+    return BurstDetector(**options)
+
+def flagged_terms(detector: BurstDetector) -> list:
+    return [event["term"] for event in detector.pending]
+
+def test_flags_term_above_threshold():
+    detector = make_detector()
+    tick = steady(detector, 20, Counter({"salom": 6}))
+    detector.observe({1: Counter({"salom": 30})}, Counter({1: 30}), tick * TICK)
+    assert "salom" in flagged_terms(detector)
+
+def test_does_not_flag_normal_variation():
+    detector = make_detector()
+    tick = steady(detector, 20, Counter({"salom": 6}))
+    detector.observe({1: Counter({"salom": 7})}, Counter({1: 7}), tick * TICK)
+    assert detector.pending == []
+
+def test_nothing_is_flagged_during_warmup():
+    detector = make_detector(warmup_ticks=30)
+    tick = steady(detector, 5, Counter({"salom": 1}))
+    detector.observe({1: Counter({"yangi": 50})}, Counter({1: 50}), tick * TICK)
+    assert detector.pending == []
+
+def test_evicts_lowest_baseline_instead_of_oldest():
+    detector = make_detector(max_terms=5)
+    tick = steady(detector, 20, Counter({"salom": 6, "rahmat": 1}))
+    # Bir martalik so‘zlar jadvalni to‘ldiradi, tez-tez uchraydigan so‘z esa qoladi
+    detector.observe({1: Counter({f"soz{i}": 1 for i in range(20)})}, Counter({1: 10}), tick * TICK)
+    detector.observe({1: Counter()}, Counter({1: 10}), (tick + 1) * TICK)
+    assert "salom" in detector.terms[1]
+    assert len(detector.terms[1]) == 5
+
+def test_evicted_term_keeps_its_baseline():
+    detector = make_detector(max_terms=1)
+    tick = steady(detector, 20, Counter({"salom": 6}))
+    # Bazasi yuqoriroq so‘z "salom" ni jadvaldan chiqaradi
+    tick = steady(detector, 3, Counter({"xabar": 50}), tick)
+    detector.observe({1: Counter()}, Counter({1: 1}), tick * TICK)
+    assert "salom" not in detector.terms[1]
+    assert "salom" in detector.evicted[1]
+    detector.pending.clear()
+    detector.observe({1: Counter({"salom": 7})}, Counter({1: 7}), tick * TICK + 1)
+    assert detector.pending == []
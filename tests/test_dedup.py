@@ -0,0 +1,43 @@
+from src.dedup import DuplicateIndex, _init_worker, text_signatures
+
+TEXT = "Bugun kechqurun shahar markazida katta konsert bo‘ladi, hamma taklif qilinadi, kirish bepul"
+NEAR = "Bugun kechqurun shahar markazida katta konsert bo‘ladi, hamma taklif qilinadi, kirish bepul!!! Tarqating"
+OTHER = "Ertaga ertalab universitetda imtihon boshlanadi, talabalar hujjatlarini olib kelishi shart"
+THIRD = "Yangi kitob do‘koni ochildi, birinchi hafta davomida barcha kitoblarga chegirma amal qiladi"
+
+def assign(index: DuplicateIndex, *texts: str) -> list:
+    messages = [{"text": text} for text in texts]
+    index.assign(messages)
+    return [msg["cluster_id"] for msg in messages]
+
+def test_near_duplicates_share_cluster():
+    first, second = assign(DuplicateIndex(), TEXT, NEAR)
+    assert first is not None and first == second
+
+def test_distinct_texts_get_different_clusters():
+    first, second = assign(DuplicateIndex(), TEXT, OTHER)
+    assert first != second
+
+def test_short_text_is_not_clustered():
+    assert assign(DuplicateIndex(), "rahmat") == [None]
+
+def test_capacity_evicts_least_recent_cluster():
+    index = DuplicateIndex(capacity=2)
+    first, _, _ = assign(index, TEXT, OTHER, THIRD)
+    assert len(index.clusters) == 2
+    assert first not in index.clusters
+    assert set(index.buckets.values()) <= set(index.clusters)
+
+def test_register_merges_cluster_opened_during_rebuild():
+    index = DuplicateIndex()
+    index.rebuilding = True
+    [provisional] = assign(index, NEAR)
+    _init_worker(index.tokenizer)
+    [signature] = text_signatures([TEXT], index.min_tokens)
+    index.register(42, signature)
+    assert index._merged == {provisional: 42}
+    assert provisional not in index.clusters
+    # Eski ID bilan saqlangan xabar qayta kelsa ham ikkinchi klaster ochilmaydi
+    index.register(provisional, signature)
+    assert list(index.clusters) == [42]
+    assert assign(index, NEAR) == [42]
@@ -0,0 +1,89 @@
+from typing import List
+from src import ingest
+from src.ingest import IngestQueue
+import asyncio
+import logging
+import pytest
+
+logger = logging.getLogger("test")
+
+class Writer:
+    """Paketlarni yozib boradi; `failures` marta xato beradi"""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.batches: List[List[dict]] = []
+
+    async def __call__(self, batch: List[dict], logger: logging.Logger) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("databaza mavjud emas")
+        self.batches.append([msg["id"] for msg in batch])
+
+def test_flushes_when_batch_is_full():
+    async def run():
+        writer = Writer()
+        queue = IngestQueue(logger, batch_size=3, flush_interval=60, writer=writer)
+        queue.start()
+        for i in range(3):
+            await queue.put({"id": i})
+        for _ in range(100):
+            if writer.batches:
+                break
+            await asyncio.sleep(0.01)
+        assert writer.batches == [[0, 1, 2]]
+        await queue.stop()
+    asyncio.run(run())
+
+def test_flushes_after_deadline():
+    async def run():
+        writer = Writer()
+        queue = IngestQueue(logger, batch_size=100, flush_interval=0.05, writer=writer)
+        queue.start()
+        await queue.put({"id": 1})
+        await queue.put({"id": 2})
+        await asyncio.sleep(0.2)
+        assert writer.batches == [[1, 2]]
+        await queue.stop()
+    asyncio.run(run())
+
+def test_barrier_waits_for_queued_messages():
+    async def run():
+        writer = Writer()
+        queue = IngestQueue(logger, batch_size=100, flush_interval=60, writer=writer)
+        queue.start()
+        await queue.put({"id": 1})
+        await asyncio.wait_for(queue.barrier(), 1)
+        assert writer.batches == [[1]]
+        await queue.put({"id": 2})
+        await asyncio.wait_for(queue.barrier(), 1)
+        assert writer.batches == [[1], [2]]
+        await queue.stop()
+    asyncio.run(run())
+
+def test_stop_drains_queue_and_rejects_new_messages():
+    async def run():
+        writer = Writer()
+        queue = IngestQueue(logger, batch_size=2, flush_interval=60, writer=writer)
+        queue.start()
+        for i in range(5):
+            await queue.put({"id": i})
+        await asyncio.wait_for(queue.stop(), 1)
+        assert [i for batch in writer.batches for i in batch] == [0, 1, 2, 3, 4]
+        with pytest.raises(RuntimeError):
+            await queue.put({"id": 5})
+    asyncio.run(run())
+
+def test_writer_error_retries_whole_batch(monkeypatch):
+    monkeypatch.setattr(ingest, "INGEST_RETRY_DELAY", 0.01)
+    async def run():
+        writer = Writer(failures=2)
+        queue = IngestQueue(logger, batch_size=2, flush_interval=60, writer=writer)
+        queue.start()
+        await queue.put({"id": 1})
+        await queue.put({"id": 2})
+        await asyncio.wait_for(queue.barrier(), 1)
+        assert writer.batches == [[1, 2]]
+        assert writer.failures == 0
+        await queue.stop()
+    asyncio.run(run())
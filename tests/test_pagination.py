@@ -0,0 +1,32 @@
+from collections import namedtuple
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.future import select
+from src.pagination import MESSAGE_LIST_COLUMNS, decode_cursor, encode_cursor, next_cursor, paginate_messages
+import base64
+import datetime
+import pytest
+
+TIMESTAMP = datetime.datetime(2026, 3, 1, 12, 30, 5, 123456, tzinfo=datetime.timezone.utc)
+Row = namedtuple("Row", "timestamp group_id id")
+
+def test_cursor_round_trip_includes_group_id():
+    cursor = encode_cursor(TIMESTAMP, -1001234567890, 42)
+    assert decode_cursor(cursor) == (TIMESTAMP, -1001234567890, 42)
+
+@pytest.mark.parametrize("cursor", ["", "!!!", base64.urlsafe_b64encode(f"{TIMESTAMP.isoformat()}|42".encode()).decode()])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+def test_next_cursor_points_at_last_row_of_page():
+    rows = [Row(TIMESTAMP, -100, 3), Row(TIMESTAMP, -200, 3), Row(TIMESTAMP, -200, 2)]
+    page, cursor = next_cursor(rows, 2)
+    assert page == rows[:2]
+    assert decode_cursor(cursor) == (TIMESTAMP, -200, 3)
+    assert next_cursor(rows, 3) == (rows, None)
+
+def test_order_by_matches_cursor():
+    stmt = paginate_messages(select(*MESSAGE_LIST_COLUMNS), encode_cursor(TIMESTAMP, -100, 3), 10)
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "ORDER BY messages.timestamp DESC, messages.group_id DESC, messages.id DESC" in sql
+    assert "messages.group_id <" in sql
@@ -0,0 +1,73 @@
+from starlette.requests import Request
+from src.response_cache import ALL_GROUPS, GroupVersions, ResponseCache
+import asyncio
+
+def request(path: str = "/stats/activity", query: bytes = b"group_id=1", etag: str = None) -> Request:
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query, "headers": headers})
+
+class Producer:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return {"calls": self.calls}
+
+def test_matching_etag_returns_304_without_produce():
+    async def run():
+        cache = ResponseCache(GroupVersions(broker="local"))
+        produce = Producer()
+        first = await cache.respond(request(), 1, produce)
+        assert first.status_code == 200
+        again = await cache.respond(request(etag=first.headers["etag"]), 1, produce)
+        assert again.status_code == 304
+        cached = await cache.respond(request(), 1, produce)
+        assert cached.body == first.body
+        assert produce.calls == 1
+    asyncio.run(run())
+
+def test_bump_reruns_produce():
+    async def run():
+        versions = GroupVersions(broker="local")
+        cache = ResponseCache(versions)
+        produce = Producer()
+        first = await cache.respond(request(), 1, produce)
+        versions.bump({1})
+        second = await cache.respond(request(etag=first.headers["etag"]), 1, produce)
+        assert second.status_code == 200
+        assert second.headers["etag"] != first.headers["etag"]
+        assert produce.calls == 2
+    asyncio.run(run())
+
+def test_bump_of_other_group_keeps_cache():
+    async def run():
+        versions = GroupVersions(broker="local")
+        cache = ResponseCache(versions)
+        produce = Producer()
+        await cache.respond(request(), 1, produce)
+        versions.bump({2})
+        await cache.respond(request(), 1, produce)
+        assert produce.calls == 1
+    asyncio.run(run())
+
+def test_all_groups_bump_invalidates_every_group():
+    async def run():
+        versions = GroupVersions(broker="local")
+        cache = ResponseCache(versions)
+        produce = Producer()
+        await cache.respond(request(), 1, produce)
+        versions.bump({ALL_GROUPS})
+        await cache.respond(request(), 1, produce)
+        assert produce.calls == 2
+    asyncio.run(run())
+
+def test_unsynced_versions_bypass_cache():
+    async def run():
+        cache = ResponseCache(GroupVersions(broker="postgres"))
+        produce = Producer()
+        first = await cache.respond(request(), 1, produce)
+        await cache.respond(request(), 1, produce)
+        assert "etag" not in first.headers
+        assert produce.calls == 2
+    asyncio.run(run())
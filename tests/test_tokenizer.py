@@ -0,0 +1,19 @@
+from src.tokenizer import Tokenizer
+
+def test_cyrillic_is_folded_to_latin():
+    tokens = Tokenizer().tokenize("Салом дунё! Ўзбекистон, Қорақалпоғистон")
+    assert tokens == ["salom", "dunyo", "o'zbekiston", "qoraqalpog'iston"]
+
+def test_apostrophe_variants_are_normalised():
+    assert Tokenizer().tokenize("so‘z soʻz so`z so'z") == ["so'z"] * 4
+
+def test_urls_mentions_and_stopwords_are_dropped():
+    assert Tokenizer().tokenize("Bu yangilik https://t.me/kanal @admin va kanal") == ["yangilik", "kanal"]
+
+def test_transliteration_can_be_disabled():
+    assert Tokenizer(transliterate=False).tokenize("Салом so‘z") == ["салом", "so'z"]
+
+def test_batch_matches_single_tokenize():
+    tokenizer = Tokenizer()
+    texts = ["Ғалаба куни", None, "", "Шаҳар маркази"]
+    assert tokenizer.tokenize_batch(texts) == [tokenizer.tokenize(text) for text in texts]